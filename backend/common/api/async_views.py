@@ -0,0 +1,122 @@
+"""Async counterparts of read-only DRF list views.
+
+DRF views are synchronous, so under ASGI every request to them is handed to
+a worker thread for its whole duration. ``AsyncListView`` serves the same
+list from a native async Django view: it reuses the sync view's queryset,
+filtering, permissions, serializer and pagination, but authenticates with the
+authentication classes' ``aauthenticate`` and fetches rows with the async
+ORM (``aiterator``). Rows are fully loaded before serialization (the sync
+views' eager loading already guarantees that), so serialization runs on the
+event loop without touching the database; a lazy query would fail loudly
+with ``SynchronousOnlyOperation``.
+
+Django's async ORM still runs each query in a thread. The gain is that a
+request holds a thread only while its queries run, not while it waits on the
+client, the cache or other requests.
+"""
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from common.api.mixins import VersionedCacheMixin, cached_response
+from common.cache import aversioned_key, get_cache, make_etag
+from users.authentication import AsyncSessionAuthentication, CachedTokenAuthentication, SignedTokenAuthentication
+
+
+class AsyncAPIView(View):
+    """Base of the async views: DRF-style authentication, throttling, rendering and error responses."""
+    authentication_classes = [AsyncSessionAuthentication, SignedTokenAuthentication, CachedTokenAuthentication]
+    throttle_classes = []
+
+    async def authenticate(self, request):
+        """Return ``(user, auth)`` from the first authentication class accepting the request."""
+        for authentication_class in self.authentication_classes:
+            result = await authentication_class().aauthenticate(request)
+            if result is not None:
+                return result
+        return AnonymousUser(), None
+
+    async def check_throttles(self, request):
+        """Take from every throttle, as DRF does, and raise ``Throttled`` if any refused."""
+        waits = []
+        for throttle in (throttle_class() for throttle_class in self.throttle_classes):
+            if not await throttle.aallow_request(request, self):
+                waits.append(throttle.wait())
+        if waits:
+            raise exceptions.Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+    def render(self, data):
+        return HttpResponse(JSONRenderer().render(data), content_type='application/json')
+
+    def handle_exception(self, exc):
+        # As in the DRF views: the first authentication class sends no
+        # WWW-Authenticate header, so authentication failures are 403s
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            exc.status_code = 403
+        detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(detail)
+        response.status_code = exc.status_code
+        if getattr(exc, 'wait', None):
+            response['Retry-After'] = '%d' % exc.wait
+        return response
+
+
+class AsyncListView(AsyncAPIView):
+    """Async, read-only version of the DRF list view ``view_class``.
+
+    ``view_class`` must paginate with ``KeysetPagination`` (or not at all)
+    and eager load everything its serializer reads. ``VersionedCacheMixin``
+    views are served from the versioned API cache too.
+    """
+    view_class = None
+    http_method_names = ['get', 'head', 'options']
+    # Rows per round trip when listing without pagination
+    chunk_size = 2000
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            view = await self.initial(request, args, kwargs)
+            if issubclass(self.view_class, VersionedCacheMixin):
+                cache = get_cache()
+                key = await aversioned_key(type(self).__name__, self.view_class.cache_namespaces,
+                                           request.get_full_path())
+                cached = await cache.aget(key)
+                if cached is None:
+                    body = JSONRenderer().render(await self.list(view))
+                    cached = (body, make_etag(body))
+                    await cache.aset(key, cached, self.view_class.cache_timeout)
+                return cached_response(request, *cached)
+            data = await self.list(view)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+        return self.render(data)
+
+    async def initial(self, request, args, kwargs):
+        """Authenticate the request and return the sync view instance after its permission checks."""
+        user, auth = await self.authenticate(request)
+        drf_request = Request(request, authenticators=())
+        drf_request.user = user
+        drf_request.auth = auth
+
+        view = self.view_class(request=drf_request, args=args, kwargs=kwargs, format_kwarg=None, headers={})
+        for permission in view.get_permissions():
+            if not permission.has_permission(drf_request, view):
+                if not user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+        return view
+
+    async def list(self, view):
+        queryset = view.filter_queryset(view.get_queryset())
+        paginator = view.paginator
+        if paginator is not None:
+            page = await paginator.apaginate_queryset(queryset, view.request, view=view)
+            if page is not None:
+                serializer = view.get_serializer(page, many=True)
+                return view.get_paginated_response(serializer.data).data
+
+        objects = [obj async for obj in queryset.aiterator(chunk_size=self.chunk_size)]
+        return view.get_serializer(objects, many=True).data
@@ -0,0 +1,58 @@
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from common.cache import get_cache, make_etag, versioned_key
+
+
+class EagerLoadingViewMixin:
+    """Generic view mixin applying the serializer's eager loading to the queryset.
+
+    The hook sits in ``filter_queryset`` so it is applied for both ``list()``
+    and ``get_object()`` regardless of how the view builds ``get_queryset()``.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        setup_eager_loading = getattr(serializer_class, 'setup_eager_loading', None)
+        if setup_eager_loading is not None:
+            queryset = setup_eager_loading(queryset)
+        return queryset
+
+
+class VersionedCacheMixin:
+    """Generic view mixin serving GET responses from the versioned API cache.
+
+    The rendered JSON bytes are cached under a key built from the request path
+    and the versions of ``cache_namespaces``; a model signal bumping one of
+    those versions invalidates the entry. Responses carry an ``ETag`` and a
+    matching ``If-None-Match`` gets a 304 without rendering or querying.
+    Only use it for responses that do not depend on the requesting user.
+    """
+    cache_namespaces = ()
+    cache_timeout = 60 * 60
+
+    def get(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = versioned_key(type(self).__name__, self.cache_namespaces, request.get_full_path())
+        cached = cache.get(key)
+        if cached is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            body = JSONRenderer().render(response.data)
+            cached = (body, make_etag(body))
+            cache.set(key, cached, self.cache_timeout)
+        return cached_response(request, *cached)
+
+
+def cached_response(request, body, etag):
+    """Return ``body`` tagged with ``etag``, or a 304 if the client already has it."""
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,34 @@
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.profiling import collect_records, get_config, reset, summarize_views
+
+SORT_FIELDS = ('p95_ms', 'p99_ms', 'total_ms', 'mean_db_ms', 'mean_queries', 'mean_duplicates', 'requests')
+
+
+class ProfilingStatsView(APIView):
+    """API view for staff to inspect sampled per-view latency and query statistics."""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        sort = request.query_params.get('sort', 'p95_ms')
+        if sort not in SORT_FIELDS:
+            return Response({"sort": f"Choose one of: {', '.join(SORT_FIELDS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, int(request.query_params.get('limit', 20)))
+        except ValueError:
+            return Response({"limit": "A valid integer is required."}, status=status.HTTP_400_BAD_REQUEST)
+        
+        records = collect_records()
+        views = sorted(summarize_views(records), key=lambda row: row[sort], reverse=True)
+        return Response({
+            'sample_rate': get_config()['SAMPLE_RATE'],
+            'sampled_requests': len(records),
+            'views': views[:limit],
+        })
+    
+    def delete(self, request):
+        reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
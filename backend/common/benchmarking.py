@@ -0,0 +1,196 @@
+"""Helpers shared by the benchmark management commands."""
+import asyncio
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def benchmark_database(keepdb=False, verbosity=0):
+    """Run the enclosed block against a throwaway copy of the default database.
+
+    Uses the test database machinery so benchmarks never write synthetic data
+    into the configured database.
+    """
+    creation = connection.creation
+    old_name = connection.settings_dict['NAME']
+    creation.create_test_db(verbosity=verbosity, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        for alias in connections:
+            connections[alias].close()
+        creation.destroy_test_db(old_name, verbosity=verbosity, keepdb=keepdb)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies):
+    """Summarize latencies in seconds as milliseconds statistics."""
+    return {
+        'count': len(latencies),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3),
+    }
+
+
+def measure(func, iterations, warmup=1):
+    """Call ``func`` repeatedly and return latency statistics, throughput and queries per call."""
+    for i in range(warmup):
+        func()
+    latencies = []
+    queries = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        # The query log is a bounded deque; once full its length stops growing
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as context:
+            call_started = time.perf_counter()
+            func()
+            latencies.append(time.perf_counter() - call_started)
+        queries += len(context)
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies)
+    result['throughput_per_s'] = round(iterations / elapsed, 2)
+    result['queries_per_call'] = queries / iterations
+    return result
+
+
+def measure_concurrent(func, requests, workers):
+    """Call ``func`` ``requests`` times from ``workers`` threads and return throughput.
+
+    Each thread uses its own database connection, closed when it finishes.
+    Exceptions are counted rather than raised so one failure does not hide
+    the rest of the run.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    share, extra = divmod(requests, workers)
+
+    def worker(count):
+        try:
+            for i in range(count):
+                call_started = time.perf_counter()
+                try:
+                    func()
+                except Exception as exc:
+                    with lock:
+                        errors.append(repr(exc))
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - call_started)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(share + (i < extra),)) for i in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies) if latencies else {'count': 0}
+    result.update({
+        'workers': workers,
+        'errors': len(errors),
+        'throughput_per_s': round(len(latencies) / elapsed, 2),
+    })
+    if errors:
+        result['first_error'] = errors[0]
+    return result
+
+
+async def ameasure_concurrent(func, requests, clients):
+    """Await ``func()`` ``requests`` times with at most ``clients`` in flight and return throughput.
+
+    The async counterpart of ``measure_concurrent``; ``peak_threads`` reports
+    how many threads the process needed to serve that concurrency.
+    """
+    latencies = []
+    errors = []
+    peak_threads = threading.active_count()
+    semaphore = asyncio.Semaphore(clients)
+
+    async def client():
+        nonlocal peak_threads
+        async with semaphore:
+            call_started = time.perf_counter()
+            try:
+                await func()
+            except Exception as exc:
+                errors.append(repr(exc))
+                return
+            latencies.append(time.perf_counter() - call_started)
+            peak_threads = max(peak_threads, threading.active_count())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies) if latencies else {'count': 0}
+    result.update({
+        'clients': clients,
+        'errors': len(errors),
+        'throughput_per_s': round(len(latencies) / elapsed, 2),
+        'peak_threads': peak_threads,
+    })
+    if errors:
+        result['first_error'] = errors[0]
+    return result
+
+
+@contextmanager
+def simulated_latency(milliseconds):
+    """Delay every query by ``milliseconds``, as a remote database would.
+
+    Applies to connections opened inside the block, in any thread.
+    """
+    def delay(execute, sql, params, many, context):
+        time.sleep(milliseconds / 1000)
+        return execute(sql, params, many, context)
+
+    def attach(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    connection_created.connect(attach)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(attach)
+
+
+def find_regressions(baseline, current, tolerance=0.2, metric='p95_ms', query_slack=0.5):
+    """Compare two ``{name: stats}`` mappings and describe every regression.
+
+    A scenario regresses when ``metric`` grows by more than ``tolerance``
+    (a fraction) or when it issues more than ``query_slack`` extra queries
+    per call; the slack absorbs per-run cache warm-up noise. Scenarios
+    missing from either side are ignored.
+    """
+    regressions = []
+    for name, stats in current.items():
+        before = baseline.get(name)
+        if not isinstance(before, dict) or not isinstance(stats, dict):
+            continue
+        if metric in before and metric in stats and stats[metric] > before[metric] * (1 + tolerance):
+            regressions.append(f"{name}: {metric} {before[metric]} -> {stats[metric]}")
+        if stats.get('queries_per_call', 0) > before.get('queries_per_call', float('inf')) + query_slack:
+            regressions.append(
+                f"{name}: queries_per_call {before['queries_per_call']} -> {stats['queries_per_call']}"
+            )
+    return regressions
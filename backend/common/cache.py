@@ -0,0 +1,83 @@
+"""Versioned read-through cache for rarely changing API responses.
+
+Each cached namespace (e.g. ``subject``, ``educator``) has a version counter
+stored in the cache itself. Response keys embed the current version of every
+namespace they depend on, so bumping a counter from a model signal makes all
+dependent entries unreachable without having to enumerate them. The backend
+is whatever ``settings.API_CACHE_ALIAS`` points to in ``CACHES``; with the
+default local-memory backend versions are per process, so multi-process
+deployments should point the alias at a shared backend.
+
+``aget_versions`` and ``aversioned_key`` are the same lookups for async views,
+using the cache backend's async methods.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def _version_key(namespace):
+    return f'api-cache:version:{namespace}'
+
+
+def get_versions(namespaces):
+    """Return the current version of each namespace with a single cache round trip."""
+    cache = get_cache()
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, namespace in keys.items():
+        if key not in found:
+            # Start missing counters at 1; add() keeps a concurrent initialization
+            cache.add(key, 1, timeout=None)
+            found[key] = cache.get(key, 1)
+        versions[namespace] = found[key]
+    return versions
+
+
+async def aget_versions(namespaces):
+    cache = get_cache()
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    found = await cache.aget_many(list(keys))
+    versions = {}
+    for key, namespace in keys.items():
+        if key not in found:
+            await cache.aadd(key, 1, timeout=None)
+            found[key] = await cache.aget(key, 1)
+        versions[namespace] = found[key]
+    return versions
+
+
+def bump_version(namespace):
+    """Invalidate every cached entry depending on ``namespace``."""
+    cache = get_cache()
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+        cache.incr(key)
+
+
+def versioned_key(prefix, namespaces, *parts):
+    """Build a cache key for ``parts`` valid for the current namespace versions."""
+    return _make_key(prefix, get_versions(namespaces), parts)
+
+
+async def aversioned_key(prefix, namespaces, *parts):
+    return _make_key(prefix, await aget_versions(namespaces), parts)
+
+
+def _make_key(prefix, versions, parts):
+    version_part = ','.join(f'{namespace}={versions[namespace]}' for namespace in sorted(versions))
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'api-cache:{prefix}:{version_part}:{digest}'
+
+
+def make_etag(body):
+    return '"%s"' % hashlib.md5(body).hexdigest()
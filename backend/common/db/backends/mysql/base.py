@@ -0,0 +1,10 @@
+"""MySQL backend with a connection pool (see ``common.db.pool``)."""
+from django.db.backends.mysql import base
+
+from common.db.backends.pooling import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+
+    def ping_connection(self, connection):
+        connection.ping()
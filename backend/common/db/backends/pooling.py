@@ -0,0 +1,51 @@
+import hashlib
+
+from common.db.pool import get_pool
+
+
+class PooledDatabaseWrapperMixin:
+    """Database wrapper mixin taking connections from a ``common.db.pool`` pool.
+
+    Configured by the database's ``POOL`` settings (see ``common.db.pool.DEFAULTS``);
+    without them, or with a ``SIZE`` of 0, the backend connects as usual and
+    ``CONN_MAX_AGE`` applies.
+    """
+
+    @property
+    def pool_options(self):
+        options = self.settings_dict.get('POOL')
+        return options if options and options.get('SIZE', 1) > 0 else None
+
+    def get_pool(self, conn_params):
+        digest = hashlib.md5(repr(sorted(conn_params.items())).encode()).hexdigest()
+        return get_pool(
+            f'{self.alias}:{digest}',
+            lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params),
+            self.ping_connection,
+            self.pool_options,
+        )
+
+    def get_new_connection(self, conn_params):
+        if self.pool_options is None:
+            return super().get_new_connection(conn_params)
+        self._pool = self.get_pool(conn_params)
+        return self._pool.acquire()
+
+    def _close(self):
+        pool = getattr(self, '_pool', None)
+        if pool is None:
+            return super()._close()
+        self._pool = None
+        with self.wrap_database_errors:
+            if self.in_atomic_block or self.errors_occurred:
+                # Closed mid-transaction or after a connection error: do not reuse it
+                pool.discard(self.connection)
+            else:
+                pool.release(self.connection)
+
+    def ping_connection(self, connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
@@ -0,0 +1,15 @@
+"""SQLite backend with a connection pool, a local stand-in for the MySQL one."""
+from django.db.backends.sqlite3 import base
+
+from common.db.backends.pooling import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+
+    @property
+    def pool_options(self):
+        # Django never closes the connection of an in-memory database (its
+        # data would be lost), so a pooled one would never be released
+        if self.is_in_memory_db():
+            return None
+        return super().pool_options
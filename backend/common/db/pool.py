@@ -0,0 +1,181 @@
+"""Process-wide database connection pools.
+
+Django opens a connection per thread and, with the default ``CONN_MAX_AGE``
+of 0, closes it at the end of every request, so each request pays the TCP
+and authentication handshake again. The backends in ``common.db.backends``
+instead take raw connections from a pool when Django connects and hand them
+back when Django closes them.
+
+A pool keeps up to ``SIZE`` idle connections and opens up to ``MAX_OVERFLOW``
+more under load; overflow connections are closed when released. When all
+are checked out, callers wait up to ``TIMEOUT`` seconds and then get
+``PoolTimeout``. On checkout, connections older than ``RECYCLE`` seconds are
+replaced (so the server's idle timeout never closes one under us) and, with
+``PRE_PING``, a connection that fails a ping is replaced by a fresh one.
+Pools are keyed by alias and connection parameters and are reset after a
+fork, so forked workers never share sockets.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+DEFAULTS = {
+    'SIZE': 10,
+    'MAX_OVERFLOW': 10,
+    'RECYCLE': 3600,
+    'PRE_PING': True,
+    'TIMEOUT': 30,
+}
+
+
+class PoolTimeout(OperationalError):
+    """Raised when no connection became available within the pool timeout."""
+
+
+class ConnectionPool:
+    """A bounded pool of DB-API connections.
+
+    ``connect()`` opens a connection and ``ping(connection)`` raises if it is
+    unusable. Idle connections are reused most recently released first, so
+    connections beyond the steady-state load age out through ``RECYCLE``.
+    """
+
+    def __init__(self, connect, ping, size=10, max_overflow=10, recycle=3600, pre_ping=True, timeout=30):
+        self.connect = connect
+        self.ping = ping
+        self.size = size
+        self.max_overflow = max_overflow
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.timeout = timeout
+        self._idle = deque()  # (connection, created_at)
+        self._created = {}  # id(connection) -> created_at, for checked-out connections
+        self._open = 0  # idle, checked out or being opened
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while not self._idle and self._open >= self.size + self.max_overflow:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"No database connection available within {self.timeout}s "
+                        f"(pool size {self.size}, overflow {self.max_overflow})."
+                    )
+                self._condition.wait(remaining)
+            entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                # Reserve the slot before connecting outside the lock
+                self._open += 1
+
+        if entry is not None:
+            connection, created_at = entry
+            if time.monotonic() - created_at < self.recycle and self._alive(connection):
+                self._created[id(connection)] = created_at
+                return connection
+            # Replace it, keeping its slot
+            self._close(connection)
+
+        try:
+            connection = self.connect()
+        except BaseException:
+            self._free_slot()
+            raise
+        self._created[id(connection)] = time.monotonic()
+        return connection
+
+    def release(self, connection):
+        """Return a checked-out connection, closing it if it is overflow or broken."""
+        created_at = self._created.pop(id(connection), None)
+        try:
+            # Never hand a later caller an open transaction
+            connection.rollback()
+        except Exception:
+            created_at = None
+        with self._condition:
+            if created_at is not None and len(self._idle) < self.size and self._open <= self.size:
+                self._idle.append((connection, created_at))
+                self._condition.notify()
+                return
+        self.discard(connection)
+
+    def discard(self, connection):
+        """Close a checked-out connection instead of returning it to the pool."""
+        self._created.pop(id(connection), None)
+        self._close(connection)
+        self._free_slot()
+
+    def close(self):
+        """Close every idle connection; checked-out ones are closed when released."""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for connection, created_at in idle:
+            self._close(connection)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'checked_out': self._open - len(self._idle),
+            }
+
+    def _alive(self, connection):
+        if not self.pre_ping:
+            return True
+        try:
+            self.ping(connection)
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _free_slot(self):
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pid = os.getpid()
+
+
+def get_pool(key, connect, ping, options):
+    """Return the pool for ``key``, creating it with ``options`` (see ``DEFAULTS``)."""
+    global _pid
+    with _pools_lock:
+        if os.getpid() != _pid:
+            # Connections inherited from the parent process belong to it
+            _pools.clear()
+            _pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            options = {**DEFAULTS, **options}
+            pool = _pools[key] = ConnectionPool(
+                connect, ping, size=options['SIZE'], max_overflow=options['MAX_OVERFLOW'],
+                recycle=options['RECYCLE'], pre_ping=options['PRE_PING'], timeout=options['TIMEOUT'],
+            )
+        return pool
+
+
+def close_pools():
+    """Close the idle connections of every pool in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,94 @@
+"""Read replica routing with read-your-writes.
+
+``ReplicaRoutingMiddleware`` (see ``common.middleware``) marks a request as
+replica-safe when it is a GET/HEAD to a list or detail API view of one of
+``DATABASE_REPLICA['APPS']``; ``ReplicaRouter`` then sends that request's
+reads to the ``DATABASE_REPLICA['ALIAS']`` database. Everything else, and all
+code outside requests (workers, management commands), uses the primary.
+
+A request is pinned to the primary as soon as it writes, so it reads its own
+writes. Replication lag can still hide a write from the *next* request, so
+the middleware also pins the client for ``PIN_SECONDS`` with a cookie after a
+request that wrote. Models in ``PRIMARY_MODELS`` (tokens, login sessions and
+their revocations) are always read from the primary: a client must be able
+to authenticate right after logging in, cookie or not, and a revoked or
+rotated token must stop working at once.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULTS = {
+    'ALIAS': None,
+    'APPS': (),
+    'PIN_SECONDS': 5,
+    'PIN_COOKIE': 'db_pin',
+    'PRIMARY_MODELS': ('authtoken.token', 'sessions.session', 'users.loginsession', 'users.revokedsession'),
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'DATABASE_REPLICA', {})}
+
+
+class RoutingState:
+    """Routing decisions of one request, shared with the threads serving it."""
+    __slots__ = ('use_replica', 'pinned', 'wrote')
+
+    def __init__(self, use_replica=False, pinned=False):
+        self.use_replica = use_replica
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+@contextmanager
+def routing_state(state):
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def current_state():
+    return _state.get()
+
+
+class ReplicaRouter:
+    """Route reads of replica-safe requests to the replica and everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.pinned:
+            return None
+        config = get_config()
+        if config['ALIAS'] is None or model._meta.label_lower in config['PRIMARY_MODELS']:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads inside a transaction must see its writes
+            return DEFAULT_DB_ALIAS
+        return config['ALIAS']
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        # Explicit, so objects read from the replica are never saved to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, get_config()['ALIAS']}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema and data through replication
+        if db == get_config()['ALIAS']:
+            return False
+        return None
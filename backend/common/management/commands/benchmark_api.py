@@ -0,0 +1,241 @@
+import itertools
+import json
+import random
+import time
+import uuid
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from common.benchmarking import benchmark_database, find_regressions, measure, measure_concurrent
+from common.synthetic_data import generate_dataset
+from sessions.models import Review, Session
+from users.models import Educator, Student
+from users.services.stats_service import rebuild_stats
+
+PASSWORD = 'bench-password'
+SCENARIOS = ('login', 'subject_list', 'educator_list', 'educator_reviews', 'my_sessions', 'booking', 'payment')
+READ_SCENARIOS = ('subject_list', 'educator_list', 'educator_reviews', 'my_sessions')
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the main REST endpoints against a synthetic dataset in a throwaway "
+        "database and write latency percentiles, throughput and query counts as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=SCENARIOS,
+                            help="Scenario to run (repeatable, default: all).")
+        parser.add_argument('--subjects', type=int, default=50)
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--educators', type=int, default=200)
+        parser.add_argument('--sessions', type=int, default=20000)
+        parser.add_argument('--review-ratio', type=float, default=0.3)
+        parser.add_argument('--paid-ratio', type=float, default=0.7)
+        parser.add_argument('--active-users', type=int, default=50,
+                            help="Number of distinct students issuing authenticated requests.")
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--login-iterations', type=int, default=20,
+                            help="Login hashes a password per call, so it gets fewer iterations.")
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help="Also measure throughput with this many threads (read scenarios).")
+        parser.add_argument('--cold-cache', action='store_true',
+                            help="Clear the API cache before every request.")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--baseline', help="JSON report of a previous run to compare against.")
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help="Allowed p95 growth against the baseline, as a fraction.")
+        parser.add_argument('--keepdb', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options['keepdb']):
+            results = self.run(options)
+
+        regressions = []
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)
+            regressions = find_regressions(baseline['scenarios'], results['scenarios'], options['tolerance'])
+            results['regressions'] = regressions
+
+        report = json.dumps(results, indent=2, default=str)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(report + '\n')
+        else:
+            self.stdout.write(report)
+        if regressions:
+            raise CommandError("Benchmark regressions:\n" + "\n".join(regressions))
+
+    def run(self, options):
+        """Generate the dataset and run the scenarios in the current database."""
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        scenarios = options['scenarios'] or SCENARIOS
+
+        started = time.perf_counter()
+        dataset = generate_dataset(
+            subjects=options['subjects'], students=options['students'],
+            educators=options['educators'], sessions=options['sessions'],
+            review_ratio=options['review_ratio'], paid_ratio=options['paid_ratio'],
+            password=PASSWORD, seed=options['seed'],
+        )
+        rebuild_stats()
+        self.prepare(dataset)
+        results = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'options': {k: v for k, v in options.items()
+                            if k not in ('output', 'baseline', 'stdout', 'stderr', 'skip_checks')},
+                'dataset': {k: v if isinstance(v, int) else len(v) for k, v in dataset.items()},
+            },
+            'setup_seconds': round(time.perf_counter() - started, 2),
+            'scenarios': {},
+        }
+
+        # Requests go through the test client; payments are left for the
+        # workers so only the request path is measured, and the benchmark's
+        # logins all come from one address
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], PAYMENT_WORKERS=0,
+                               LOGIN_THROTTLE={'ENABLED': False}):
+            for name in scenarios:
+                request = getattr(self, f'scenario_{name}')()
+                iterations = options['login_iterations'] if name == 'login' else options['iterations']
+                results['scenarios'][name] = measure(request, iterations)
+
+            if options['concurrency'] > 1:
+                results['concurrent'] = {
+                    name: measure_concurrent(getattr(self, f'scenario_{name}')(),
+                                             options['iterations'], options['concurrency'])
+                    for name in scenarios if name in READ_SCENARIOS
+                }
+        return results
+
+    def prepare(self, dataset):
+        """Pick the active users and reserve free hours for the write scenarios."""
+        students = list(Student.objects.filter(id__in=self.rng.sample(
+            dataset['students'], min(self.options['active_users'], len(dataset['students'])),
+        )).select_related('user'))
+        Token.objects.bulk_create([Token(user=student.user, key=Token.generate_key()) for student in students])
+        self.tokens = {token.user_id: token.key for token in Token.objects.all()}
+        self.students = students
+        self.educator_ids = list(Educator.objects.filter(verification_status='verified')
+                                 .values_list('id', flat=True))
+        self.subject_ids = dataset['subjects']
+        # The educator with the most reviews has the most expensive review page
+        self.popular_educator_id = (Review.objects.values('educator_id').annotate(count=Count('id'))
+                                    .order_by('-count').values_list('educator_id', flat=True).first()
+                                    or self.educator_ids[0])
+
+        # Hours past the generated sessions, one per booking so none conflict
+        booking_start = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=60)
+        self.booking_hours = (booking_start + timedelta(hours=n) for n in itertools.count())
+
+        # Confirmed, unpaid sessions further out for the payment scenario
+        start = booking_start + timedelta(days=365)
+        count = self.options['iterations'] * 2 + 1
+        Session.objects.bulk_create([
+            Session(
+                student=self.rng.choice(students),
+                educator_id=self.rng.choice(self.educator_ids),
+                subject_id=self.rng.choice(self.subject_ids),
+                start_time=start + timedelta(hours=n),
+                end_time=start + timedelta(hours=n, minutes=60),
+                status='confirmed',
+            )
+            for n in range(count)
+        ])
+        self.unpaid = list(Session.objects.filter(start_time__gte=start)
+                           .values_list('id', 'student__user_id'))
+
+    def client(self, user_id=None):
+        client = APIClient()
+        if user_id is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Token {self.tokens[user_id]}')
+        if self.options['cold_cache']:
+            cache.clear()
+        return client
+
+    def random_user_id(self):
+        return self.rng.choice(self.students).user_id
+
+    @staticmethod
+    def expect(response, expected):
+        if response.status_code != expected:
+            raise AssertionError(f"{response.status_code} != {expected}: {response.content[:200]!r}")
+
+    def scenario_login(self):
+        url = reverse('users:login')
+
+        def request():
+            email = self.rng.choice(self.students).user.email
+            self.expect(self.client().post(url, {'email': email, 'password': PASSWORD}), 200)
+        return request
+
+    def scenario_subject_list(self):
+        url = reverse('courses:subject_list')
+
+        def request():
+            self.expect(self.client(self.random_user_id()).get(url), 200)
+        return request
+
+    def scenario_educator_list(self):
+        url = reverse('users:educator_list')
+
+        def request():
+            params = {'subject_id': self.rng.choice(self.subject_ids), 'ordering': 'rating'}
+            self.expect(self.client(self.random_user_id()).get(url, params), 200)
+        return request
+
+    def scenario_educator_reviews(self):
+        url = reverse('sessions:educator_reviews', args=[self.popular_educator_id])
+
+        def request():
+            self.expect(self.client(self.random_user_id()).get(url), 200)
+        return request
+
+    def scenario_my_sessions(self):
+        url = reverse('sessions:my_sessions')
+
+        def request():
+            self.expect(self.client(self.random_user_id()).get(url), 200)
+        return request
+
+    def scenario_booking(self):
+        url = reverse('sessions:session_create')
+
+        def request():
+            start = next(self.booking_hours)
+            self.expect(self.client(self.random_user_id()).post(url, {
+                'educator_id': self.rng.choice(self.educator_ids),
+                'subject_id': self.rng.choice(self.subject_ids),
+                'start_time': start.isoformat(),
+                'end_time': (start + timedelta(minutes=60)).isoformat(),
+            }, format='json'), 201)
+        return request
+
+    def scenario_payment(self):
+        url = reverse('payments:payment_create')
+
+        def request():
+            session_id, user_id = self.unpaid.pop()
+            self.expect(self.client(user_id).post(url, {
+                'session_id': session_id,
+                'payment_method': 'card',
+                'idempotency_key': uuid.uuid4().hex,
+            }, format='json'), 202)
+        return request
@@ -0,0 +1,140 @@
+import asyncio
+import io
+import json
+import random
+import sys
+
+import django
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from common.benchmarking import ameasure_concurrent, benchmark_database, measure_concurrent, simulated_latency
+from common.synthetic_data import generate_dataset
+from users.models import Student
+from users.services.stats_service import rebuild_stats
+
+# scenario -> (sync URL name, async URL name)
+SCENARIOS = {
+    'subject_list': ('courses:subject_list', 'courses:subject_list_async'),
+    'educator_list': ('users:educator_list', 'users:educator_list_async'),
+    'my_sessions': ('sessions:my_sessions', 'sessions:my_sessions_async'),
+    'transactions': ('payments:transaction_list', 'payments:transaction_list_async'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the read endpoints served by the sync views under the WSGI handler "
+        "and by their async views under the ASGI handler, with many concurrent clients, in a "
+        "throwaway database. Both handlers are driven in-process, without a network server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=SCENARIOS,
+                            help="Scenario to run (repeatable, default: all).")
+        parser.add_argument('--clients', type=int, default=500,
+                            help="Concurrent clients; the ASGI handler serves them all at once.")
+        parser.add_argument('--wsgi-threads', type=int, default=32,
+                            help="Worker threads of the WSGI server; further clients wait for a thread.")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per scenario and handler.")
+        parser.add_argument('--db-latency-ms', type=float, default=0,
+                            help="Delay added to every query, to simulate a remote database.")
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--educators', type=int, default=200)
+        parser.add_argument('--sessions', type=int, default=20000)
+        parser.add_argument('--active-users', type=int, default=50)
+        parser.add_argument('--keepdb', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options['keepdb']):
+            results = self.run(options)
+        self.stdout.write(json.dumps(results, indent=2, default=str))
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        dataset = generate_dataset(subjects=50, students=options['students'], educators=options['educators'],
+                                   sessions=options['sessions'], paid_ratio=0.7, seed=options['seed'])
+        rebuild_stats()
+        students = Student.objects.filter(id__in=rng.sample(
+            dataset['students'], min(options['active_users'], len(dataset['students'])),
+        ))
+        keys = [Token.objects.create(user_id=user_id).key for user_id in students.values_list('user_id', flat=True)]
+        results = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'options': {k: options[k] for k in ('clients', 'wsgi_threads', 'requests', 'db_latency_ms')},
+            },
+            'scenarios': {},
+        }
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']), \
+                simulated_latency(options['db_latency_ms']):
+            wsgi, asgi = get_wsgi_application(), get_asgi_application()
+            for name in options['scenarios'] or SCENARIOS:
+                sync_name, async_name = SCENARIOS[name]
+                results['scenarios'][name] = {
+                    'wsgi': measure_concurrent(
+                        lambda: wsgi_get(wsgi, reverse(sync_name), rng.choice(keys)),
+                        options['requests'], min(options['wsgi_threads'], options['clients']),
+                    ),
+                    'asgi': asyncio.run(ameasure_concurrent(
+                        lambda: asgi_get(asgi, reverse(async_name), rng.choice(keys)),
+                        options['requests'], options['clients'],
+                    )),
+                }
+        return results
+
+
+def wsgi_get(application, path, token):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'testserver', 'HTTP_AUTHORIZATION': f'Token {token}',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr, 'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    statuses = []
+    body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        b''.join(body)
+    finally:
+        body.close()
+    if not statuses[0].startswith('200'):
+        raise AssertionError(f"{path}: {statuses[0]}")
+
+
+async def asgi_get(application, path, token):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Token {token}'.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    received = False
+    statuses = []
+
+    async def receive():
+        nonlocal received
+        if received:
+            # The handler waits for a disconnect while it serves the request
+            await asyncio.Future()
+        received = True
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    await application(scope, receive, send)
+    if statuses[0] != 200:
+        raise AssertionError(f"{path}: {statuses[0]}")
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from common.uploads import backfill_variants, process_pending_uploads
+
+
+class Command(BaseCommand):
+    help = ("Store staged uploads left by the request workers (UPLOAD_PIPELINE['WORKERS'] = 0, or after "
+            "a restart) and build their image variants.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Process one batch and exit.")
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to sleep when there is nothing to process.")
+        parser.add_argument('--min-age', type=float, default=60,
+                            help="Seconds an upload stays staged before the command picks it up, so "
+                                 "uploads still in flight in a request worker are left to it.")
+        parser.add_argument('--backfill', action='store_true',
+                            help="First build the missing variants of images already stored.")
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            self.stdout.write(f"Built variants of {backfill_variants()} image(s).")
+        while True:
+            processed = process_pending_uploads(min_age=options['min_age'], limit=options['batch_size'])
+            if processed:
+                self.stdout.write(f"Processed {len(processed)} upload(s).")
+            if options['once']:
+                break
+            close_old_connections()
+            if not processed:
+                time.sleep(options['interval'])
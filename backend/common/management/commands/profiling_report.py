@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from common.api.views import SORT_FIELDS
+from common.profiling import collect_records, summarize_views
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the slowest views recorded by ProfilingMiddleware. Records are read from the "
+        "API cache, so other processes are only visible when it is a shared backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sort', choices=SORT_FIELDS, default='p95_ms')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--json', action='store_true', help="Output JSON instead of a table.")
+
+    def handle(self, *args, **options):
+        records = collect_records()
+        views = sorted(summarize_views(records), key=lambda row: row[options['sort']], reverse=True)
+        views = views[:options['limit']]
+        if options['json']:
+            self.stdout.write(json.dumps({'sampled_requests': len(records), 'views': views}, indent=2))
+            return
+        if not views:
+            self.stdout.write("No profiled requests recorded.")
+            return
+
+        self.stdout.write(f"{'view':40} {'reqs':>6} {'p50':>9} {'p95':>9} {'p99':>9} "
+                          f"{'db':>9} {'queries':>8} {'dups':>6}")
+        for row in views:
+            self.stdout.write(
+                f"{row['view'][:40]:40} {row['requests']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+                f"{row['p99_ms']:>9.1f} {row['mean_db_ms']:>9.1f} {row['mean_queries']:>8.1f} "
+                f"{row['mean_duplicates']:>6.1f}"
+            )
+            for pattern in row['n_plus_one']:
+                self.stdout.write(f"    possible N+1 ({pattern['max_per_request']}x): {pattern['sql'][:120]}")
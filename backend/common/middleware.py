@@ -0,0 +1,126 @@
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
+
+from common.db.routers import RoutingState, current_state, get_config as get_replica_config, routing_state
+from common.profiling import QueryRecorder, get_config, maybe_publish, profile_buffer
+
+
+class ProfilingMiddleware:
+    """Record timing and query statistics for a sample of requests.
+
+    Configured by ``settings.REQUEST_PROFILING`` (see ``common.profiling``);
+    requests outside the sample only pay for one random draw. The middleware
+    is async-capable, so under ASGI it does not push async views onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = get_config()
+        if not config['ENABLED'] or random.random() >= config['SAMPLE_RATE']:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            self.wrap_connections(stack, recorder)
+            started = time.perf_counter()
+            response = self.get_response(request)
+            wall_seconds = time.perf_counter() - started
+        self.record(request, response, recorder, wall_seconds, config)
+        return response
+
+    async def __acall__(self, request):
+        config = get_config()
+        if not config['ENABLED'] or random.random() >= config['SAMPLE_RATE']:
+            return await self.get_response(request)
+
+        # Connections are per thread: the wrappers go on the thread-sensitive
+        # thread the async ORM runs this request's queries in
+        recorder = QueryRecorder()
+        stack = ExitStack()
+        await sync_to_async(self.wrap_connections)(stack, recorder)
+        try:
+            started = time.perf_counter()
+            response = await self.get_response(request)
+            wall_seconds = time.perf_counter() - started
+        finally:
+            await sync_to_async(stack.close)()
+        # Publishing may hit a shared cache backend, so keep it off the event loop
+        await sync_to_async(self.record)(request, response, recorder, wall_seconds, config)
+        return response
+
+    @staticmethod
+    def wrap_connections(stack, recorder):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+
+    def record(self, request, response, recorder, wall_seconds, config):
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        profile_buffer.resize(config['BUFFER_SIZE'])
+        profile_buffer.append(recorder.record(
+            view, request.method, response.status_code, wall_seconds, config['N_PLUS_ONE_THRESHOLD'],
+        ))
+        maybe_publish(config['PUBLISH_INTERVAL'])
+
+
+class ReplicaRoutingMiddleware:
+    """Let read-only API requests read from the replica (see ``common.db.routers``).
+
+    Sets up the request's routing state, marks it replica-safe once the view
+    is known, and pins the client to the primary with a short-lived cookie
+    after a request that wrote.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = get_replica_config()
+        with routing_state(RoutingState(pinned=config['PIN_COOKIE'] in request.COOKIES)) as state:
+            response = self.get_response(request)
+        return self.pin(response, state, config)
+
+    async def __acall__(self, request):
+        config = get_replica_config()
+        with routing_state(RoutingState(pinned=config['PIN_COOKIE'] in request.COOKIES)) as state:
+            response = await self.get_response(request)
+        return self.pin(response, state, config)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = current_state()
+        if state is not None and request.method in ('GET', 'HEAD') and self.is_read_view(view_func):
+            state.use_replica = True
+
+    @staticmethod
+    def is_read_view(view_func):
+        view_class = getattr(view_func, 'view_class', None)
+        # Async views serve the list of another view class
+        view_class = getattr(view_class, 'view_class', None) or view_class
+        return (view_class is not None and issubclass(view_class, (ListModelMixin, RetrieveModelMixin))
+                and view_class.__module__.split('.')[0] in get_replica_config()['APPS'])
+
+    @staticmethod
+    def pin(response, state, config):
+        if state.wrote:
+            response.set_cookie(config['PIN_COOKIE'], '1', max_age=config['PIN_SECONDS'],
+                                httponly=True, samesite='Lax')
+        return response
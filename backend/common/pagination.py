@@ -0,0 +1,32 @@
+from asgiref.sync import sync_to_async
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor (keyset) pagination with a client-adjustable, bounded page size.
+
+    Pages are fetched with ``WHERE <ordering field> < <cursor position>``, so a
+    deep page costs the same as the first one. Subclasses set ``ordering`` to
+    a field backed by an index.
+
+    Async views fetch the page with ``apaginate_queryset``, which runs DRF's
+    ``paginate_queryset`` in a thread like any other async ORM query.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view)
+
+
+class SessionCursorPagination(KeysetPagination):
+    ordering = '-start_time'
+
+
+class TransactionCursorPagination(KeysetPagination):
+    ordering = '-created_at'
+
+
+class ReviewCursorPagination(KeysetPagination):
+    ordering = '-created_at'
@@ -0,0 +1,194 @@
+"""Sampled per-request profiling kept in an in-process ring buffer.
+
+``common.middleware.ProfilingMiddleware`` records, for a sample of requests,
+the wall time, DB time, query count, exact duplicate queries and groups of
+similar queries (the same SQL template run many times in one request, the
+usual sign of an N+1 pattern) per resolved URL name. Queries are captured
+with ``connection.execute_wrapper`` so this works with ``DEBUG=False``.
+
+Each process keeps its own buffer and periodically publishes it to the API
+cache so the stats endpoint and the ``profiling_report`` command can merge
+all workers; with the default local-memory cache only the current process is
+visible.
+"""
+import os
+import re
+import socket
+import statistics
+import threading
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+
+from common.benchmarking import percentile
+from common.cache import get_cache
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.05,
+    'BUFFER_SIZE': 5000,
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'PUBLISH_INTERVAL': 30,  # seconds
+}
+
+_PLACEHOLDER_LIST = re.compile(r'(%s|\?)(\s*,\s*(%s|\?))+')
+_WHITESPACE = re.compile(r'\s+')
+
+_REGISTRY_KEY = 'profiling:processes'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_PROFILING', {})}
+
+
+def normalize_sql(sql):
+    """Reduce SQL to a template so similar queries group together.
+
+    Parameters are already placeholders; only ``IN`` lists of varying length
+    need collapsing.
+    """
+    return _PLACEHOLDER_LIST.sub('...', _WHITESPACE.sub(' ', sql).strip())
+
+
+class RingBuffer:
+    """Thread-safe buffer keeping the last ``capacity`` items."""
+
+    def __init__(self, capacity):
+        self._items = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def append(self, item):
+        with self._lock:
+            self._items.append(item)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def resize(self, capacity):
+        with self._lock:
+            if capacity != self._items.maxlen:
+                self._items = deque(self._items, maxlen=capacity)
+
+    def __len__(self):
+        return len(self._items)
+
+
+profile_buffer = RingBuffer(get_config()['BUFFER_SIZE'])
+
+
+class QueryRecorder:
+    """Execute wrapper timing every query run while it is installed."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, repr(params), time.perf_counter() - started))
+
+    def record(self, view, method, status, wall_seconds, threshold):
+        """Build the buffer entry for one request."""
+        exact = Counter((sql, params) for sql, params, duration in self.queries)
+        similar = Counter(normalize_sql(sql) for sql, params, duration in self.queries)
+        return {
+            'view': view,
+            'method': method,
+            'status': status,
+            'at': time.time(),
+            'wall_ms': round(wall_seconds * 1000, 3),
+            'db_ms': round(sum(duration for sql, params, duration in self.queries) * 1000, 3),
+            'queries': len(self.queries),
+            'duplicates': sum(count - 1 for count in exact.values()),
+            'similar': {sql: count for sql, count in similar.items() if count >= threshold},
+        }
+
+
+def summarize_views(records):
+    """Aggregate buffer entries per view, slowest (by p95) first."""
+    by_view = {}
+    for record in records:
+        by_view.setdefault(record['view'], []).append(record)
+
+    summary = []
+    for view, entries in by_view.items():
+        wall = [entry['wall_ms'] for entry in entries]
+        patterns = Counter()
+        for entry in entries:
+            for sql, count in entry['similar'].items():
+                patterns[sql] = max(patterns[sql], count)
+        summary.append({
+            'view': view,
+            'requests': len(entries),
+            'p50_ms': percentile(wall, 0.50),
+            'p95_ms': percentile(wall, 0.95),
+            'p99_ms': percentile(wall, 0.99),
+            'total_ms': round(sum(wall), 3),
+            'mean_db_ms': round(statistics.fmean(entry['db_ms'] for entry in entries), 3),
+            'mean_queries': round(statistics.fmean(entry['queries'] for entry in entries), 2),
+            'max_queries': max(entry['queries'] for entry in entries),
+            'mean_duplicates': round(statistics.fmean(entry['duplicates'] for entry in entries), 2),
+            'n_plus_one': [{'sql': sql, 'max_per_request': count} for sql, count in patterns.most_common(3)],
+        })
+    summary.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return summary
+
+
+def _process_key():
+    return f'profiling:records:{socket.gethostname()}:{os.getpid()}'
+
+
+_last_publish = 0.0
+_publish_lock = threading.Lock()
+
+
+def maybe_publish(interval):
+    """Publish this process's buffer to the shared cache at most every ``interval`` seconds."""
+    global _last_publish
+    now = time.monotonic()
+    if now - _last_publish < interval or not _publish_lock.acquire(blocking=False):
+        return
+    try:
+        _last_publish = now
+        publish(timeout=interval * 10)
+    finally:
+        _publish_lock.release()
+
+
+def publish(timeout=300):
+    cache = get_cache()
+    key = _process_key()
+    cache.set(key, profile_buffer.snapshot(), timeout)
+    processes = cache.get(_REGISTRY_KEY) or set()
+    if key not in processes:
+        cache.set(_REGISTRY_KEY, processes | {key}, None)
+
+
+def collect_records():
+    """Return this process's records plus those published by other processes."""
+    cache = get_cache()
+    own_key = _process_key()
+    records = profile_buffer.snapshot()
+    processes = (cache.get(_REGISTRY_KEY) or set()) - {own_key}
+    if processes:
+        published = cache.get_many(list(processes))
+        for entries in published.values():
+            records.extend(entries)
+        expired = processes - set(published)
+        if expired:
+            cache.set(_REGISTRY_KEY, (cache.get(_REGISTRY_KEY) or set()) - expired, None)
+    return records
+
+
+def reset():
+    """Drop this process's records and its published copy."""
+    profile_buffer.clear()
+    get_cache().delete(_process_key())
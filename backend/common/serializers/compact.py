@@ -0,0 +1,124 @@
+"""Compact list representations with side-loaded related objects.
+
+Full list serializers embed every related object in every row, so a list of
+sessions repeats the same educator and user blob on each row and builds a
+model instance and a nested serializer for each of them. A compact
+serializer reads plain ``.values()`` rows instead and returns
+
+    {"results": [{"id": 1, "educator": 7, ...}, ...],
+     "included": {"educators": {"7": {...}}, "users": {...}, ...}}
+
+where rows reference related objects by id and every related object appears
+once in ``included``, keyed by id. ``CompactListMixin`` serves it from a list
+view for ``?view=compact``.
+"""
+from django.core.files.storage import default_storage
+
+
+def decimal_string(value, request):
+    # As DecimalField renders them
+    return None if value is None else str(value)
+
+
+def file_url(value, request):
+    # As FileField/ImageField render them
+    if not value:
+        return None
+    url = default_storage.url(value)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def variant_url(variant='thumbnail'):
+    """Converter of an image's ``<field>_variants`` column to the URL of ``variant``."""
+    def convert(value, request):
+        return file_url((value or {}).get(variant), request)
+    return convert
+
+
+def prefixed(prefix, fields):
+    """Return ``fields`` (output name -> lookup) with every lookup read through ``prefix``."""
+    return {name: prefix + lookup for name, lookup in fields.items()}
+
+
+class CompactListSerializer:
+    """Serializer of ``.values()`` rows into ids plus deduplicated side-loaded objects.
+
+    ``fields`` maps each output field of a row to its ``values()`` lookup.
+    ``included`` lists ``(collection, id lookup, fields)`` entries: each row
+    whose id lookup is not null adds that object to the collection once.
+    Several entries may fill the same collection (e.g. the student's and the
+    educator's users). ``converters`` maps lookups to ``function(value, request)``
+    for values not rendered as is. ``setup_eager_loading`` turns the view's
+    queryset into those rows, so pagination and serialization never build
+    model instances.
+    """
+    fields = {}
+    included = ()
+    converters = {}
+
+    def __init__(self, instance=None, many=True, context=None, **kwargs):
+        self.instance = instance
+        self.context = context or {}
+
+    @classmethod
+    def get_lookups(cls):
+        lookups = list(cls.fields.values())
+        for collection, key, fields in cls.included:
+            lookups.append(key)
+            lookups.extend(fields.values())
+        return list(dict.fromkeys(lookups))
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.values(*cls.get_lookups())
+
+    @property
+    def data(self):
+        request = self.context.get('request')
+        converters = self.converters
+
+        def project(row, fields):
+            return {
+                name: converters[lookup](row[lookup], request) if lookup in converters else row[lookup]
+                for name, lookup in fields.items()
+            }
+
+        rows = list(self.instance)
+        included = {}
+        for collection, key, fields in self.included:
+            objects = included.setdefault(collection, {})
+            for row in rows:
+                pk = row[key]
+                if pk is not None and pk not in objects:
+                    objects[pk] = project(row, fields)
+        return {
+            'results': [project(row, self.fields) for row in rows],
+            'included': included,
+        }
+
+
+class CompactListMixin:
+    """List view mixin serving ``compact_serializer_class`` for ``?view=compact``.
+
+    Place it before ``EagerLoadingViewMixin`` so the compact serializer's
+    ``setup_eager_loading`` builds the rows. With pagination, ``included``
+    sits next to ``results`` in the page.
+    """
+    compact_serializer_class = None
+
+    def is_compact(self):
+        request = getattr(self, 'request', None)
+        return (self.compact_serializer_class is not None and request is not None
+                and request.query_params.get('view') == 'compact')
+
+    def get_serializer_class(self):
+        if self.is_compact():
+            return self.compact_serializer_class
+        return super().get_serializer_class()
+
+    def get_paginated_response(self, data):
+        if not self.is_compact():
+            return super().get_paginated_response(data)
+        response = super().get_paginated_response(data['results'])
+        response.data['included'] = data['included']
+        return response
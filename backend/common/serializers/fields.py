@@ -0,0 +1,27 @@
+from rest_framework import fields, serializers
+
+from common.serializers.compact import file_url
+
+
+class ImageVariantField(serializers.ImageField):
+    """Image field rendering the URL of one of the image's variants.
+
+    Reads the ``<field>_variants`` column next to the model field (see
+    ``common.uploads``) and renders null until the variant is built. Input is
+    validated as a regular image upload.
+    """
+
+    def __init__(self, variant='thumbnail', **kwargs):
+        self.variant = variant
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        *path, name = self.source_attrs
+        try:
+            variants = fields.get_attribute(instance, [*path, f'{name}_variants'])
+        except (AttributeError, KeyError):
+            return None
+        return (variants or {}).get(self.variant)
+
+    def to_representation(self, value):
+        return file_url(value, self.context.get('request'))
@@ -0,0 +1,62 @@
+from rest_framework import serializers
+
+
+class EagerLoadingMixin:
+    """Serializer mixin declaring the relations needed to render the serializer.
+
+    Each serializer lists the relations it reads itself in
+    ``select_related_fields`` / ``prefetch_related_fields``; relations of
+    nested serializers that also use this mixin are collected automatically
+    and prefixed with the field's source.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def get_eager_loading_relations(cls, prefix='', prefetch_only=False):
+        """Return the ``(select_related, prefetch_related)`` lookups for this serializer."""
+        select_related = []
+        prefetch_related = []
+
+        own_select = [prefix + lookup for lookup in cls.select_related_fields]
+        if prefetch_only:
+            prefetch_related.extend(own_select)
+        else:
+            select_related.extend(own_select)
+        prefetch_related.extend(prefix + lookup for lookup in cls.prefetch_related_fields)
+
+        for name, field in cls._declared_fields.items():
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if not isinstance(nested, EagerLoadingMixin):
+                continue
+
+            source = field.source or name
+            if source == '*':
+                continue
+            lookup = prefix + source.replace('.', '__')
+
+            # Anything below a to-many relation can only be prefetched
+            nested_prefetch_only = prefetch_only or many
+            if nested_prefetch_only:
+                prefetch_related.append(lookup)
+            else:
+                select_related.append(lookup)
+
+            nested_select, nested_prefetch = type(nested).get_eager_loading_relations(
+                prefix=lookup + '__', prefetch_only=nested_prefetch_only
+            )
+            select_related.extend(nested_select)
+            prefetch_related.extend(nested_prefetch)
+
+        return select_related, prefetch_related
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Apply the declared relations to ``queryset``."""
+        select_related, prefetch_related = cls.get_eager_loading_relations()
+        if select_related:
+            queryset = queryset.select_related(*dict.fromkeys(select_related))
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*dict.fromkeys(prefetch_related))
+        return queryset
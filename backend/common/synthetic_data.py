@@ -0,0 +1,163 @@
+"""Synthetic data generation for benchmarks.
+
+Rows are written with ``bulk_create`` in batches and bypass model signals;
+derived data (such as the availability slot index) has to be rebuilt
+explicitly afterwards.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from courses.models import Subject
+from payments.models import Transaction
+from sessions.models import Review, Session
+from users.models import Student, Educator
+
+User = get_user_model()
+
+
+def _bulk_users(count, user_type, prefix, password, batch_size):
+    users = [
+        User(
+            email=f'{prefix}{i}@bench.example.com',
+            first_name=f'{user_type.title()}{i}',
+            last_name=f'Bench{i}',
+            user_type=user_type,
+            password=password,
+            bio=f'Synthetic {user_type} {i}',
+        )
+        for i in range(count)
+    ]
+    User.objects.bulk_create(users, batch_size=batch_size)
+    return list(User.objects.filter(email__startswith=prefix, email__endswith='@bench.example.com')
+                .order_by('id').values_list('id', flat=True))
+
+
+def _history(review_ratio, paid_ratio, rates, rng, batch_size):
+    """Add reviews and completed payments to a share of the completed sessions."""
+    reviews = []
+    transactions = []
+    review_count = transaction_count = 0
+    completed = (Session.objects.filter(status='completed')
+                 .values_list('id', 'student_id', 'educator_id', 'subject_id').iterator(chunk_size=batch_size))
+    for session_id, student_id, educator_id, subject_id in completed:
+        if rng.random() < review_ratio:
+            reviews.append(Review(
+                session_id=session_id,
+                educator_id=educator_id,
+                student_id=student_id,
+                subject_id=subject_id,
+                rating=rng.choices(range(1, 6), weights=(1, 1, 3, 6, 9))[0],
+                comment=f'Synthetic review {session_id}',
+            ))
+        if rng.random() < paid_ratio:
+            transactions.append(Transaction(
+                session_id=session_id,
+                student_id=student_id,
+                educator_id=educator_id,
+                amount=rates[educator_id],
+                transaction_type='payment',
+                status='completed',
+                transaction_id=f'bench-{session_id}',
+                payment_method='card',
+            ))
+        if len(reviews) >= batch_size:
+            Review.objects.bulk_create(reviews)
+            review_count += len(reviews)
+            reviews = []
+        if len(transactions) >= batch_size:
+            Transaction.objects.bulk_create(transactions)
+            transaction_count += len(transactions)
+            transactions = []
+    Review.objects.bulk_create(reviews)
+    Transaction.objects.bulk_create(transactions)
+    return review_count + len(reviews), transaction_count + len(transactions)
+
+
+def generate_dataset(subjects=50, students=1000, educators=100, sessions=10000,
+                     subjects_per_educator=3, days=28, password=None, batch_size=5000, seed=0,
+                     review_ratio=0.0, paid_ratio=0.0):
+    """Create a synthetic dataset and return the generated ids by model.
+
+    Sessions are laid out on an hourly grid per educator starting in the past
+    so that upcoming and historical sessions are both represented and no
+    educator has overlapping sessions. ``review_ratio`` and ``paid_ratio`` are
+    the shares of completed sessions that get a review and a completed
+    payment.
+    """
+    rng = random.Random(seed)
+    password = make_password(password) if password else '!'
+
+    Subject.objects.bulk_create(
+        [Subject(name=f'Subject {i}', description=f'Synthetic subject number {i}') for i in range(subjects)],
+        batch_size=batch_size,
+    )
+    subject_ids = list(Subject.objects.order_by('id').values_list('id', flat=True))
+
+    student_user_ids = _bulk_users(students, 'student', 'student', password, batch_size)
+    Student.objects.bulk_create([Student(user_id=pk) for pk in student_user_ids], batch_size=batch_size)
+    student_ids = list(Student.objects.order_by('id').values_list('id', flat=True))
+
+    educator_user_ids = _bulk_users(educators, 'educator', 'educator', password, batch_size)
+    Educator.objects.bulk_create([
+        Educator(
+            user_id=pk,
+            degree=rng.choice(['BSc', 'MSc', 'PhD']),
+            hourly_rate=Decimal(rng.randrange(1500, 9000)) / 100,
+            verification_status='verified' if rng.random() < 0.9 else 'pending',
+        )
+        for pk in educator_user_ids
+    ], batch_size=batch_size)
+    educator_ids = list(Educator.objects.order_by('id').values_list('id', flat=True))
+
+    through = Educator.subjects.through
+    through.objects.bulk_create([
+        through(educator_id=educator_id, subject_id=subject_id)
+        for educator_id in educator_ids
+        for subject_id in rng.sample(subject_ids, min(subjects_per_educator, len(subject_ids)))
+    ], batch_size=batch_size)
+
+    now = timezone.now().replace(minute=0, second=0, microsecond=0)
+    first_start = now - timedelta(days=days)
+    hours = days * 2 * 24
+    per_educator = max(1, sessions // max(1, len(educator_ids)))
+    step = max(1, hours // per_educator)
+    batch = []
+    created = 0
+    for educator_id in educator_ids:
+        for n in range(per_educator):
+            if created >= sessions:
+                break
+            start = first_start + timedelta(hours=n * step)
+            batch.append(Session(
+                student_id=rng.choice(student_ids),
+                educator_id=educator_id,
+                subject_id=rng.choice(subject_ids),
+                start_time=start,
+                end_time=start + timedelta(minutes=60),
+                status='completed' if start < now else rng.choice(['pending', 'confirmed', 'canceled']),
+            ))
+            created += 1
+            if len(batch) >= batch_size:
+                Session.objects.bulk_create(batch)
+                batch = []
+    if batch:
+        Session.objects.bulk_create(batch)
+
+    reviews = transactions = 0
+    if review_ratio or paid_ratio:
+        rates = dict(Educator.objects.values_list('id', 'hourly_rate'))
+        reviews, transactions = _history(review_ratio, paid_ratio, rates, rng, batch_size)
+
+    return {
+        'subjects': subject_ids,
+        'students': student_ids,
+        'educators': educator_ids,
+        'sessions': created,
+        'reviews': reviews,
+        'transactions': transactions,
+    }
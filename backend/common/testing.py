@@ -0,0 +1,133 @@
+"""Small object factories, query count and query plan helpers shared by the app test suites."""
+import re
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from courses.models import Subject
+from sessions.models import Session
+from users.models import Student, Educator
+
+User = get_user_model()
+
+_sequence = count(1)
+
+
+def make_user(user_type='student', **extra_fields):
+    n = next(_sequence)
+    extra_fields.setdefault('first_name', f'First{n}')
+    extra_fields.setdefault('last_name', f'Last{n}')
+    return User.objects.create_user(
+        email=extra_fields.pop('email', f'user{n}@example.com'),
+        password=extra_fields.pop('password', None),
+        user_type=user_type,
+        **extra_fields
+    )
+
+
+def make_subject(**fields):
+    fields.setdefault('name', f'Subject {next(_sequence)}')
+    return Subject.objects.create(**fields)
+
+
+def make_student(**user_fields):
+    return Student.objects.create(user=make_user('student', **user_fields))
+
+
+def make_educator(subjects=(), **fields):
+    fields.setdefault('degree', 'MSc')
+    fields.setdefault('hourly_rate', Decimal('30.00'))
+    fields.setdefault('verification_status', 'verified')
+    educator = Educator.objects.create(user=make_user('educator'), **fields)
+    if subjects:
+        educator.subjects.set(subjects)
+    return educator
+
+
+def make_session(student, educator, subject, start_time=None, minutes=60, **fields):
+    start_time = start_time or timezone.now() + timedelta(days=1)
+    return Session.objects.create(
+        student=student,
+        educator=educator,
+        subject=subject,
+        start_time=start_time,
+        end_time=start_time + timedelta(minutes=minutes),
+        **fields
+    )
+
+
+def make_image_upload(name='picture.png', size=(800, 600), format='PNG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'teal').save(buffer, format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{format.lower()}')
+
+
+class QueryCountMixin:
+    """For ``TestCase`` classes counting the queries of API requests.
+
+    Provides ``subject``, ``student`` and an API client authenticated as the
+    student.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.subject = make_subject()
+        cls.student = make_student()
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def count_queries(self, url):
+        """GET ``url`` with an empty cache and return the number of queries it made."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+
+def _sqlite_full_scans(cursor, sql):
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+    # "SCAN <table>" (possibly "USING [COVERING] INDEX") reads the whole table
+    return {match.group(1) for *ids, detail in cursor.fetchall()
+            if (match := re.match(r'SCAN (\w+)', detail)) and match.group(1) != 'CONSTANT'}
+
+
+def _mysql_full_scans(cursor, sql):
+    cursor.execute(f'EXPLAIN {sql}')
+    columns = [column[0] for column in cursor.description]
+    # 'ALL' is a table scan, 'index' a scan of a whole index
+    return {row['table'] for row in (dict(zip(columns, values)) for values in cursor.fetchall())
+            if row['type'] in ('ALL', 'index')}
+
+
+def _postgresql_full_scans(cursor, sql):
+    cursor.execute(f'EXPLAIN {sql}')
+    return {match.group(1) for line, in cursor.fetchall() if (match := re.search(r'Seq Scan on (\w+)', line))}
+
+
+_FULL_SCANS = {
+    'sqlite': _sqlite_full_scans,
+    'mysql': _mysql_full_scans,
+    'postgresql': _postgresql_full_scans,
+}
+
+
+def full_table_scans(sql, using='default'):
+    """Return the tables the database would read in full to run ``sql``."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        return _FULL_SCANS[connection.vendor](cursor, sql)
@@ -0,0 +1,466 @@
+from datetime import timedelta
+from decimal import Decimal
+import tempfile
+import threading
+from io import StringIO
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection, router
+from django.db.utils import load_backend
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from common.api.views import ProfilingStatsView
+from common.cache import get_cache
+from common.db.pool import ConnectionPool, PoolTimeout
+from common.middleware import ReplicaRoutingMiddleware
+from common.benchmarking import find_regressions, measure, percentile, summarize
+from common.management.commands.benchmark_api import SCENARIOS, Command as BenchmarkApiCommand
+from common.management.commands.benchmark_asgi import Command as BenchmarkAsgiCommand
+from common.profiling import QueryRecorder, normalize_sql, profile_buffer, reset, summarize_views
+from common.synthetic_data import generate_dataset
+from common.testing import full_table_scans, make_educator, make_session, make_student, make_subject, make_user
+from courses.api.views import AsyncSubjectListView, SubjectListView
+from courses.models import Subject
+from payments.models import Transaction
+from sessions.models import Review, Session
+from users.models import LoginSession, RevokedSession
+
+
+class BenchmarkHelperTests(TestCase):
+
+    def test_percentiles_use_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+        self.assertEqual(summarize([0.001, 0.002, 0.003])['p50_ms'], 2.0)
+
+    def test_measure_counts_queries_per_call(self):
+        result = measure(lambda: list(Review.objects.all()), iterations=3, warmup=0)
+        self.assertEqual(result['count'], 3)
+        self.assertEqual(result['queries_per_call'], 1)
+        self.assertGreater(result['throughput_per_s'], 0)
+
+    def test_find_regressions(self):
+        baseline = {'a': {'p95_ms': 10.0, 'queries_per_call': 2}, 'b': {'p95_ms': 10.0, 'queries_per_call': 2}}
+        current = {'a': {'p95_ms': 11.0, 'queries_per_call': 2}, 'b': {'p95_ms': 20.0, 'queries_per_call': 3},
+                   'new': {'p95_ms': 1.0, 'queries_per_call': 1}}
+        regressions = find_regressions(baseline, current, tolerance=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(line.startswith('b:') for line in regressions))
+
+
+class BenchmarkApiTests(TestCase):
+    """The load-test harness runs end to end on a small dataset."""
+
+    def test_generated_history(self):
+        dataset = generate_dataset(subjects=3, students=10, educators=4, sessions=40, days=7,
+                                   review_ratio=1, paid_ratio=1)
+        self.assertGreater(dataset['reviews'], 0)
+        self.assertEqual(dataset['reviews'], Review.objects.count())
+        self.assertEqual(dataset['transactions'], Transaction.objects.filter(status='completed').count())
+
+    def test_scenarios_report_statistics(self):
+        command = BenchmarkApiCommand()
+        options = vars(command.create_parser('manage.py', 'benchmark_api').parse_args([
+            '--subjects', '3', '--students', '10', '--educators', '4', '--sessions', '40',
+            '--active-users', '3', '--iterations', '2',
+            *[arg for name in SCENARIOS if name != 'login' for arg in ('--scenario', name)],
+        ]))
+        results = command.run(options)
+        self.assertEqual(set(results['scenarios']),
+                         set(SCENARIOS) - {'login'})
+        for stats in results['scenarios'].values():
+            self.assertEqual(stats['count'], 2)
+            self.assertIn('p99_ms', stats)
+            self.assertIn('queries_per_call', stats)
+        self.assertEqual(results['meta']['dataset']['educators'], 4)
+
+
+class BenchmarkAsgiTests(TransactionTestCase):
+    """Both handlers serve every scenario from their own threads without errors."""
+
+    def test_handlers_report_throughput(self):
+        command = BenchmarkAsgiCommand()
+        options = vars(command.create_parser('manage.py', 'benchmark_asgi').parse_args([
+            '--students', '10', '--educators', '4', '--sessions', '40', '--active-users', '3',
+            '--requests', '6', '--clients', '3', '--wsgi-threads', '2', '--db-latency-ms', '1',
+        ]))
+        results = command.run(options)
+        for name, handlers in results['scenarios'].items():
+            for handler, stats in handlers.items():
+                self.assertEqual((stats['count'], stats['errors']), (6, 0), (name, handler, stats))
+
+
+@override_settings(REQUEST_PROFILING={'SAMPLE_RATE': 1, 'N_PLUS_ONE_THRESHOLD': 2})
+class ProfilingTests(TestCase):
+
+    def setUp(self):
+        reset()
+        self.addCleanup(reset)
+        self.student = make_student()
+        make_session(self.student, make_educator(), make_subject())
+        self.client = APIClient()
+
+    def test_similar_queries_are_grouped(self):
+        self.assertEqual(normalize_sql('SELECT * FROM t WHERE id IN (%s, %s,  %s)'),
+                         'SELECT * FROM t WHERE id IN (...)')
+        recorder = QueryRecorder()
+        execute = lambda sql, params, many, context: None
+        for pk in (1, 2, 2):
+            recorder(execute, 'SELECT * FROM t WHERE id = %s', (pk,), False, {})
+        record = recorder.record('app:view', 'GET', 200, 0.01, threshold=3)
+        self.assertEqual((record['queries'], record['duplicates']), (3, 1))
+        self.assertEqual(record['similar'], {'SELECT * FROM t WHERE id = %s': 3})
+        self.assertEqual(summarize_views([record])[0]['n_plus_one'][0]['max_per_request'], 3)
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.client.force_authenticate(self.student.user)
+        for _ in range(3):
+            self.assertEqual(self.client.get(reverse('sessions:my_sessions')).status_code, 200)
+        records = [r for r in profile_buffer.snapshot() if r['view'] == 'sessions:my_sessions']
+        self.assertEqual(len(records), 3)
+        self.assertGreater(records[0]['queries'], 0)
+        self.assertGreaterEqual(records[0]['wall_ms'], records[0]['db_ms'])
+
+    def test_async_requests_are_profiled(self):
+        self.async_client.force_login(self.student.user)
+        response = async_to_sync(self.async_client.get)(reverse('sessions:my_sessions_async'))
+        self.assertEqual(response.status_code, 200)
+        records = [r for r in profile_buffer.snapshot() if r['view'] == 'sessions:my_sessions_async']
+        self.assertEqual(len(records), 1)
+        self.assertGreater(records[0]['queries'], 0)
+
+    @override_settings(REQUEST_PROFILING={'SAMPLE_RATE': 0})
+    def test_unsampled_requests_are_not_recorded(self):
+        self.client.force_authenticate(self.student.user)
+        self.client.get(reverse('sessions:my_sessions'))
+        self.assertEqual(len(profile_buffer), 0)
+
+    def test_stats_endpoint_is_staff_only(self):
+        url = reverse('common:profiling_stats')
+        self.client.force_authenticate(self.student.user)
+        self.client.get(reverse('sessions:my_sessions'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(make_user(is_staff=True))
+        response = self.client.get(url, {'sort': 'mean_queries'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('sessions:my_sessions', [row['view'] for row in response.data['views']])
+        self.assertEqual(self.client.get(url, {'sort': 'bogus'}).status_code, 400)
+
+    def test_report_command_lists_slowest_views(self):
+        self.client.force_authenticate(self.student.user)
+        self.client.get(reverse('sessions:my_sessions'))
+        out = StringIO()
+        call_command('profiling_report', stdout=out)
+        self.assertIn('sessions:my_sessions', out.getvalue())
+
+
+class AsyncListViewTests(TestCase):
+    """The async list views, served through the ASGI handler, match their sync views."""
+
+    @classmethod
+    def setUpTestData(cls):
+        subjects = [make_subject(), make_subject()]
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=subjects)
+        make_educator(subjects=subjects[:1])
+        start = timezone.now() + timedelta(days=1)
+        for n in range(5):
+            session = make_session(cls.student, cls.educator, subjects[n % 2], start_time=start + timedelta(hours=n),
+                                   status='completed' if n % 2 else 'confirmed')
+            Transaction.objects.create(session=session, student=cls.student, educator=cls.educator,
+                                       amount=Decimal('30.00'), transaction_type='payment', status='completed')
+        cls.token = Token.objects.create(user=cls.student.user)
+        cls.educator_token = Token.objects.create(user=cls.educator.user)
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+
+    def get_async(self, name, params=None, token=None, **headers):
+        token = self.token if token is None else token
+        if token:
+            headers['Authorization'] = f'Token {token.key}'
+        return async_to_sync(self.async_client.get)(reverse(name), params or {}, headers=headers)
+
+    def assertSameAsSync(self, name, params=None, token=None):
+        token = token or self.token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        expected = self.client.get(reverse(name), params or {})
+        response = self.get_async(f'{name}_async', params, token)
+        self.assertEqual(response.status_code, 200)
+        # Page links only differ by path
+        self.assertEqual(response.content.replace(b'/async/', b'/'), expected.content)
+        return response
+
+    def test_cached_lists_match_sync_views(self):
+        response = self.assertSameAsSync('courses:subject_list')
+        self.assertEqual(len(response.json()), 2)
+        self.assertSameAsSync('users:educator_list', {'ordering': 'rating'})
+        self.assertSameAsSync('users:educator_list', {'subject_id': self.educator.subjects.first().pk})
+
+        # Served from the cache with a conditional GET on the second request
+        with self.assertNumQueries(0):
+            repeat = self.get_async('courses:subject_list_async', If_None_Match=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+
+    def test_paginated_lists_match_sync_views(self):
+        self.assertSameAsSync('sessions:my_sessions', {'status': 'completed'})
+        self.assertSameAsSync('sessions:my_sessions', token=self.educator_token)
+        self.assertSameAsSync('payments:transaction_list')
+
+        def cursor(url):
+            return parse_qs(urlsplit(url).query)['cursor'][0]
+
+        first = self.assertSameAsSync('sessions:my_sessions', {'page_size': 2}).json()
+        second = self.assertSameAsSync('sessions:my_sessions', {'page_size': 2, 'cursor': cursor(first['next'])}).json()
+        self.assertEqual(len(second['results']), 2)
+        # The previous-page cursor reads in reverse
+        previous = self.assertSameAsSync('sessions:my_sessions',
+                                         {'page_size': 2, 'cursor': cursor(second['previous'])}).json()
+        self.assertEqual(previous['results'], first['results'])
+
+    def test_session_authentication(self):
+        self.async_client.force_login(self.student.user)
+        response = self.get_async('payments:transaction_list_async', token=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_unauthenticated_requests_are_rejected(self):
+        self.assertEqual(self.get_async('courses:subject_list_async', token=False).status_code, 403)
+        response = self.get_async('sessions:my_sessions_async', token=False, Authorization='Token bogus')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(), {'detail': 'Invalid token.'})
+
+
+class QueryPlanTests(TestCase):
+    """Every query of the hot list endpoints must be served by an index.
+
+    The plan of each captured query is checked for full scans of the large
+    tables, so dropping or reshaping an index the endpoints rely on fails here.
+    """
+    LARGE_TABLES = {
+        'learning_sessions_session', 'learning_sessions_review', 'payments_transaction', 'users_educator',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[subject])
+        make_educator(subjects=[subject], verification_status='pending')
+        for status in ('pending', 'confirmed', 'completed', 'completed'):
+            session = make_session(cls.student, cls.educator, subject, status=status,
+                                   start_time=timezone.now() - timedelta(days=Session.objects.count() + 1))
+            if status == 'completed':
+                Review.objects.create(session=session, rating=5)
+                Transaction.objects.create(session=session, student=cls.student, educator=cls.educator,
+                                           amount=Decimal('30.00'), transaction_type='payment', status='completed')
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+
+    def assertIndexedQueries(self, user, url, params=None):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        selects = [query['sql'] for query in context.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertTrue(selects)
+        for sql in selects:
+            scanned = full_table_scans(sql) & self.LARGE_TABLES
+            self.assertFalse(scanned, f"Full scan of {', '.join(sorted(scanned))} in: {sql}")
+
+    def test_my_sessions(self):
+        url = reverse('sessions:my_sessions')
+        for user in (self.student.user, self.educator.user):
+            self.assertIndexedQueries(user, url)
+            self.assertIndexedQueries(user, url, {'status': 'completed'})
+
+    def test_transaction_list(self):
+        for user in (self.student.user, self.educator.user):
+            self.assertIndexedQueries(user, reverse('payments:transaction_list'))
+
+    def test_educator_list(self):
+        self.assertIndexedQueries(self.student.user, reverse('users:educator_list'))
+
+    def test_educator_reviews(self):
+        self.assertIndexedQueries(self.student.user, reverse('sessions:educator_reviews', args=[self.educator.pk]))
+
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+
+    def rollback(self):
+        if self.closed:
+            raise RuntimeError("closed")
+
+    def close(self):
+        self.closed = True
+
+
+def ping(fake):
+    if not fake.healthy:
+        raise RuntimeError("gone away")
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def make_pool(self, **options):
+        self.opened = []
+
+        def connect():
+            self.opened.append(FakeConnection())
+            return self.opened[-1]
+        return ConnectionPool(connect, ping, **{'size': 1, 'max_overflow': 1, 'timeout': 0.05, **options})
+
+    def test_connections_are_reused(self):
+        pool = self.make_pool()
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.stats()['checked_out'], 1)
+
+    def test_overflow_is_bounded_and_closed_on_release(self):
+        pool = self.make_pool()
+        first, overflow = pool.acquire(), pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        pool.release(overflow)
+        pool.release(first)
+        self.assertTrue(overflow.closed)
+        self.assertFalse(first.closed)
+        self.assertEqual(pool.stats(), {'size': 1, 'max_overflow': 1, 'open': 1, 'idle': 1, 'checked_out': 0})
+
+    def test_waiting_caller_gets_released_connection(self):
+        pool = self.make_pool(max_overflow=0, timeout=5)
+        first = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        pool.release(first)
+        waiter.join()
+        self.assertEqual(acquired, [first])
+
+    def test_stale_and_broken_connections_are_replaced(self):
+        pool = self.make_pool(recycle=0)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertIsNot(pool.acquire(), first)
+        self.assertTrue(first.closed)
+
+        pool = self.make_pool()
+        first = pool.acquire()
+        pool.release(first)
+        first.healthy = False
+        second = pool.acquire()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()['open'], 1)
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = ConnectionPool(lambda: 1 / 0, ping, size=1, max_overflow=0, timeout=0.05)
+        for attempt in range(2):
+            with self.assertRaises(ZeroDivisionError):
+                pool.acquire()
+        self.assertEqual(pool.stats()['open'], 0)
+
+
+class PooledBackendTests(SimpleTestCase):
+    """The SQLite stand-in of the pooled backend returns connections to the pool when Django closes them."""
+
+    def make_wrapper(self, path):
+        backend = load_backend('common.db.backends.sqlite3')
+        return backend.DatabaseWrapper({
+            **connection.settings_dict, 'ENGINE': 'common.db.backends.sqlite3', 'NAME': str(path), 'OPTIONS': {},
+            'POOL': {'SIZE': 1, 'MAX_OVERFLOW': 0, 'TIMEOUT': 0.05},
+        }, alias='pool-test')
+
+    def test_close_returns_connection_to_pool(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'pool.sqlite3'
+            wrapper, other = self.make_wrapper(path), self.make_wrapper(path)
+            wrapper.ensure_connection()
+            raw = wrapper.connection
+            with self.assertRaises(PoolTimeout):
+                other.ensure_connection()
+
+            wrapper.close()
+            other.ensure_connection()
+            self.assertIs(other.connection, raw)
+            with other.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                self.assertEqual(cursor.fetchone(), (1,))
+            other.close()
+            other.get_pool(other.get_connection_params()).close()
+
+    def test_in_memory_database_is_not_pooled(self):
+        wrappers = [self.make_wrapper(':memory:') for n in range(2)]
+        for wrapper in wrappers:
+            wrapper.ensure_connection()
+        self.assertIsNone(getattr(wrappers[0], '_pool', None))
+        self.assertIsNot(wrappers[0].connection, wrappers[1].connection)
+        for wrapper in wrappers:
+            wrapper.close()
+            # close() keeps in-memory connections open
+            wrapper._close()
+
+
+@override_settings(DATABASE_REPLICA={'ALIAS': 'replica', 'APPS': ('courses',), 'PIN_SECONDS': 5})
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def serve(self, view, method='get', cookies=None, write=False):
+        request = getattr(RequestFactory(), method)('/')
+        request.COOKIES.update(cookies or {})
+        reads = {}
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            if write:
+                router.db_for_write(Subject)
+            reads['subject'] = router.db_for_read(Subject)
+            reads['token'] = router.db_for_read(Token)
+            reads['auth'] = {router.db_for_read(LoginSession), router.db_for_read(RevokedSession)}
+            return HttpResponse()
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(request)
+        return reads, response
+
+    def test_read_views_use_replica(self):
+        for view in (SubjectListView.as_view(), AsyncSubjectListView.as_view()):
+            reads, response = self.serve(view)
+            self.assertEqual(reads, {'subject': 'replica', 'token': 'default', 'auth': {'default'}})
+            self.assertNotIn('db_pin', response.cookies)
+
+    def test_other_requests_use_primary(self):
+        self.assertEqual(self.serve(SubjectListView.as_view(), method='post')[0]['subject'], 'default')
+        self.assertEqual(self.serve(ProfilingStatsView.as_view())[0]['subject'], 'default')
+        self.assertEqual(router.db_for_read(Subject), 'default')
+        with override_settings(DATABASE_REPLICA={'APPS': ('courses',)}):
+            self.assertEqual(self.serve(SubjectListView.as_view())[0]['subject'], 'default')
+
+    def test_writes_pin_request_and_client_to_primary(self):
+        reads, response = self.serve(SubjectListView.as_view(), write=True)
+        self.assertEqual(reads['subject'], 'default')
+        self.assertEqual(response.cookies['db_pin']['max-age'], 5)
+
+        reads, response = self.serve(SubjectListView.as_view(), cookies={'db_pin': '1'})
+        self.assertEqual(reads['subject'], 'default')
+        self.assertNotIn('db_pin', response.cookies)
@@ -0,0 +1,280 @@
+"""Off-request storage of uploaded files and resized image variants.
+
+Registration and profile views used to save uploads to storage (and the
+client then downloaded the full-size image from every list) inside the
+request. Instead, ``attach_upload`` only *stages* the upload on local disk
+-- a rename when Django already spooled it to a temporary file, which it does
+in chunks above ``FILE_UPLOAD_MAX_MEMORY_SIZE`` -- and, once the transaction
+commits, a worker streams it into the field's storage in chunks and builds
+the image's WebP ``VARIANTS`` (thumbnails). The field keeps its previous
+value until the worker saves the new one.
+
+Image fields with variants have a ``<field>_variants`` JSON column mapping
+each variant to its file, plus ``source``, the image they were built from.
+``track_variants`` rebuilds them whenever a save changes the image (admin,
+shell); serializers render a variant instead of the original (see
+``common.serializers.fields.ImageVariantField``).
+
+With ``WORKERS = 0``, or after a restart, staged uploads wait for the
+``process_uploads`` management command, which also backfills variants of
+images uploaded before they existed.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WORKERS': 2,
+    'STAGING_ROOT': None,  # Default: <tempdir>/upload_staging
+    # Built largest first, each from the previous one
+    'VARIANTS': {
+        'preview': {'SIZE': (480, 480), 'QUALITY': 80},
+        'thumbnail': {'SIZE': (96, 96), 'QUALITY': 75},
+    },
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'UPLOAD_PIPELINE', {})}
+
+
+def staging_storage():
+    root = get_config()['STAGING_ROOT'] or os.path.join(tempfile.gettempdir(), 'upload_staging')
+    return FileSystemStorage(location=root)
+
+
+def variants_attname(field_name):
+    return f'{field_name}_variants'
+
+
+# ---------------------------------------------------------------------------
+# Uploads
+# ---------------------------------------------------------------------------
+
+def attach_upload(instance, field_name, upload):
+    """Store ``upload`` in ``instance.<field_name>`` outside of the request.
+
+    ``instance`` must be saved. Returns the staged name, which encodes the
+    target (``<model>/<pk>/<field>/<file name>``) so ``process_uploads`` can
+    finish it after a restart.
+    """
+    name = '/'.join((instance._meta.label_lower, str(instance.pk), field_name, os.path.basename(upload.name)))
+    staged = staging_storage().save(name, upload)
+    transaction.on_commit(lambda: enqueue_upload(staged))
+    return staged
+
+
+def process_upload(staged):
+    """Stream a staged upload into its field's storage and build its variants."""
+    staging = staging_storage()
+    label, pk, field_name, filename = staged.split('/', 3)
+    model = apps.get_model(label)
+    field = model._meta.get_field(field_name)
+    instance = model._default_manager.filter(pk=pk).first()
+    if instance is None:
+        # Deleted, or its transaction rolled back
+        staging.delete(staged)
+        return None
+
+    with staging.open(staged) as content:
+        name = field.storage.save(field.generate_filename(instance, filename), content, max_length=field.max_length)
+    values = {field_name: name}
+    if has_variants(model, field_name):
+        values[variants_attname(field_name)] = build_variants(field.storage, name)
+
+    # A regular save, so the caches embedding the object are invalidated
+    for attname, value in values.items():
+        setattr(instance, attname, value)
+    instance.save(update_fields=list(values))
+    staging.delete(staged)
+    return name
+
+
+def pending_uploads(min_age=0):
+    """Staged names of the uploads staged more than ``min_age`` seconds ago, oldest first."""
+    root = staging_storage().location
+    deadline = time.time() - min_age
+    found = []
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            modified = os.path.getmtime(path)
+            if modified <= deadline:
+                found.append((modified, os.path.relpath(path, root).replace(os.sep, '/')))
+    return [name for modified, name in sorted(found)]
+
+
+def process_pending_uploads(min_age=60, limit=None):
+    """Process staged uploads left to the command; returns their staged names.
+
+    ``min_age`` skips uploads whose transaction may not have committed yet.
+    """
+    processed = []
+    for staged in pending_uploads(min_age)[:limit]:
+        try:
+            process_upload(staged)
+        except Exception:
+            logger.exception("Could not process staged upload %s", staged)
+            continue
+        processed.append(staged)
+    return processed
+
+
+# ---------------------------------------------------------------------------
+# Image variants
+# ---------------------------------------------------------------------------
+
+def has_variants(model, field_name):
+    return any(field.name == variants_attname(field_name) for field in model._meta.concrete_fields)
+
+
+def build_variants(storage, name):
+    """Build the configured WebP variants of the image ``name`` in ``storage``.
+
+    Returns ``{'source': name, <variant>: <file name>, ...}``; a file that
+    cannot be decoded gets no variants.
+    """
+    variants = {'source': name}
+    specs = sorted(get_config()['VARIANTS'].items(), key=lambda item: -max(item[1]['SIZE']))
+    root = os.path.splitext(name)[0]
+    try:
+        with storage.open(name) as file, Image.open(file) as source:
+            # JPEG only: decode at the smallest scale still larger than the variants
+            largest = max(max(spec['SIZE']) for _, spec in specs)
+            source.draft('RGB', (largest, largest))
+            image = ImageOps.exif_transpose(source)
+            has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+            for variant, spec in specs:
+                # In place and never upscaling, so each variant starts from the previous one
+                image.thumbnail(spec['SIZE'], Image.Resampling.LANCZOS)
+                buffer = BytesIO()
+                image.save(buffer, 'WEBP', quality=spec['QUALITY'])
+                variants[variant] = storage.save(f'{root}.{variant}.webp', ContentFile(buffer.getvalue()))
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as exc:
+        logger.warning("Could not build variants of %s: %s", name, exc)
+    return variants
+
+
+def rebuild_variants(label, pk, field_name):
+    """Build the variants of ``<model>.<field_name>``, unless the image changed meanwhile."""
+    model = apps.get_model(label)
+    instance = model._default_manager.filter(pk=pk).first()
+    file = getattr(instance, field_name, None)
+    if not file:
+        return None
+    variants = build_variants(file.storage, file.name)
+    with transaction.atomic():
+        instance = model._default_manager.select_for_update().filter(pk=pk).first()
+        if instance is None or getattr(instance, field_name).name != file.name:
+            # Its own save scheduled another rebuild
+            return None
+        setattr(instance, variants_attname(field_name), variants)
+        instance.save(update_fields=[variants_attname(field_name)])
+    return variants
+
+
+_tracked = []
+
+
+def track_variants(model, field_name):
+    """Keep ``<field_name>_variants`` of ``model`` in step with the image.
+
+    A save that changes the image clears the stale variants at once and
+    rebuilds them in the worker pool after commit.
+    """
+    attname = variants_attname(field_name)
+
+    def clear_stale_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+        if raw or (update_fields is not None and field_name not in update_fields):
+            return
+        name = getattr(instance, field_name).name or None
+        variants = getattr(instance, attname) or {}
+        if variants.get('source') == name:
+            return
+        if variants:
+            setattr(instance, attname, {})
+            sender._default_manager.filter(pk=instance.pk).update(**{attname: {}})
+        if name:
+            label, pk = sender._meta.label_lower, instance.pk
+            transaction.on_commit(lambda: submit(rebuild_variants, label, pk, field_name))
+
+    _tracked.append((model, field_name))
+    post_save.connect(clear_stale_variants, sender=model, weak=False,
+                      dispatch_uid=f'track_variants:{model._meta.label_lower}.{field_name}')
+
+
+def backfill_variants(limit=None):
+    """Build missing or stale variants of every tracked image field; returns how many were built."""
+    built = 0
+    for model, field_name in _tracked:
+        attname = variants_attname(field_name)
+        rows = (model._default_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                .values_list('pk', field_name, attname).order_by('pk'))
+        for pk, name, variants in rows.iterator():
+            if (variants or {}).get('source') != name:
+                rebuild_variants(model._meta.label_lower, pk, field_name)
+                built += 1
+                if limit is not None and built >= limit:
+                    return built
+    return built
+
+
+# ---------------------------------------------------------------------------
+# Worker pool
+# ---------------------------------------------------------------------------
+
+class UploadWorkerPool:
+    """Thread pool storing uploads and building image variants outside of the request thread."""
+
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload-worker')
+
+    def submit(self, function, *args):
+        return self.executor.submit(self._run, function, *args)
+
+    @staticmethod
+    def _run(function, *args):
+        try:
+            return function(*args)
+        except Exception:
+            logger.exception("Upload worker failed on %s%r", function.__name__, args)
+        finally:
+            close_old_connections()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def submit(function, *args):
+    """Run ``function(*args)`` in the in-process worker pool, if enabled.
+
+    With ``WORKERS = 0`` the work waits for the ``process_uploads`` command.
+    """
+    global _pool
+    workers = get_config()['WORKERS']
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = UploadWorkerPool(workers)
+    return _pool.submit(function, *args)
+
+
+def enqueue_upload(staged):
+    return submit(process_upload, staged)
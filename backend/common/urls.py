@@ -0,0 +1,8 @@
+from django.urls import path
+from common.api.views import ProfilingStatsView
+
+app_name = 'common'
+
+urlpatterns = [
+    path('stats/', ProfilingStatsView.as_view(), name='profiling_stats'),
+]
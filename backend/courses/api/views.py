@@ -1,18 +1,26 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from common.api.async_views import AsyncListView
+from common.api.mixins import EagerLoadingViewMixin, VersionedCacheMixin
 from courses.models import Subject
 from courses.serializers.subject_serializers import SubjectSerializer, SubjectDetailSerializer
 
-class SubjectListView(generics.ListAPIView):
+class SubjectListView(VersionedCacheMixin, generics.ListAPIView):
     """API view to list all available subjects."""
     serializer_class = SubjectSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespaces = ('subject',)
     queryset = Subject.objects.all()
 
-class SubjectDetailView(generics.RetrieveAPIView):
+class AsyncSubjectListView(AsyncListView):
+    """Async view serving SubjectListView for ASGI deployments."""
+    view_class = SubjectListView
+
+class SubjectDetailView(VersionedCacheMixin, EagerLoadingViewMixin, generics.RetrieveAPIView):
     """API view to retrieve subject details including associated educators."""
     serializer_class = SubjectDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespaces = ('subject', 'educator')
     queryset = Subject.objects.all()
 
 class SubjectFavoriteView(generics.UpdateAPIView):
@@ -5,6 +5,7 @@ class Subject(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     icon = models.ImageField(upload_to='subject_icons/', blank=True, null=True)
+    icon_variants = models.JSONField(default=dict, blank=True, editable=False)  # See common.uploads
     
     class Meta:
         ordering = ['name']
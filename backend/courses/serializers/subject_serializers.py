@@ -1,15 +1,23 @@
 from rest_framework import serializers
 from courses.models import Subject
 from users.serializers.user_serializers import EducatorSerializer
+from common.serializers.fields import ImageVariantField
+from common.serializers.mixins import EagerLoadingMixin
 
-class SubjectSerializer(serializers.ModelSerializer):
+class SubjectSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for the Subject model."""
+    icon = ImageVariantField(required=False, allow_null=True)
+    
     class Meta:
         model = Subject
         fields = ['id', 'name', 'description', 'icon']
 
-class SubjectDetailSerializer(serializers.ModelSerializer):
+# Side-loaded by compact list serializers (see common.serializers.compact)
+COMPACT_SUBJECT_FIELDS = {'id': 'id', 'name': 'name', 'icon': 'icon_variants'}
+
+class SubjectDetailSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Detailed serializer for Subject model including related educators."""
+    icon = ImageVariantField(required=False, allow_null=True)
     educators = EducatorSerializer(many=True, read_only=True)
     
     class Meta:
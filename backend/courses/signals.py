@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.cache import bump_version
+from common.uploads import track_variants
+from courses.models import Subject
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def invalidate_subject_cache(sender, **kwargs):
+    bump_version('subject')
+
+
+track_variants(Subject, 'icon')
@@ -1,3 +1,73 @@
+import json
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from common.testing import QueryCountMixin, make_educator, make_student, make_subject
+
+
+class SubjectQueryCountTests(QueryCountMixin, TestCase):
+    """The number of queries must not grow with the number of educators embedded."""
+
+    def test_subject_detail_query_count_is_constant(self):
+        url = reverse('courses:subject_detail', args=[self.subject.pk])
+        make_educator(subjects=[self.subject])
+        baseline = self.count_queries(url)
+        for i in range(9):
+            make_educator(subjects=[self.subject, make_subject()])
+        self.assertEqual(self.count_queries(url), baseline)
+
+
+class SubjectCacheTests(TestCase):
+    """Versioned read-through cache of the subject catalog."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject(name='Algebra')
+        cls.student = make_student()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def test_second_request_is_served_without_queries(self):
+        url = reverse('courses:subject_list')
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_if_none_match_returns_not_modified(self):
+        url = reverse('courses:subject_list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_subject_save_invalidates(self):
+        url = reverse('courses:subject_list')
+        etag = self.client.get(url)['ETag']
+        self.subject.name = 'Linear Algebra'
+        self.subject.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)[0]['name'], 'Linear Algebra')
+
+    def test_educator_subjects_change_invalidates_subject_detail(self):
+        url = reverse('courses:subject_detail', args=[self.subject.pk])
+        self.assertEqual(json.loads(self.client.get(url).content)['educators'], [])
+        educator = make_educator()
+        educator.subjects.add(self.subject)
+        educators = json.loads(self.client.get(url).content)['educators']
+        self.assertEqual([item['id'] for item in educators], [educator.pk])
 
-# Create your tests here.
+    def test_missing_subject_is_not_cached(self):
+        url = reverse('courses:subject_detail', args=[0])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
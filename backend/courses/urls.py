@@ -1,12 +1,13 @@
 from django.urls import path
 from courses.api.views import (
-    SubjectListView, SubjectDetailView, SubjectFavoriteView
+    SubjectListView, AsyncSubjectListView, SubjectDetailView, SubjectFavoriteView
 )
 
 app_name = 'courses'
 
 urlpatterns = [
     path('subjects/', SubjectListView.as_view(), name='subject_list'),
+    path('subjects/async/', AsyncSubjectListView.as_view(), name='subject_list_async'),
     path('subjects/<int:pk>/', SubjectDetailView.as_view(), name='subject_detail'),
     path('subjects/<int:pk>/favorite/', SubjectFavoriteView.as_view(), name='subject_favorite'),
 ]
\ No newline at end of file
@@ -2,6 +2,9 @@
 ASGI config for education_platform project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with any ASGI server, e.g. ``uvicorn education_platform.asgi:application``.
+The ``.../async/`` list endpoints are native async views; the other views run
+in a thread per request, as under WSGI.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
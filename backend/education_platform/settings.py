@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,13 +44,18 @@ INSTALLED_APPS = [
     'corsheaders',
     'drf_yasg',  # Added for Swagger API documentation
     # Custom apps
+    'common',
     'users',
     'courses',
     'sessions.apps.SessionsConfig',  # Use the app config with the custom label
     'payments',
+    'search',
+    'notifications',
 ]
 
 MIDDLEWARE = [
+    'common.middleware.ProfilingMiddleware',
+    'common.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -83,32 +89,107 @@ WSGI_APPLICATION = 'education_platform.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connections come from a per-process pool (see common.db.pool) configured by
+# the DB_POOL_* variables; DB_POOL_SIZE=0 disables it, and DB_CONN_MAX_AGE
+# then keeps one connection per thread open instead.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'education_order',
-        'USER': 'root',
-        'PASSWORD': 'root1772005',
-        'HOST': '127.0.0.1',  # Docker host IP
-        'PORT': '3306',       # Docker exposed port
+        'ENGINE': 'common.db.backends.mysql',
+        'NAME': os.environ.get('DB_NAME', 'education_order'),
+        'USER': os.environ.get('DB_USER', 'root'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'root1772005'),
+        'HOST': os.environ.get('DB_HOST', '127.0.0.1'),  # Docker host IP
+        'PORT': os.environ.get('DB_PORT', '3306'),       # Docker exposed port
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
             'charset': 'utf8mb4',
         },
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+        'POOL': {
+            'SIZE': int(os.environ.get('DB_POOL_SIZE', 10)),
+            'MAX_OVERFLOW': int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+            'RECYCLE': int(os.environ.get('DB_POOL_RECYCLE', 3600)),  # seconds, below MySQL's wait_timeout
+            'PRE_PING': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),  # seconds to wait for a free connection
+        },
     }
 }
 
+# Read replica (see common.db.routers), enabled by DB_REPLICA_HOST
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['common.db.routers.ReplicaRouter']
+DATABASE_REPLICA = {
+    'ALIAS': 'replica' if 'replica' in DATABASES else None,
+    'APPS': ('users', 'courses', 'sessions', 'payments'),  # packages whose list/detail views may use it
+    'PIN_SECONDS': int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5)),  # covers the replication lag
+}
+
 # Rest Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.SignedTokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',  # Tokens issued before signed tokens
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+# Cache settings
+# The local-memory backend is per process; point API_CACHE_ALIAS at a shared
+# backend (e.g. Redis or Memcached) when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'education-platform',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+API_CACHE_ALIAS = 'default'
+
+# Signed access tokens and rotating refresh tokens (see users.services.token_service)
+AUTH_TOKENS = {
+    'ACCESS_TTL': 300,  # seconds; also how long a logout stays on the revocation list
+    'REFRESH_TTL': 14 * 24 * 3600,  # seconds without refreshing after which a login ends
+    'SYNC_INTERVAL': 5,  # seconds between reloads of the revocation list; bounds logout delay across workers
+}
+
+# In-process token authentication cache (see users.authentication)
+TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'TIMEOUT': 60,  # seconds; bounds how long a logout takes to reach other workers
+}
+
+# Payment processing (see payments.services.payment_service)
+PAYMENT_GATEWAY = 'payments.services.gateways.FakeGateway'
+PAYMENT_WORKERS = 4  # In-process worker threads; 0 leaves payments to `manage.py process_payments`
+
+# Search backend (see search.services.search_service); None picks MySQL FULLTEXT
+# on MySQL and the in-process inverted index elsewhere
+SEARCH_BACKEND = None
+
+# Sampled request profiling (see common.profiling); report at /api/profiling/stats/
+REQUEST_PROFILING = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.05,  # share of requests recorded
+    'BUFFER_SIZE': 5000,  # recorded requests kept per process
+    'N_PLUS_ONE_THRESHOLD': 5,  # same SQL template this many times in one request
+    'PUBLISH_INTERVAL': 30,  # seconds between publishing the buffer to the API cache
+}
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # For development only, set specific origins in production
 CORS_ALLOW_CREDENTIALS = True
@@ -117,10 +198,54 @@ CORS_ALLOW_CREDENTIALS = True
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads above this size are spooled to a temporary file in chunks instead of memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# Off-request storage of uploads and image thumbnails (see common.uploads)
+UPLOAD_PIPELINE = {
+    'WORKERS': 2,  # In-process worker threads; 0 leaves uploads to `manage.py process_uploads`
+    'STAGING_ROOT': BASE_DIR / 'upload_staging',  # Local disk, outside of MEDIA_ROOT
+}
+
+# Outbox of session/payment/review events (see notifications.services.outbox_service)
+OUTBOX = {
+    'IN_PROCESS': True,  # Dispatch from a thread after each commit; False leaves it to `manage.py dispatch_events`
+    'SINKS': [
+        'notifications.services.sinks.QueueSink',  # wakes the event streams of this process
+        # 'notifications.services.sinks.WebhookSink', 'notifications.services.sinks.LogSink',
+    ],
+    'WEBHOOK_URL': os.environ.get('OUTBOX_WEBHOOK_URL'),
+    'WEBHOOK_SECRET': os.environ.get('OUTBOX_WEBHOOK_SECRET', ''),
+    'LOG_PATH': BASE_DIR / 'events.jsonl',
+}
+
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
 
+# Password hashing (see users.hashers). PASSWORD_HASHER hashes new passwords;
+# passwords stored with another hasher or other parameters are rehashed on login.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'scrypt')  # scrypt, argon2 (needs argon2-cffi) or pbkdf2
+_PASSWORD_HASHERS = {
+    'scrypt': 'users.hashers.ScryptPasswordHasher',
+    'argon2': 'users.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER],
+                    *(path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER)]
+PASSWORD_HASHING = {
+    'SCRYPT': {'WORK_FACTOR': 2 ** 14, 'BLOCK_SIZE': 8, 'PARALLELISM': 1},  # 16 MiB per hash
+    'ARGON2': {'TIME_COST': 2, 'MEMORY_COST': 19 * 1024, 'PARALLELISM': 1},  # KiB
+    'WORKERS': 4,  # Threads hashing for the async login view (see users.services.auth_service)
+}
+
+# Token-bucket login throttling (see users.throttling): CAPACITY attempts at
+# once, refilled at RATE per second
+LOGIN_THROTTLE = {
+    'IP': {'CAPACITY': 30, 'RATE': 1.0},
+    'EMAIL': {'CAPACITY': 10, 'RATE': 0.1},
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -43,6 +43,9 @@ urlpatterns = [
     path('api/courses/', include('courses.urls', namespace='courses')),
     path('api/sessions/', include('sessions.urls', namespace='sessions')),
     path('api/payments/', include('payments.urls', namespace='payments')),
+    path('api/search/', include('search.urls', namespace='search')),
+    path('api/events/', include('notifications.urls', namespace='notifications')),
+    path('api/profiling/', include('common.urls', namespace='common')),
     
     # Swagger documentation URLs
     re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework import exceptions, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.api.async_views import AsyncAPIView
+from notifications.serializers.event_serializers import EventPollSerializer
+from notifications.services.outbox_service import (
+    alatest_sequence, await_events, get_config, latest_sequence, wait_for_events
+)
+
+class EventPollView(APIView):
+    """API view long-polling the user's events after the ``after`` cursor.
+
+    Answers as soon as there are events, or without any after ``timeout``
+    seconds; the next request passes the returned ``cursor``. Without
+    ``after`` only events from now on are returned. A waiting request holds
+    a worker thread, so ASGI deployments should use EventStreamView.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        params = EventPollSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        config = get_config()
+        after = params.validated_data.get('after')
+        if after is None:
+            after = latest_sequence(request.user.pk)
+        timeout = min(params.validated_data.get('timeout', config['POLL_TIMEOUT']), config['POLL_TIMEOUT'])
+
+        events = wait_for_events(request.user.pk, after, timeout)
+        return Response({
+            'events': [event.as_message() for event in events],
+            'cursor': events[-1].sequence if events else after,
+        }, status=status.HTTP_200_OK)
+
+class EventStreamView(AsyncAPIView):
+    """Server-sent events stream of the user's events, waiting on the event loop.
+
+    Resumes after the ``Last-Event-ID`` header (or ``?after=``), else starts
+    from now. The stream ends after ``STREAM_DURATION`` seconds and
+    EventSource clients reconnect with the last id they received.
+    """
+    http_method_names = ['get', 'options']
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            user, auth = await self.authenticate(request)
+            if not user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            data = request.GET.dict()
+            if 'Last-Event-ID' in request.headers:
+                data['after'] = request.headers['Last-Event-ID']
+            params = EventPollSerializer(data=data)
+            params.is_valid(raise_exception=True)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+        after = params.validated_data.get('after')
+        if after is None:
+            after = await alatest_sequence(user.pk)
+
+        response = StreamingHttpResponse(self.stream(user.pk, after), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Tell nginx not to buffer the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, user_id, after):
+        config = get_config()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config['STREAM_DURATION']
+        while (remaining := deadline - loop.time()) > 0:
+            events = await await_events(user_id, after, min(remaining, config['POLL_TIMEOUT']))
+            for event in events:
+                yield f'id: {event.sequence}\nevent: {event.topic}\ndata: {json.dumps(event.as_message())}\n\n'
+                after = event.sequence
+            if not events:
+                # Keeps proxies from closing the idle connection
+                yield ': keepalive\n\n'
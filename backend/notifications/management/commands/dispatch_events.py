@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.services.outbox_service import dispatch_all, purge_dispatched
+
+# Seconds between purges of dispatched events past their retention
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = ("Dispatch outbox events to the sinks (all of them with OUTBOX['IN_PROCESS'] = False, else what a "
+            "crashed process left) and delete dispatched events older than OUTBOX['RETENTION'].")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the outbox once and exit.")
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--interval', type=float, default=0.2,
+                            help="Seconds to sleep when there is nothing to dispatch.")
+
+    def handle(self, *args, **options):
+        purged_at = None
+        while True:
+            if purged_at is None or time.monotonic() - purged_at >= PURGE_INTERVAL:
+                deleted = purge_dispatched()
+                if deleted:
+                    self.stdout.write(f"Deleted {deleted} dispatched event(s).")
+                purged_at = time.monotonic()
+            dispatched = dispatch_all(batch_size=options['batch_size'])
+            if dispatched:
+                self.stdout.write(f"Dispatched {dispatched} event(s).")
+            if options['once']:
+                break
+            close_old_connections()
+            if not dispatched:
+                time.sleep(options['interval'])
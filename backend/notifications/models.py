@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import models
+
+class OutboxEvent(models.Model):
+    """Change of a session, payment or review to tell one user about.
+    
+    Written in the database transaction making the change, so an event exists
+    exactly when the change was committed. The dispatcher numbers events in
+    ``sequence`` as it hands them to the sinks; clients read their events in
+    that order (see ``notifications.services.outbox_service``).
+    """
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='outbox_events')
+    topic = models.CharField(max_length=50)  # e.g. 'session.booked'
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sequence = models.BigIntegerField(null=True, blank=True, unique=True)  # Set on dispatch
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # A user's events after a stream cursor
+            models.Index(fields=['user', 'sequence'], name='outbox_user_sequence_idx'),
+            # The dispatcher takes undispatched events oldest first; purging by age
+            models.Index(fields=['dispatched_at', 'id'], name='outbox_dispatched_idx'),
+        ]
+    
+    def as_message(self):
+        """What clients and sinks are told about the event."""
+        return {
+            'id': self.sequence,
+            'topic': self.topic,
+            'payload': self.payload,
+            'created_at': self.created_at.isoformat(),
+        }
+    
+    def __str__(self):
+        return f"{self.topic} for {self.user_id} ({self.sequence or 'pending'})"
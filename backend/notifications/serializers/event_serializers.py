@@ -0,0 +1,6 @@
+from rest_framework import serializers
+
+class EventPollSerializer(serializers.Serializer):
+    """Query parameters for reading the user's events after a cursor."""
+    after = serializers.IntegerField(required=False, min_value=0)
+    timeout = serializers.FloatField(required=False, min_value=0)
@@ -0,0 +1,206 @@
+"""Transactional outbox of session, payment and review events.
+
+Receivers of the domain events (``notifications.signals``) ``publish`` one
+``OutboxEvent`` per user to tell, in the transaction making the change. A
+rolled back change therefore leaves no event, and a committed one cannot
+lose its event to a crash.
+
+The dispatcher (``dispatch_pending``) drains the outbox in batches, oldest
+first. It numbers each batch's events with the next values of ``sequence``,
+then hands the batch to the ``SINKS`` in the same transaction: a failing
+sink rolls the batch back and it is tried again, so sinks see each event at
+least once. Dispatchers in several processes may take different batches
+concurrently (``SKIP LOCKED``); the unique ``sequence`` lets only one of two
+batches numbered alike commit, and the other is retried. Dispatching runs in
+a thread after each commit that published events (``IN_PROCESS``) and in
+the ``dispatch_events`` management command, which also catches what a
+crashed process left.
+
+Clients read their own events ordered by ``sequence`` after a cursor, from
+the long-poll and server-sent events endpoints. While nothing is there they
+wait on ``broker``, which ``QueueSink`` wakes when this process dispatches,
+and look at the table again every ``POLL_INTERVAL`` seconds for events
+dispatched by other processes.
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from notifications.models import OutboxEvent
+from notifications.services.sinks import broker
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'IN_PROCESS': True,
+    'SINKS': ['notifications.services.sinks.QueueSink'],
+    'BATCH_SIZE': 500,
+    'POLL_INTERVAL': 0.5,  # seconds between table reads of a waiting client
+    'POLL_TIMEOUT': 25,  # longest long-poll wait, and heartbeat interval of streams
+    'STREAM_DURATION': 300,  # seconds before a stream ends; clients reconnect with Last-Event-ID
+    'PAGE_SIZE': 100,  # events per response or stream read
+    'RETENTION': timedelta(days=7),
+    'WEBHOOK_URL': None,
+    'WEBHOOK_SECRET': '',
+    'WEBHOOK_TIMEOUT': 5,
+    'LOG_PATH': None,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'OUTBOX', {})}
+
+
+def publish(events):
+    """Record ``(user id, topic, payload)`` events; call in the transaction making the change."""
+    rows = [OutboxEvent(user_id=user_id, topic=topic, payload=payload) for user_id, topic, payload in events]
+    if rows:
+        OutboxEvent.objects.bulk_create(rows)
+        transaction.on_commit(wake_dispatcher)
+    return rows
+
+
+def get_sinks():
+    """Return instances of the configured sinks."""
+    config = get_config()
+    return [import_string(path)(config) for path in config['SINKS']]
+
+
+def dispatch_pending(batch_size=None):
+    """Number and hand one batch of undispatched events to the sinks. Returns the batch size.
+
+    Returns 0 when there is nothing to dispatch or another dispatcher
+    committed the same sequence numbers first.
+    """
+    batch_size = batch_size or get_config()['BATCH_SIZE']
+    try:
+        with transaction.atomic():
+            events = list(OutboxEvent.objects.select_for_update(skip_locked=True)
+                          .filter(dispatched_at__isnull=True).order_by('id')[:batch_size])
+            if not events:
+                return 0
+            last = OutboxEvent.objects.aggregate(last=Max('sequence'))['last'] or 0
+            now = timezone.now()
+            for number, event in enumerate(events, start=last + 1):
+                event.sequence, event.dispatched_at = number, now
+            OutboxEvent.objects.bulk_update(events, ['sequence', 'dispatched_at'])
+            for sink in get_sinks():
+                sink.send(events)
+    except IntegrityError:
+        logger.info("Outbox batch numbered by a concurrent dispatcher; retrying later.")
+        return 0
+    return len(events)
+
+
+def dispatch_all(batch_size=None):
+    """Dispatch batches until the outbox is drained. Returns the number of events."""
+    total = 0
+    while True:
+        dispatched = dispatch_pending(batch_size)
+        if not dispatched:
+            return total
+        total += dispatched
+
+
+def purge_dispatched(older_than=None):
+    """Delete events dispatched longer than ``RETENTION`` ago; returns how many."""
+    cutoff = timezone.now() - (older_than if older_than is not None else get_config()['RETENTION'])
+    deleted, _ = OutboxEvent.objects.filter(dispatched_at__lt=cutoff).delete()
+    return deleted
+
+
+class DispatcherThread:
+    """Single thread draining the outbox; wakes coalesce while a drain is queued."""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outbox-dispatcher')
+        self._queued = False
+        self._lock = threading.Lock()
+
+    def wake(self):
+        with self._lock:
+            if self._queued:
+                return None
+            self._queued = True
+        return self.executor.submit(self._run)
+
+    def _run(self):
+        with self._lock:
+            self._queued = False
+        try:
+            return dispatch_all()
+        except Exception:
+            logger.exception("Outbox dispatch failed")
+        finally:
+            close_old_connections()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def wake_dispatcher():
+    """Drain the outbox in this process's dispatcher thread, if ``IN_PROCESS`` is set."""
+    global _dispatcher
+    if not get_config()['IN_PROCESS']:
+        return None
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = DispatcherThread()
+    return _dispatcher.wake()
+
+
+def _events_after(user_id, after):
+    return OutboxEvent.objects.filter(user_id=user_id, sequence__gt=after).order_by('sequence')
+
+
+def latest_sequence(user_id):
+    return OutboxEvent.objects.filter(user_id=user_id).aggregate(last=Max('sequence'))['last'] or 0
+
+
+async def alatest_sequence(user_id):
+    return (await OutboxEvent.objects.filter(user_id=user_id).aaggregate(last=Max('sequence')))['last'] or 0
+
+
+def wait_for_events(user_id, after, timeout):
+    """Return the user's dispatched events after ``after``, waiting up to ``timeout`` seconds for one."""
+    config = get_config()
+    deadline = time.monotonic() + timeout
+    woken = threading.Event()
+    # Subscribed before reading, so an event dispatched in between still wakes the wait
+    with broker.subscribe(user_id, woken.set):
+        while True:
+            events = list(_events_after(user_id, after)[:config['PAGE_SIZE']])
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            woken.wait(min(remaining, config['POLL_INTERVAL']))
+            woken.clear()
+
+
+async def await_events(user_id, after, timeout):
+    """``wait_for_events`` for async views: waits on the event loop, not in a thread."""
+    config = get_config()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    woken = asyncio.Event()
+    with broker.subscribe(user_id, lambda: loop.call_soon_threadsafe(woken.set)):
+        while True:
+            events = [event async for event in _events_after(user_id, after)[:config['PAGE_SIZE']]]
+            remaining = deadline - loop.time()
+            if events or remaining <= 0:
+                return events
+            try:
+                await asyncio.wait_for(woken.wait(), min(remaining, config['POLL_INTERVAL']))
+            except asyncio.TimeoutError:
+                pass
+            woken.clear()
@@ -0,0 +1,102 @@
+"""Outbox sinks.
+
+The dispatcher hands each batch of events to every sink of
+``OUTBOX['SINKS']``, inside the transaction marking the batch dispatched.
+A sink raising rolls the batch back and it is handed over again later, so
+sinks must tolerate seeing an event twice; events carry their ``id`` (the
+stream sequence) for deduplication.
+"""
+import hashlib
+import hmac
+import json
+import threading
+import urllib.request
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+
+class EventSink:
+    """Base class for outbox sinks; ``config`` is the ``OUTBOX`` setting with its defaults."""
+
+    def __init__(self, config):
+        self.config = config
+
+    def send(self, events):
+        """Deliver a batch of ``OutboxEvent``; raise to have the batch retried."""
+        raise NotImplementedError
+
+
+def sink_messages(events):
+    return [{**event.as_message(), 'user_id': event.user_id} for event in events]
+
+
+class EventBroker:
+    """Wakes the clients of this process waiting for events of a user."""
+
+    def __init__(self):
+        self._waiters = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def subscribe(self, user_id, wake):
+        """Call ``wake()`` (from any thread) while the block runs, whenever ``user_id`` has events."""
+        with self._lock:
+            self._waiters[user_id].add(wake)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._waiters[user_id].discard(wake)
+                if not self._waiters[user_id]:
+                    del self._waiters[user_id]
+
+    def publish(self, user_ids):
+        with self._lock:
+            wakes = [wake for user_id in set(user_ids) for wake in self._waiters.get(user_id, ())]
+        for wake in wakes:
+            wake()
+
+
+broker = EventBroker()
+
+
+class QueueSink(EventSink):
+    """In-process queue: wakes this process's clients waiting for the batch's users."""
+
+    def send(self, events):
+        # They read the events from the table, so only once the batch is committed
+        transaction.on_commit(partial(broker.publish, [event.user_id for event in events]))
+
+
+class WebhookSink(EventSink):
+    """POSTs each batch as JSON to ``OUTBOX['WEBHOOK_URL']``.
+
+    With ``WEBHOOK_SECRET`` the body's HMAC-SHA256 is sent in
+    ``X-Outbox-Signature``. Any answer but a 2xx retries the batch.
+    """
+
+    def send(self, events):
+        config = self.config
+        body = json.dumps({'events': sink_messages(events)}, cls=DjangoJSONEncoder).encode()
+        request = urllib.request.Request(config['WEBHOOK_URL'], data=body, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        if config['WEBHOOK_SECRET']:
+            request.add_header('X-Outbox-Signature',
+                               hmac.new(config['WEBHOOK_SECRET'].encode(), body, hashlib.sha256).hexdigest())
+        # urlopen raises HTTPError for non-2xx answers
+        with urllib.request.urlopen(request, timeout=config['WEBHOOK_TIMEOUT']):
+            pass
+
+
+class LogSink(EventSink):
+    """Appends events as JSON lines to ``OUTBOX['LOG_PATH']``; a stand-in for a message bus."""
+
+    def send(self, events):
+        with open(self.config['LOG_PATH'], 'a', encoding='utf-8') as log:
+            for message in sink_messages(events):
+                log.write(json.dumps(message, cls=DjangoJSONEncoder) + '\n')
+
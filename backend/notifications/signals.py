@@ -0,0 +1,73 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from notifications.services.outbox_service import publish
+from payments.events import payment_processed
+from payments.models import Transaction
+from sessions.events import session_status_changed, sessions_booked
+from sessions.models import Review, Session
+from users.models import Educator
+
+
+def _participants(session_ids):
+    """Map session ids to the user ids of their student and educator, in one query."""
+    return {
+        pk: (student_user_id, educator_user_id)
+        for pk, student_user_id, educator_user_id in Session.objects.filter(pk__in=session_ids)
+        .values_list('pk', 'student__user_id', 'educator__user_id')
+    }
+
+
+@receiver(sessions_booked, sender=Session)
+def publish_bookings(sender, sessions, **kwargs):
+    """Tell the student and the educator about new sessions."""
+    participants = _participants([session.pk for session in sessions])
+    publish(
+        (user_id, 'session.booked', {
+            'session_id': session.pk,
+            'status': session.status,
+            'subject_id': session.subject_id,
+            'start_time': session.start_time.isoformat(),
+            'end_time': session.end_time.isoformat(),
+        })
+        for session in sessions for user_id in participants[session.pk]
+    )
+
+
+@receiver(session_status_changed, sender=Session)
+def publish_status_changes(sender, status, changes, **kwargs):
+    participants = _participants([pk for pk, old_status, version in changes])
+    publish(
+        (user_id, 'session.status_changed', {
+            'session_id': pk, 'old_status': old_status, 'status': status, 'version': version,
+        })
+        for pk, old_status, version in changes for user_id in participants[pk]
+    )
+
+
+@receiver(payment_processed, sender=Transaction)
+def publish_payment(sender, transaction, **kwargs):
+    """Tell the student how their payment ended, and the educator about completed ones."""
+    student_user_id, educator_user_id = Transaction.objects.filter(pk=transaction.pk).values_list(
+        'student__user_id', 'educator__user_id'
+    ).get()
+    user_ids = [student_user_id] + ([educator_user_id] if transaction.status == 'completed' else [])
+    publish(
+        (user_id, f'payment.{transaction.status}', {
+            'transaction_id': transaction.pk,
+            'session_id': transaction.session_id,
+            'amount': str(transaction.amount),
+            'status': transaction.status,
+            'error': transaction.last_error,
+        })
+        for user_id in user_ids
+    )
+
+
+@receiver(post_save, sender=Review)
+def publish_review(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        educator_user_id = Educator.objects.values_list('user_id', flat=True).get(pk=instance.educator_id)
+        publish([(educator_user_id, 'review.created', {
+            'review_id': instance.pk, 'session_id': instance.session_id, 'rating': instance.rating,
+        })])
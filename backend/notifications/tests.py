@@ -0,0 +1,237 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from common.testing import make_educator, make_session, make_student, make_subject
+from notifications.models import OutboxEvent
+from notifications.services.outbox_service import dispatch_all, dispatch_pending, publish, purge_dispatched
+from notifications.services.sinks import EventSink
+from payments.services.gateways import FakeGateway
+from payments.services.payment_service import create_payment, process_transaction
+from sessions.models import Review
+from sessions.services.conflict_service import SessionConflictError, book_session
+
+
+class FailingSink(EventSink):
+    calls = []
+
+    def send(self, events):
+        self.calls.append([event.sequence for event in events])
+        raise ConnectionError("Sink unavailable.")
+
+
+@override_settings(PAYMENT_WORKERS=0)
+class OutboxTests(TestCase):
+    """Session, payment and review changes record events in their own transaction."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[cls.subject], hourly_rate=Decimal('40.00'))
+        cls.start = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def events(self, user=None):
+        queryset = OutboxEvent.objects.order_by('id')
+        if user is not None:
+            queryset = queryset.filter(user=user)
+        return [(event.topic, event.payload) for event in queryset]
+
+    def book(self, start=None):
+        start = start or self.start
+        return book_session(self.student, self.educator.pk, self.subject.pk, start, start + timedelta(hours=1))
+
+    def test_booking_tells_both_participants(self):
+        session = self.book()
+        for user in (self.student.user, self.educator.user):
+            self.assertEqual(self.events(user), [('session.booked', {
+                'session_id': session.pk, 'status': 'pending', 'subject_id': self.subject.pk,
+                'start_time': session.start_time.isoformat(), 'end_time': session.end_time.isoformat(),
+            })])
+
+    def test_rejected_booking_leaves_no_event(self):
+        self.book()
+        with self.assertRaises(SessionConflictError):
+            self.book(self.start + timedelta(minutes=30))
+        self.assertEqual(OutboxEvent.objects.count(), 2)
+
+    def test_bulk_booking_writes_events_in_one_insert(self):
+        self.client.force_authenticate(self.student.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('sessions:session_bulk_create'), {
+                'educator_id': self.educator.pk, 'subject_id': self.subject.pk,
+                'recurrence': {'start_time': self.start.isoformat(),
+                               'end_time': (self.start + timedelta(hours=1)).isoformat(),
+                               'frequency': 'weekly', 'count': 4},
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sum('INSERT INTO "notifications_outboxevent"' in query['sql']
+                             for query in context.captured_queries), 1)
+        self.assertEqual(OutboxEvent.objects.filter(topic='session.booked').count(), 8)
+
+    def test_status_change_is_published(self):
+        session = self.book()
+        self.client.force_authenticate(self.educator.user)
+        self.client.patch(reverse('sessions:session_update_status', args=[session.pk]), {'status': 'confirmed'},
+                          format='json')
+        self.assertEqual(self.events(self.student.user)[-1], ('session.status_changed', {
+            'session_id': session.pk, 'old_status': 'pending', 'status': 'confirmed', 'version': 1,
+        }))
+        # Repeating the request changes nothing and tells nobody
+        self.client.patch(reverse('sessions:session_update_status', args=[session.pk]), {'status': 'confirmed'},
+                          format='json')
+        self.assertEqual(OutboxEvent.objects.filter(topic='session.status_changed').count(), 2)
+
+    def test_payment_outcomes_are_published(self):
+        session = self.book()
+        transaction, created = create_payment(self.student, session.pk, 'card', 'key-1')
+        process_transaction(transaction.pk, gateway=FakeGateway())
+        self.assertEqual([topic for topic, payload in self.events(self.educator.user)],
+                         ['session.booked', 'payment.completed', 'session.status_changed'])
+        self.assertEqual(self.events(self.student.user)[1][1]['amount'], '40.00')
+
+        other = self.book(self.start + timedelta(hours=2))
+        transaction, created = create_payment(self.student, other.pk, 'decline', 'key-2')
+        process_transaction(transaction.pk, gateway=FakeGateway())
+        self.assertEqual(self.events(self.student.user)[-1][0], 'payment.failed')
+        self.assertNotIn('payment.failed', [topic for topic, payload in self.events(self.educator.user)])
+
+    def test_review_is_published_to_the_educator(self):
+        session = make_session(self.student, self.educator, self.subject, status='completed')
+        self.client.force_authenticate(self.student.user)
+        response = self.client.post(reverse('sessions:review_create'), {'session': session.pk, 'rating': 5})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.events(self.educator.user), [('review.created', {
+            'review_id': Review.objects.get(session=session).pk, 'session_id': session.pk, 'rating': 5,
+        })])
+
+    def test_dispatch_numbers_events_in_order(self):
+        publish([(self.student.user.pk, 'test', {'n': n}) for n in range(5)])
+        self.assertEqual(dispatch_pending(batch_size=3), 3)
+        self.assertEqual(dispatch_all(), 2)
+        self.assertEqual(dispatch_all(), 0)
+        events = list(OutboxEvent.objects.order_by('id'))
+        self.assertEqual([event.sequence for event in events], [1, 2, 3, 4, 5])
+        self.assertTrue(all(event.dispatched_at for event in events))
+
+    def test_sinks_receive_batches_and_failures_retry_them(self):
+        publish([(self.student.user.pk, 'test', {'n': n}) for n in range(2)])
+        with override_settings(OUTBOX={'SINKS': ['notifications.tests.FailingSink']}):
+            with self.assertRaises(ConnectionError):
+                dispatch_pending()
+        self.assertEqual(FailingSink.calls[-1], [1, 2])
+        self.assertFalse(OutboxEvent.objects.filter(dispatched_at__isnull=False).exists())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.jsonl')
+            with override_settings(OUTBOX={'SINKS': ['notifications.services.sinks.LogSink'], 'LOG_PATH': path}):
+                self.assertEqual(dispatch_all(), 2)
+            with open(path) as log:
+                messages = [json.loads(line) for line in log]
+        self.assertEqual([(message['id'], message['user_id'], message['payload']) for message in messages],
+                         [(1, self.student.user.pk, {'n': 0}), (2, self.student.user.pk, {'n': 1})])
+
+    def test_purge_and_command(self):
+        publish([(self.student.user.pk, 'test', {})])
+        call_command('dispatch_events', '--once', stdout=open(os.devnull, 'w'))
+        self.assertEqual(purge_dispatched(), 0)
+        self.assertEqual(purge_dispatched(older_than=timedelta(seconds=-1)), 1)
+
+
+@override_settings(OUTBOX={'POLL_INTERVAL': 0.05, 'STREAM_DURATION': 0.2})
+class EventEndpointTests(TestCase):
+    """Clients read only their own dispatched events, after their cursor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_student()
+        cls.other = make_student()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+        publish([(self.student.user.pk, 'test', {'n': 1}), (self.other.user.pk, 'test', {'n': 2}),
+                 (self.student.user.pk, 'test', {'n': 3})])
+        dispatch_all()
+        # Not dispatched yet, so not visible
+        publish([(self.student.user.pk, 'test', {'n': 4})])
+
+    def test_long_poll_returns_own_events_after_cursor(self):
+        response = self.client.get(reverse('notifications:event_poll'), {'after': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([event['payload']['n'] for event in response.data['events']], [1, 3])
+        self.assertEqual(response.data['cursor'], 3)
+
+        response = self.client.get(reverse('notifications:event_poll'), {'after': 1})
+        self.assertEqual([event['id'] for event in response.data['events']], [3])
+
+    def test_long_poll_without_cursor_waits_for_new_events(self):
+        started = time.monotonic()
+        response = self.client.get(reverse('notifications:event_poll'), {'timeout': 0.1})
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertEqual(response.data, {'events': [], 'cursor': 3})
+        self.assertEqual(self.client.get(reverse('notifications:event_poll'), {'after': -1}).status_code, 400)
+
+    def test_endpoints_require_authentication(self):
+        self.assertEqual(APIClient().get(reverse('notifications:event_poll')).status_code, 403)
+        response = async_to_sync(self.async_client.get)(reverse('notifications:event_stream'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_event_stream(self):
+        async def read_stream():
+            response = await self.async_client.get(reverse('notifications:event_stream'),
+                                                   headers={'Last-Event-ID': '1'})
+            return response, b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+        self.async_client.force_login(self.student.user)
+        response, body = async_to_sync(read_stream)()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        frames = [frame for frame in body.split('\n\n') if frame.startswith('id:')]
+        self.assertEqual(len(frames), 1)
+        self.assertTrue(frames[0].startswith('id: 3\nevent: test\ndata: '))
+        self.assertEqual(json.loads(frames[0].split('data: ')[1])['payload'], {'n': 3})
+        self.assertIn(': keepalive', body)
+
+
+@override_settings(OUTBOX={'IN_PROCESS': False, 'POLL_INTERVAL': 10})
+class EventLatencyTests(TransactionTestCase):
+    """A waiting client is woken by the dispatcher of its process, not by its next table read."""
+
+    def test_waiting_client_is_woken_on_dispatch(self):
+        student = make_student()
+        client = APIClient()
+        client.force_authenticate(student.user)
+
+        def publish_later():
+            time.sleep(0.2)
+            try:
+                publish([(student.user.pk, 'test', {})])
+                dispatch_all()
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=publish_later)
+        started = time.monotonic()
+        thread.start()
+        response = client.get(reverse('notifications:event_poll'), {'after': 0, 'timeout': 5})
+        elapsed = time.monotonic() - started
+        thread.join()
+        self.assertEqual(len(response.data['events']), 1)
+        self.assertLess(elapsed, 1)
@@ -0,0 +1,9 @@
+from django.urls import path
+from notifications.api.views import EventPollView, EventStreamView
+
+app_name = 'notifications'
+
+urlpatterns = [
+    path('', EventPollView.as_view(), name='event_poll'),
+    path('stream/', EventStreamView.as_view(), name='event_stream'),
+]
@@ -1,16 +1,30 @@
-from rest_framework import generics, permissions
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import generics, permissions, status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
 from payments.models import Transaction, PayoutAccount
 from payments.serializers.payment_serializers import (
-    TransactionSerializer, PaymentCreateSerializer,
-    PayoutAccountSerializer, PayoutAccountCreateSerializer
+    TransactionSerializer, TransactionCompactSerializer, PaymentCreateSerializer, PaymentStatusSerializer,
+    PayoutAccountSerializer, PayoutAccountCreateSerializer, TransactionExportFilterSerializer
 )
+from payments.services.export_service import (
+    EXPORT_FORMATS, export_statement, export_transactions, filter_transactions
+)
+from payments.services.payment_service import IdempotencyKeyReused
 from sessions.api.views import IsStudent, IsEducator
+from common.api.async_views import AsyncListView
+from common.api.mixins import EagerLoadingViewMixin
+from common.serializers.compact import CompactListMixin
+from common.pagination import TransactionCursorPagination
 
-class TransactionListView(generics.ListAPIView):
-    """API view to list transactions based on user role."""
+class TransactionListView(CompactListMixin, EagerLoadingViewMixin, generics.ListAPIView):
+    """API view to list transactions based on user role; ``?view=compact`` side-loads related objects."""
     serializer_class = TransactionSerializer
+    compact_serializer_class = TransactionCompactSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TransactionCursorPagination
     
     def get_queryset(self):
         user = self.request.user
@@ -20,7 +34,11 @@ class TransactionListView(generics.ListAPIView):
             return Transaction.objects.filter(educator__user=user)
         return Transaction.objects.none()
 
-class TransactionDetailView(generics.RetrieveAPIView):
+class AsyncTransactionListView(AsyncListView):
+    """Async view serving TransactionListView for ASGI deployments."""
+    view_class = TransactionListView
+
+class TransactionDetailView(EagerLoadingViewMixin, generics.RetrieveAPIView):
     """API view to retrieve transaction details."""
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -34,31 +52,36 @@ class TransactionDetailView(generics.RetrieveAPIView):
         return Transaction.objects.none()
 
 class PaymentCreateView(generics.CreateAPIView):
-    """API view for students to make a payment for a session."""
+    """API view for students to request a payment for a session.
+    
+    The payment is processed asynchronously: the response is 202 with the
+    pending transaction, whose progress is reported by PaymentStatusView.
+    Repeating the request with the same idempotency key returns the same
+    transaction; sending the key with another session is a 422.
+    """
     serializer_class = PaymentCreateSerializer
     permission_classes = [permissions.IsAuthenticated, IsStudent]
     
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        return context
-    
-    def perform_create(self, serializer):
-        transaction = serializer.save()
-        
-        # In a real-world scenario, here you would:
-        # 1. Integrate with a payment gateway (Stripe, PayPal, etc.)
-        # 2. Process the payment
-        # 3. Update the transaction status based on the payment result
-        
-        # For now, let's simulate a successful payment
-        transaction.status = 'completed'
-        transaction.save()
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            transaction = serializer.save()
+        except IdempotencyKeyReused as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
         
-        # Update session status if payment is successful
-        session = transaction.session
-        if session.status == 'pending':
-            session.status = 'confirmed'
-            session.save()
+        data = PaymentStatusSerializer(transaction).data
+        data['status_url'] = reverse('payments:payment_status', args=[transaction.pk], request=request)
+        response_status = status.HTTP_202_ACCEPTED if serializer.created else status.HTTP_200_OK
+        return Response(data, status=response_status)
+
+class PaymentStatusView(generics.RetrieveAPIView):
+    """API view to poll the processing status of a payment."""
+    serializer_class = PaymentStatusSerializer
+    permission_classes = [permissions.IsAuthenticated, IsStudent]
+    
+    def get_queryset(self):
+        return Transaction.objects.filter(student__user=self.request.user).select_related('session')
 
 class PayoutAccountView(generics.RetrieveUpdateAPIView):
     """API view for educators to manage their payout account."""
@@ -79,4 +102,51 @@ class PayoutAccountCreateView(generics.CreateAPIView):
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
-        return context
\ No newline at end of file
+        return context
+
+def _export_response(chunks, export_format, filename):
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+class TransactionExportView(APIView):
+    """API view streaming the user's transactions as CSV or JSON Lines.
+    
+    Staff export the whole ledger. Rows are streamed in constant memory, so
+    the response starts immediately whatever the number of transactions.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_staff:
+            return Transaction.objects.all()
+        elif user.user_type == 'student':
+            return Transaction.objects.filter(student__user=user)
+        elif user.user_type == 'educator':
+            return Transaction.objects.filter(educator__user=user)
+        return Transaction.objects.none()
+    
+    def get(self, request, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise Http404
+        filters = TransactionExportFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        queryset = filter_transactions(
+            self.get_queryset(),
+            start_date=filters.validated_data.get('start'),
+            end_date=filters.validated_data.get('end'),
+            statuses=filters.validated_data.get('status'),
+            transaction_types=filters.validated_data.get('type'),
+        )
+        return _export_response(export_transactions(queryset, export_format), export_format, 'transactions')
+
+class EducatorStatementView(APIView):
+    """API view streaming an educator's monthly earnings statement."""
+    permission_classes = [permissions.IsAuthenticated, IsEducator]
+    
+    def get(self, request, year, month, export_format):
+        if export_format not in EXPORT_FORMATS or not 1 <= month <= 12 or not 1 <= year < 9999:
+            raise Http404
+        chunks = export_statement(request.user.educator_profile, year, month, export_format)
+        return _export_response(chunks, export_format, f'statement-{year:04d}-{month:02d}')
@@ -0,0 +1,9 @@
+"""Domain events of payments.
+
+Sent with ``sender=Transaction`` inside the transaction making the change, so
+receivers may write alongside it (as the notifications outbox does).
+"""
+from django.dispatch import Signal
+
+# transaction: a payment that reached its final status, 'completed' or 'failed'
+payment_processed = Signal()
@@ -0,0 +1,69 @@
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from common.benchmarking import benchmark_database
+from common.synthetic_data import generate_dataset
+from payments.models import PayoutAccount
+from payments.services.payout_service import PAYOUT_CHUNK_SIZE, run_payouts
+
+
+class Command(BaseCommand):
+    help = "Benchmark payout run time against the number of unpaid transactions, in throwaway databases."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transactions', default='10000,100000',
+                            help="Comma-separated numbers of unpaid payments to settle.")
+        parser.add_argument('--educators', type=int, default=10000)
+        parser.add_argument('--chunk-size', type=int, default=PAYOUT_CHUNK_SIZE)
+        parser.add_argument('--trace-memory', action='store_true',
+                            help="Report peak Python memory of each run (slows the run down).")
+        parser.add_argument('--keepdb', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        results = {'options': {k: options[k] for k in ('educators', 'chunk_size')}, 'runs': []}
+        for count in [int(value) for value in options['transactions'].split(',')]:
+            with benchmark_database(keepdb=options['keepdb']):
+                results['database'] = connection.vendor
+                results['runs'].append(self.run(count, options))
+        self.stdout.write(json.dumps(results, indent=2, default=str))
+
+    def run(self, count, options):
+        # Sessions span as many days ahead as behind, so half of them are completed and paid
+        dataset = generate_dataset(subjects=20, students=max(10, options['educators'] // 10),
+                                   educators=options['educators'], sessions=count * 2, paid_ratio=1.0,
+                                   seed=options['seed'])
+        PayoutAccount.objects.bulk_create([
+            PayoutAccount(educator_id=educator_id, account_name=f'Educator {educator_id}',
+                          account_number=f'{educator_id:012d}', bank_name='Bench Bank', is_verified=True)
+            for educator_id in dataset['educators']
+        ], batch_size=5000)
+
+        if options['trace_memory']:
+            tracemalloc.start()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            run = run_payouts('bench', cutoff=timezone.now(), chunk_size=options['chunk_size'])
+        seconds = time.perf_counter() - started
+        result = {
+            'transactions': dataset['transactions'],
+            'payouts': run.payout_count,
+            'payments_settled': run.payment_count,
+            'run_seconds': round(seconds, 3),
+            'payments_per_second': round(run.payment_count / seconds) if seconds else None,
+            'queries': len(queries),
+        }
+        if options['trace_memory']:
+            result['peak_memory_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+            tracemalloc.stop()
+
+        started = time.perf_counter()
+        run_payouts('bench')
+        result['completed_rerun_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return result
@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.models import Transaction
+from payments.services.export_service import CHUNK_SIZE, EXPORT_FORMATS, export_transactions, filter_transactions
+
+
+class Command(BaseCommand):
+    help = "Export the transaction ledger as CSV or JSON Lines, streaming rows in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', help="File to write to; defaults to standard output.")
+        parser.add_argument('--start', type=date.fromisoformat, help="First creation date (YYYY-MM-DD).")
+        parser.add_argument('--end', type=date.fromisoformat, help="Last creation date, inclusive.")
+        parser.add_argument('--status', action='append', choices=[value for value, label in Transaction.STATUS_CHOICES])
+        parser.add_argument('--type', action='append', choices=[value for value, label in Transaction.TYPE_CHOICES])
+        parser.add_argument('--educator', type=int, help="Only export this educator's transactions.")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['start'] and options['end'] and options['start'] > options['end']:
+            raise CommandError("--end must be on or after --start.")
+        queryset = Transaction.objects.all()
+        if options['educator']:
+            queryset = queryset.filter(educator_id=options['educator'])
+        queryset = filter_transactions(queryset, options['start'], options['end'],
+                                       options['status'], options['type'])
+        chunks = export_transactions(queryset, options['format'], chunk_size=options['chunk_size'])
+
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stderr.write(f"Exported to {options['output']}.")
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from payments.services.payment_service import process_pending_payments
+
+
+class Command(BaseCommand):
+    help = "Charge pending payment transactions through the configured gateway."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Process one batch and exit.")
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to sleep when there is nothing to process.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_pending_payments(limit=options['batch_size'])
+            if processed:
+                self.stdout.write(f"Processed {len(processed)} payment(s).")
+            if options['once']:
+                break
+            close_old_connections()
+            if not processed:
+                time.sleep(options['interval'])
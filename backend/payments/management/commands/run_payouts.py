@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from payments.services.payout_service import PAYOUT_CHUNK_SIZE, run_payouts
+
+
+def _cutoff(value):
+    cutoff = datetime.fromisoformat(value)
+    return timezone.make_aware(cutoff) if timezone.is_naive(cutoff) else cutoff
+
+
+class Command(BaseCommand):
+    help = ("Pay educators their unpaid completed payments. Meant to be scheduled: a run id defaults to the "
+            "cutoff date, so repeated invocations resume or skip the day's run instead of paying twice.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run-id', help="Identifier of the run to start or resume.")
+        parser.add_argument('--cutoff', type=_cutoff,
+                            help="Settle payments completed before this date/time; defaults to today 00:00.")
+        parser.add_argument('--chunk-size', type=int, default=PAYOUT_CHUNK_SIZE, help="Educators per chunk.")
+
+    def handle(self, *args, **options):
+        run = run_payouts(options['run_id'], options['cutoff'], chunk_size=options['chunk_size'])
+        self.stdout.write(
+            f"Run {run.run_id}: {run.payout_count} payout(s) totalling {run.total_amount} "
+            f"for {run.payment_count} payment(s)."
+        )
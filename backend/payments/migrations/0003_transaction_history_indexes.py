@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-16 22:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning_sessions', '0003_availability'),
+        ('payments', '0002_alter_transaction_session'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['student', '-created_at'], name='txn_student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['educator', '-created_at'], name='txn_educator_created_idx'),
+        ),
+    ]
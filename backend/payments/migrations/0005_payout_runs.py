@@ -0,0 +1,60 @@
+# Generated by Django 5.2 on 2026-10-16 23:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning_sessions', '0003_availability'),
+        ('payments', '0004_payment_pipeline'),
+        ('users', '0002_educator_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_id', models.CharField(max_length=64, unique=True)),
+                ('cutoff', models.DateTimeField()),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed')], default='running', max_length=10)),
+                ('last_educator_id', models.PositiveIntegerField(default=0)),
+                ('payout_count', models.PositiveIntegerField(default=0)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='session',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='learning_sessions.session'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='student',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='users.student'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='payout_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='payouts', to='payments.payoutrun'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='settled_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='settled_payments', to='payments.payoutrun'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['educator', 'transaction_type', 'status', 'settled_run'], name='txn_educator_unpaid_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(fields=('payout_run', 'educator'), name='unique_payout_run_educator'),
+        ),
+    ]
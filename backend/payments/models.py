@@ -5,6 +5,7 @@ class Transaction(models.Model):
     
     STATUS_CHOICES = [
         ('pending', 'Pending'),
+        ('processing', 'Processing'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
         ('refunded', 'Refunded'),
@@ -16,19 +17,51 @@ class Transaction(models.Model):
         ('refund', 'Refund'),
     ]
     
-    session = models.ForeignKey('sessions.Session', on_delete=models.CASCADE, related_name='transactions')
-    student = models.ForeignKey('users.Student', on_delete=models.CASCADE, related_name='payments')
+    # Payouts settle many sessions at once and have neither
+    session = models.ForeignKey('learning_sessions.Session', on_delete=models.CASCADE, related_name='transactions',
+                                null=True, blank=True)
+    student = models.ForeignKey('users.Student', on_delete=models.CASCADE, related_name='payments',
+                                null=True, blank=True)
     educator = models.ForeignKey('users.Educator', on_delete=models.CASCADE, related_name='earnings')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     transaction_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     transaction_id = models.CharField(max_length=255, blank=True, null=True)  # Payment gateway transaction ID
     payment_method = models.CharField(max_length=50, blank=True)
+    idempotency_key = models.CharField(max_length=64, blank=True, null=True)  # Client-supplied, unique per student
+    attempts = models.PositiveSmallIntegerField(default=0)  # Gateway attempts made by the payment workers
+    last_error = models.TextField(blank=True)
+    payout_run = models.ForeignKey('PayoutRun', on_delete=models.PROTECT, null=True, blank=True,
+                                   related_name='payouts')  # Set on payouts
+    settled_run = models.ForeignKey('PayoutRun', on_delete=models.PROTECT, null=True, blank=True,
+                                    related_name='settled_payments')  # Set on payments once paid out
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'idempotency_key'], name='unique_student_idempotency_key'),
+            # A run pays each educator at most once
+            models.UniqueConstraint(fields=['payout_run', 'educator'], name='unique_payout_run_educator'),
+        ]
+        indexes = [
+            # Per-user transaction history paginated by creation time
+            models.Index(fields=['student', '-created_at'], name='txn_student_created_idx'),
+            models.Index(fields=['educator', '-created_at'], name='txn_educator_created_idx'),
+            # Payment workers poll for pending transactions
+            models.Index(fields=['status', 'updated_at'], name='txn_status_updated_idx'),
+            # Payout runs look up each educator's unpaid payments
+            models.Index(fields=['educator', 'transaction_type', 'status', 'settled_run'], name='txn_educator_unpaid_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so signal handlers can detect transitions
+        if 'status' in field_names:
+            instance._loaded_status = values[field_names.index('status')]
+        return instance
     
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} - {self.status}"
@@ -47,3 +80,25 @@ class PayoutAccount(models.Model):
     
     def __str__(self):
         return f"Payout Account for {self.educator}"
+
+class PayoutRun(models.Model):
+    """Model representing one batched payout of educator earnings."""
+    
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+    ]
+    
+    run_id = models.CharField(max_length=64, unique=True)
+    cutoff = models.DateTimeField()  # Only payments completed before this are settled
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    last_educator_id = models.PositiveIntegerField(default=0)  # Checkpoint: educators up to this id are done
+    payout_count = models.PositiveIntegerField(default=0)
+    payment_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Payout run {self.run_id} - {self.status}"
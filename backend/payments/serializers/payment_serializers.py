@@ -1,9 +1,15 @@
 from rest_framework import serializers
 from payments.models import Transaction, PayoutAccount
-from users.serializers.user_serializers import StudentSerializer, EducatorSerializer
+from users.serializers.user_serializers import (
+    StudentSerializer, EducatorSerializer, participant_converters, participant_includes
+)
+from courses.serializers.subject_serializers import COMPACT_SUBJECT_FIELDS
 from sessions.serializers.session_serializers import SessionSerializer
+from common.serializers.compact import CompactListSerializer, decimal_string, prefixed, variant_url
+from common.serializers.mixins import EagerLoadingMixin
+from payments.services.payment_service import IdempotencyKeyReused, PaymentError, create_payment
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Transaction model."""
     student = StudentSerializer(read_only=True)
     educator = EducatorSerializer(read_only=True)
@@ -16,48 +22,76 @@ class TransactionSerializer(serializers.ModelSerializer):
                  'payment_method', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
+class TransactionCompactSerializer(CompactListSerializer):
+    """Compact transaction list: related objects by id, side-loaded once in ``included``."""
+    fields = {
+        'id': 'id', 'session': 'session_id', 'student': 'student_id', 'educator': 'educator_id',
+        'amount': 'amount', 'transaction_type': 'transaction_type', 'status': 'status',
+        'transaction_id': 'transaction_id', 'payment_method': 'payment_method',
+        'created_at': 'created_at', 'updated_at': 'updated_at',
+    }
+    included = participant_includes() + (
+        ('sessions', 'session_id', {
+            'id': 'session_id', 'student': 'session__student_id', 'educator': 'session__educator_id',
+            'subject': 'session__subject_id', 'start_time': 'session__start_time',
+            'end_time': 'session__end_time', 'status': 'session__status',
+        }),
+        ('subjects', 'session__subject_id', prefixed('session__subject__', COMPACT_SUBJECT_FIELDS)),
+    )
+    converters = {**participant_converters(), 'amount': decimal_string, 'session__subject__icon_variants': variant_url()}
+
 class PaymentCreateSerializer(serializers.ModelSerializer):
-    """Serializer for creating a payment for a session."""
+    """Serializer for requesting a payment for a session.
+    
+    The idempotency key can also be sent as an ``Idempotency-Key`` header.
+    """
     session_id = serializers.IntegerField(write_only=True)
     payment_method = serializers.CharField(write_only=True)
+    idempotency_key = serializers.CharField(write_only=True, max_length=64, required=False)
     
     class Meta:
         model = Transaction
-        fields = ['session_id', 'payment_method']
+        fields = ['session_id', 'payment_method', 'idempotency_key']
+    
+    def validate(self, attrs):
+        request = self.context['request']
+        attrs.setdefault('idempotency_key', request.headers.get('Idempotency-Key', ''))
+        if not attrs['idempotency_key']:
+            raise serializers.ValidationError(
+                {"idempotency_key": "An idempotency key is required (field or Idempotency-Key header)."}
+            )
+        if len(attrs['idempotency_key']) > 64:
+            raise serializers.ValidationError({"idempotency_key": "Ensure this field has no more than 64 characters."})
+        return attrs
     
     def create(self, validated_data):
-        # Extract data from validated data
-        session_id = validated_data.pop('session_id')
-        payment_method = validated_data.pop('payment_method')
-        
         # Get the current user (student)
         student = self.context['request'].user.student_profile
         
-        # Get the session
-        from sessions.models import Session
-        session = Session.objects.get(id=session_id)
-        
-        # Validate that the student is the one who booked the session
-        if session.student != student:
-            raise serializers.ValidationError("You can only pay for your own sessions.")
-        
-        # Calculate payment amount based on session duration and educator rate
-        amount = session.session_cost
-        
-        # Create the transaction
-        transaction = Transaction.objects.create(
-            session=session,
-            student=student,
-            educator=session.educator,
-            amount=amount,
-            transaction_type='payment',
-            status='pending',
-            payment_method=payment_method
-        )
+        # Record a pending transaction; the payment workers charge it
+        try:
+            transaction, created = create_payment(student, **validated_data)
+        except IdempotencyKeyReused:
+            # Answered by the view
+            raise
+        except PaymentError as exc:
+            raise serializers.ValidationError(str(exc))
         
+        self.created = created
         return transaction
 
-class PayoutAccountSerializer(serializers.ModelSerializer):
+class PaymentStatusSerializer(serializers.ModelSerializer):
+    """Serializer reporting the progress of a payment."""
+    session_id = serializers.IntegerField(read_only=True)
+    session_status = serializers.CharField(source='session.status', read_only=True)
+    
+    class Meta:
+        model = Transaction
+        fields = ['id', 'session_id', 'session_status', 'amount', 'status', 'attempts',
+                  'transaction_id', 'last_error', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+class PayoutAccountSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for PayoutAccount model."""
     educator = EducatorSerializer(read_only=True)
     
@@ -84,4 +118,16 @@ class PayoutAccountCreateSerializer(serializers.ModelSerializer):
             defaults=validated_data
         )
         
-        return payout_account
\ No newline at end of file
+        return payout_account
+
+class TransactionExportFilterSerializer(serializers.Serializer):
+    """Serializer validating the query parameters of a transaction export."""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    status = serializers.ListField(child=serializers.ChoiceField(choices=Transaction.STATUS_CHOICES), required=False)
+    type = serializers.ListField(child=serializers.ChoiceField(choices=Transaction.TYPE_CHOICES), required=False)
+    
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({"end": "End date must be on or after the start date."})
+        return attrs
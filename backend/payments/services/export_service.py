@@ -0,0 +1,144 @@
+"""Streaming exports of transactions as CSV or JSON Lines.
+
+Rows are read as ``values_list`` projections in primary-key keyset batches
+(``WHERE id > last ORDER BY id LIMIT n``) and encoded one line at a time, so
+memory stays constant whatever the export size. Keyset batches are used
+instead of a bare ``.iterator()`` because the MySQL driver buffers a whole
+result set client-side; each batch is still read with ``.iterator()``.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from payments.models import Transaction
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+# (column, values() lookup)
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+    ('type', 'transaction_type'),
+    ('status', 'status'),
+    ('amount', 'amount'),
+    ('payment_method', 'payment_method'),
+    ('gateway_transaction_id', 'transaction_id'),
+    ('session_id', 'session_id'),
+    ('session_start', 'session__start_time'),
+    ('subject', 'session__subject__name'),
+    ('student_id', 'student_id'),
+    ('student_email', 'student__user__email'),
+    ('educator_id', 'educator_id'),
+    ('educator_email', 'educator__user__email'),
+]
+
+CHUNK_SIZE = 2000
+
+
+def filter_transactions(queryset, start_date=None, end_date=None, statuses=None, transaction_types=None):
+    """Restrict ``queryset`` to an inclusive creation date range, statuses and types."""
+    tz = timezone.get_current_timezone()
+    if start_date:
+        queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(start_date, time.min), tz))
+    if end_date:
+        end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+        queryset = queryset.filter(created_at__lt=end)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    if transaction_types:
+        queryset = queryset.filter(transaction_type__in=transaction_types)
+    return queryset
+
+
+def iter_rows(queryset, columns=EXPORT_COLUMNS, chunk_size=CHUNK_SIZE):
+    """Yield one tuple per transaction, in id order, in keyset batches."""
+    lookups = [lookup for column, lookup in columns]
+    queryset = queryset.order_by('id').values_list(*lookups)
+    last_id = 0
+    while True:
+        batch = 0
+        for row in queryset.filter(id__gt=last_id)[:chunk_size].iterator(chunk_size=chunk_size):
+            batch += 1
+            last_id = row[0]
+            yield row
+        if batch < chunk_size:
+            return
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(rows, columns=EXPORT_COLUMNS):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([column for column, lookup in columns])
+    for row in rows:
+        yield writer.writerow([_format_value(value) for value in row])
+
+
+def encode_jsonl(rows, columns=EXPORT_COLUMNS):
+    names = [column for column, lookup in columns]
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def export_transactions(queryset, export_format, chunk_size=CHUNK_SIZE):
+    """Return a generator of text chunks exporting ``queryset`` as ``export_format``."""
+    rows = iter_rows(queryset, chunk_size=chunk_size)
+    return encode_csv(rows) if export_format == 'csv' else encode_jsonl(rows)
+
+
+def export_statement(educator, year, month, export_format, chunk_size=CHUNK_SIZE):
+    """Stream an educator's transactions for a month followed by its totals.
+
+    Totals are accumulated while rows stream, so the statement needs no
+    second pass over the data. In CSV they form trailing ``total_*`` rows; in
+    JSON Lines a final ``{"summary": ...}`` object.
+    """
+    start = datetime(year, month, 1).date()
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    queryset = filter_transactions(Transaction.objects.filter(educator=educator), start, end)
+
+    totals = {}
+    names = [column for column, lookup in EXPORT_COLUMNS]
+    amount_index, type_index, status_index = names.index('amount'), names.index('type'), names.index('status')
+
+    def counted(rows):
+        for row in rows:
+            key = f'{row[type_index]}_{row[status_index]}'
+            totals[key] = totals.get(key, Decimal('0.00')) + row[amount_index]
+            yield row
+
+    rows = counted(iter_rows(queryset, chunk_size=chunk_size))
+    if export_format == 'csv':
+        yield from encode_csv(rows)
+        writer = csv.writer(_Echo())
+        for key, amount in sorted(totals.items()):
+            yield writer.writerow([f'total_{key}', amount])
+        yield writer.writerow(['net_earnings', totals.get('payment_completed', Decimal('0.00'))])
+    else:
+        yield from encode_jsonl(rows)
+        summary = {
+            'period': f'{year:04d}-{month:02d}',
+            'totals': totals,
+            # Refunded payments leave 'completed', so completed payments are what was earned
+            'net_earnings': totals.get('payment_completed', Decimal('0.00')),
+        }
+        yield json.dumps({'summary': summary}, cls=DjangoJSONEncoder) + '\n'
@@ -0,0 +1,69 @@
+"""Payment gateway adapters.
+
+The configured adapter (``settings.PAYMENT_GATEWAY``) is called by the payment
+workers. Every charge carries the transaction's idempotency key, and adapters
+must guarantee that charging the same key twice returns the original result
+instead of charging again; that is what makes worker retries safe.
+"""
+import threading
+import uuid
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class GatewayError(Exception):
+    """Transient gateway failure (timeout, 5xx); the charge may be retried."""
+
+
+@dataclass(frozen=True)
+class ChargeResult:
+    success: bool
+    reference: str = ''
+    error: str = ''
+
+
+class PaymentGateway:
+    """Base class for payment gateway adapters."""
+
+    def charge(self, idempotency_key, amount, payment_method, description=''):
+        """Charge ``amount`` and return a ``ChargeResult``; raise ``GatewayError`` to retry."""
+        raise NotImplementedError
+
+
+class FakeGateway(PaymentGateway):
+    """In-process gateway for development and tests.
+
+    Payment methods starting with ``decline`` are refused and ``error`` raises
+    a transient ``GatewayError``. Charges are remembered by idempotency key.
+    """
+
+    def __init__(self):
+        self.charges = {}
+        self._lock = threading.Lock()
+
+    def charge(self, idempotency_key, amount, payment_method, description=''):
+        if payment_method.startswith('error'):
+            raise GatewayError("Gateway unavailable.")
+        with self._lock:
+            if idempotency_key not in self.charges:
+                if payment_method.startswith('decline'):
+                    result = ChargeResult(success=False, error="Card declined.")
+                else:
+                    result = ChargeResult(success=True, reference=f'fake_{uuid.uuid4().hex}')
+                self.charges[idempotency_key] = (amount, result)
+            return self.charges[idempotency_key][1]
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Return the process-wide instance of the configured gateway adapter."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = import_string(getattr(settings, 'PAYMENT_GATEWAY', 'payments.services.gateways.FakeGateway'))()
+        return _gateway
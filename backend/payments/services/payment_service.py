@@ -0,0 +1,220 @@
+"""Asynchronous payment pipeline.
+
+A request only records a pending ``Transaction`` under the client's
+idempotency key. Payment workers then claim pending transactions one at a
+time, call the gateway adapter with the transaction's idempotency key and
+record the outcome; the session of a completed payment is then confirmed
+in a transaction of its own. Workers run either in an in-process thread pool
+(``PAYMENT_WORKERS`` > 0) or in the ``process_payments`` management command.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from payments.events import payment_processed
+from payments.models import Transaction
+from payments.services.gateways import ChargeResult, GatewayError, get_gateway
+from sessions.models import Session
+from sessions.services.state_service import TransitionConflict, TransitionError, transition_session
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+# A transaction left in 'processing' longer than this is assumed to belong to a dead worker
+STALE_AFTER = timedelta(minutes=5)
+
+
+class PaymentError(Exception):
+    """Raised when a payment cannot be created."""
+
+
+class IdempotencyKeyReused(PaymentError):
+    """Raised when an idempotency key is sent again for another session."""
+
+
+def create_payment(student, session_id, payment_method, idempotency_key):
+    """Record a pending payment for the student's session.
+
+    Returns ``(transaction, created)``. Repeating a request with the same
+    idempotency key returns the original transaction instead of a new one;
+    the same key for another session raises ``IdempotencyKeyReused``.
+    """
+    existing = Transaction.objects.filter(student=student, idempotency_key=idempotency_key).first()
+    if existing is not None:
+        return _replay(existing, session_id), False
+
+    try:
+        with db_transaction.atomic():
+            # Locking the session serializes its payments, so requests with
+            # different keys cannot both pass the check below
+            if Session.objects.select_for_update().only('pk').filter(id=session_id).first() is None:
+                raise PaymentError("Session not found.")
+            session = Session.objects.select_related('educator').with_cost().get(id=session_id)
+            if session.student_id != student.id:
+                raise PaymentError("You can only pay for your own sessions.")
+            if session.transactions.filter(
+                    transaction_type='payment', status__in=['pending', 'processing', 'completed']).exists():
+                raise PaymentError("This session has already been paid or a payment is in progress.")
+
+            transaction = Transaction.objects.create(
+                session=session,
+                student=student,
+                educator=session.educator,
+                amount=session.session_cost,
+                transaction_type='payment',
+                status='pending',
+                payment_method=payment_method,
+                idempotency_key=idempotency_key,
+            )
+    except IntegrityError:
+        # A concurrent request with the same key won the race
+        return _replay(Transaction.objects.get(student=student, idempotency_key=idempotency_key), session_id), False
+
+    db_transaction.on_commit(lambda: enqueue_payment(transaction.pk))
+    return transaction, True
+
+
+def _replay(transaction, session_id):
+    if transaction.session_id != session_id:
+        raise IdempotencyKeyReused("This idempotency key was already used for another session.")
+    return transaction
+
+
+def claim_transaction(transaction_id):
+    """Move a pending transaction to 'processing'; only one worker can succeed."""
+    return Transaction.objects.filter(
+        pk=transaction_id, transaction_type='payment', status='pending', attempts__lt=MAX_ATTEMPTS
+    ).update(status='processing', attempts=F('attempts') + 1, updated_at=timezone.now()) == 1
+
+
+def process_transaction(transaction_id, gateway=None):
+    """Charge a pending transaction and apply the outcome. Returns the final status."""
+    if not claim_transaction(transaction_id):
+        return None
+
+    transaction = Transaction.objects.get(pk=transaction_id)
+    gateway = gateway or get_gateway()
+    try:
+        result = gateway.charge(
+            idempotency_key=f'txn-{transaction.pk}-{transaction.idempotency_key}',
+            amount=transaction.amount,
+            payment_method=transaction.payment_method,
+            description=f'Session {transaction.session_id}',
+        )
+    except GatewayError as exc:
+        logger.warning("Payment %s attempt %s failed: %s", transaction_id, transaction.attempts, exc)
+        if transaction.attempts < MAX_ATTEMPTS:
+            # Safe to retry: the gateway deduplicates charges by idempotency key
+            Transaction.objects.filter(pk=transaction_id, status='processing').update(
+                status='pending', last_error=str(exc), updated_at=timezone.now()
+            )
+            return 'pending'
+        result = ChargeResult(success=False, error=str(exc))
+    return finish_transaction(transaction_id, result)
+
+
+def finish_transaction(transaction_id, result):
+    """Apply a final ``ChargeResult`` to a transaction still in 'processing'. Returns its status."""
+    with db_transaction.atomic():
+        transaction = Transaction.objects.select_for_update().get(pk=transaction_id)
+        if transaction.status != 'processing':
+            return transaction.status
+        transaction.status = 'completed' if result.success else 'failed'
+        transaction.transaction_id = result.reference or None
+        transaction.last_error = result.error
+        transaction.save(update_fields=['status', 'transaction_id', 'last_error', 'updated_at'])
+        payment_processed.send(sender=Transaction, transaction=transaction)
+
+    if result.success:
+        confirm_paid_session(transaction.session_id)
+    return transaction.status
+
+
+def confirm_paid_session(session_id):
+    """Confirm the session of a payment that completed.
+
+    Runs once the payment is committed: a session that cannot be confirmed
+    never rolls back a charge, and the re-reads after a lost race see the
+    concurrent change, which a REPEATABLE READ snapshot would hide.
+    """
+    session = Session.objects.only(
+        'id', 'status', 'version', 'educator_id', 'start_time', 'end_time'
+    ).get(pk=session_id)
+    try:
+        transition_session(session, 'confirmed')
+    except TransitionError:
+        # Canceled or completed meanwhile; the payment still stands
+        pass
+    except TransitionConflict:
+        logger.warning("Session %s kept changing and was not confirmed after its payment", session_id)
+
+
+def requeue_stale_transactions():
+    """Return transactions stuck in 'processing' by a dead worker to 'pending'.
+
+    Those that died on their last attempt could never be claimed again, so
+    they fail instead. Returns the number requeued.
+    """
+    stale = Transaction.objects.filter(
+        transaction_type='payment', status='processing', updated_at__lt=timezone.now() - STALE_AFTER
+    )
+    for transaction_id in stale.filter(attempts__gte=MAX_ATTEMPTS).values_list('id', flat=True):
+        finish_transaction(transaction_id, ChargeResult(
+            success=False, error="The worker stopped during the last attempt."
+        ))
+    return stale.filter(attempts__lt=MAX_ATTEMPTS).update(status='pending', updated_at=timezone.now())
+
+
+def process_pending_payments(limit=100, gateway=None):
+    """Process up to ``limit`` pending transactions, oldest first. Returns their ids."""
+    requeue_stale_transactions()
+    ids = list(Transaction.objects.filter(transaction_type='payment', status='pending', attempts__lt=MAX_ATTEMPTS)
+               .order_by('updated_at').values_list('id', flat=True)[:limit])
+    for transaction_id in ids:
+        process_transaction(transaction_id, gateway=gateway)
+    return ids
+
+
+class PaymentWorkerPool:
+    """Thread pool processing transactions outside of the request thread."""
+
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='payment-worker')
+
+    def submit(self, transaction_id):
+        return self.executor.submit(self._run, transaction_id)
+
+    @staticmethod
+    def _run(transaction_id):
+        try:
+            return process_transaction(transaction_id)
+        except Exception:
+            logger.exception("Payment worker failed on transaction %s", transaction_id)
+        finally:
+            close_old_connections()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def enqueue_payment(transaction_id):
+    """Hand a committed transaction to the in-process worker pool, if enabled.
+
+    With ``PAYMENT_WORKERS = 0`` transactions wait for the ``process_payments``
+    management command instead.
+    """
+    global _pool
+    workers = getattr(settings, 'PAYMENT_WORKERS', 4)
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = PaymentWorkerPool(workers)
+    return _pool.submit(transaction_id)
@@ -0,0 +1,109 @@
+"""Batched educator payouts.
+
+A payout run settles, for every educator with a verified payout account, the
+completed payments made before the run's cutoff that were not paid out yet:
+it writes one pending ``payout`` transaction per educator and marks the
+settled payments with the run, so a payment's payout is the run's payout to
+the same educator.
+
+Educators are processed in chunks ordered by id. Each chunk runs in its own
+database transaction that also advances the run's checkpoint, so memory is
+bounded by the chunk size and an interrupted run resumes after its last
+committed chunk. Runs are identified by a run id: starting a run id again
+resumes it, or returns it unchanged once completed, and a unique constraint
+on (run, educator) guarantees nobody is paid twice by one run. Settled
+payments are locked with ``SELECT ... FOR UPDATE`` and marked by id, so
+payments completed or refunded concurrently are either settled as read or
+left for the next run.
+"""
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from payments.models import PayoutAccount, PayoutRun, Transaction
+
+PAYOUT_CHUNK_SIZE = 1000
+# Payment ids per UPDATE marking payments as settled
+UPDATE_BATCH_SIZE = 5000
+
+
+def default_cutoff():
+    """Start of the current local day, so a daily run settles whole days."""
+    return timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def get_or_create_run(run_id=None, cutoff=None):
+    """Return the run with ``run_id``, creating it with ``cutoff`` if needed.
+
+    The run id defaults to one derived from the cutoff date, so repeating a
+    scheduled run on the same day resumes the same run. An existing run
+    keeps its original cutoff.
+    """
+    cutoff = cutoff or default_cutoff()
+    run_id = run_id or f'payout-{timezone.localtime(cutoff):%Y-%m-%d}'
+    run, created = PayoutRun.objects.get_or_create(run_id=run_id, defaults={'cutoff': cutoff})
+    return run
+
+
+def unpaid_payments(cutoff):
+    return Transaction.objects.filter(
+        transaction_type='payment', status='completed', settled_run__isnull=True, updated_at__lt=cutoff
+    )
+
+
+def run_payouts(run_id=None, cutoff=None, chunk_size=PAYOUT_CHUNK_SIZE, max_chunks=None):
+    """Run (or resume) a payout run to completion and return it.
+
+    ``max_chunks`` stops after that many chunks, leaving the run to be
+    resumed later.
+    """
+    run = get_or_create_run(run_id, cutoff)
+    chunks = 0
+    while run.status != 'completed' and (max_chunks is None or chunks < max_chunks):
+        run = process_chunk(run.pk, chunk_size)
+        chunks += 1
+    return run
+
+
+def process_chunk(run_pk, chunk_size=PAYOUT_CHUNK_SIZE):
+    """Pay the next ``chunk_size`` educators of a run and advance its checkpoint."""
+    with db_transaction.atomic():
+        # Serializes processes resuming the same run; the checkpoint is read under the lock
+        run = PayoutRun.objects.select_for_update().get(pk=run_pk)
+        if run.status == 'completed':
+            return run
+
+        educator_ids = list(
+            PayoutAccount.objects.filter(is_verified=True, educator_id__gt=run.last_educator_id)
+            .order_by('educator_id').values_list('educator_id', flat=True)[:chunk_size]
+        )
+        if not educator_ids:
+            run.status = 'completed'
+            run.finished_at = timezone.now()
+            run.save(update_fields=['status', 'finished_at', 'updated_at'])
+            return run
+
+        payments = list(
+            unpaid_payments(run.cutoff).select_for_update().filter(educator_id__in=educator_ids)
+            .order_by('id').values_list('id', 'educator_id', 'amount')
+        )
+        totals = {}
+        for pk, educator_id, amount in payments:
+            totals[educator_id] = totals.get(educator_id, Decimal('0.00')) + amount
+
+        Transaction.objects.bulk_create([
+            Transaction(payout_run=run, educator_id=educator_id, amount=amount,
+                        transaction_type='payout', status='pending')
+            for educator_id, amount in totals.items()
+        ])
+        for start in range(0, len(payments), UPDATE_BATCH_SIZE):
+            batch = [pk for pk, educator_id, amount in payments[start:start + UPDATE_BATCH_SIZE]]
+            Transaction.objects.filter(id__in=batch).update(settled_run=run)
+
+        run.last_educator_id = educator_ids[-1]
+        run.payout_count += len(totals)
+        run.payment_count += len(payments)
+        run.total_amount += sum(totals.values(), Decimal('0.00'))
+        run.save(update_fields=['last_educator_id', 'payout_count', 'payment_count', 'total_amount', 'updated_at'])
+    return run
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from payments.models import Transaction
+from users.services.stats_service import record_earnings
+
+
+def _counts_as_earnings(transaction_type, status):
+    return transaction_type == 'payment' and status == 'completed'
+
+
+@receiver(post_save, sender=Transaction)
+def update_stats_on_transaction_save(sender, instance, created, **kwargs):
+    """Add or remove earnings when a payment enters or leaves the 'completed' status."""
+    was_counted = not created and _counts_as_earnings(
+        instance.transaction_type, getattr(instance, '_loaded_status', None)
+    )
+    is_counted = _counts_as_earnings(instance.transaction_type, instance.status)
+    if was_counted != is_counted:
+        record_earnings(instance.educator_id, instance.amount if is_counted else -instance.amount)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Transaction)
+def update_stats_on_transaction_delete(sender, instance, **kwargs):
+    if _counts_as_earnings(instance.transaction_type, getattr(instance, '_loaded_status', instance.status)):
+        record_earnings(instance.educator_id, -instance.amount)
@@ -1,3 +1,452 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from decimal import Decimal
+from unittest import mock
+
+from datetime import datetime, timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from common.testing import QueryCountMixin, make_educator, make_session, make_student, make_subject
+from payments.models import PayoutAccount, Transaction
+from payments.services.export_service import export_transactions
+from payments.services.payout_service import run_payouts
+from payments.services.gateways import FakeGateway
+from payments.services.payment_service import (
+    MAX_ATTEMPTS, STALE_AFTER, PaymentWorkerPool, claim_transaction, create_payment,
+    process_pending_payments, process_transaction,
+)
+from sessions.models import Session
+from sessions.services.state_service import TransitionConflict, transition_session
+
+
+class TransactionQueryCountTests(QueryCountMixin, TestCase):
+    """The number of queries must not grow with the number of transactions returned."""
+
+    def add_transactions(self, count):
+        transactions = []
+        for i in range(count):
+            educator = make_educator(subjects=[self.subject, make_subject()])
+            session = make_session(self.student, educator, self.subject)
+            transactions.append(Transaction.objects.create(
+                session=session,
+                student=self.student,
+                educator=educator,
+                amount=Decimal('30.00'),
+                transaction_type='payment',
+                status='completed',
+            ))
+        return transactions
+
+    def test_transaction_list_query_count_is_constant(self):
+        url = reverse('payments:transaction_list')
+        self.add_transactions(1)
+        baseline = self.count_queries(url)
+        self.add_transactions(9)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_transaction_detail_query_count(self):
+        transaction = self.add_transactions(1)[0]
+        url = reverse('payments:transaction_detail', args=[transaction.pk])
+        # Transaction (with every to-one relation joined), student favorite
+        # subjects, educator subjects and the same two for the nested session.
+        self.assertEqual(self.count_queries(url), 5)
+
+    def test_transaction_list_pages(self):
+        self.add_transactions(7)
+        url = reverse('payments:transaction_list') + '?page_size=3'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            seen.extend(transaction['id'] for transaction in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_compact_transaction_list(self):
+        self.add_transactions(3)
+        url = reverse('payments:transaction_list')
+        full = self.client.get(url).json()['results']
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, {'view': 'compact'})
+        self.assertEqual(len(context), 1)
+        compact = response.json()
+        self.assertEqual([row['id'] for row in compact['results']], [row['id'] for row in full])
+        self.assertEqual(len(compact['included']['students']), 1)
+        self.assertEqual(len(compact['included']['educators']), 3)
+        self.assertEqual(len(compact['included']['subjects']), 1)
+        row, expected = compact['results'][0], full[0]
+        self.assertEqual(row['amount'], expected['amount'])
+        self.assertEqual(compact['included']['sessions'][str(row['session'])]['start_time'],
+                         expected['session']['start_time'])
+
+
+@override_settings(PAYMENT_WORKERS=0)
+class PaymentPipelineTests(TestCase):
+    """Asynchronous, idempotent payment processing."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[cls.subject], hourly_rate=Decimal('40.00'))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+        self.session = make_session(self.student, self.educator, self.subject, minutes=90)
+        self.gateway = FakeGateway()
+
+    def pay(self, key='key-1', payment_method='card', **extra):
+        return self.client.post(reverse('payments:payment_create'), {
+            'session_id': self.session.pk, 'payment_method': payment_method, 'idempotency_key': key,
+        }, **extra)
+
+    def test_request_returns_accepted_pending_transaction(self):
+        response = self.pay()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+        transaction = Transaction.objects.get(pk=response.data['id'])
+        self.assertEqual(transaction.amount, Decimal('60.00'))
+        self.assertEqual(transaction.educator, self.educator)
+
+        status_response = self.client.get(response.data['status_url'])
+        self.assertEqual(status_response.data['status'], 'pending')
+
+    def test_worker_completes_payment_and_confirms_session(self):
+        transaction_id = self.pay().data['id']
+        self.assertEqual(process_pending_payments(gateway=self.gateway), [transaction_id])
+
+        response = self.client.get(reverse('payments:payment_status', args=[transaction_id]))
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertEqual(response.data['session_status'], 'confirmed')
+        self.assertTrue(response.data['transaction_id'].startswith('fake_'))
+
+    def test_same_idempotency_key_returns_same_transaction(self):
+        first = self.pay()
+        second = self.pay()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['id'], first.data['id'])
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_idempotency_key_reused_for_another_session_is_rejected(self):
+        first = self.pay()
+        other = make_session(self.student, self.educator, self.subject, start_time=self.session.end_time)
+        response = self.client.post(reverse('payments:payment_create'), {
+            'session_id': other.pk, 'payment_method': 'card', 'idempotency_key': 'key-1',
+        })
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Transaction.objects.get().pk, first.data['id'])
+
+    def test_idempotency_key_header(self):
+        response = self.client.post(reverse('payments:payment_create'), {
+            'session_id': self.session.pk, 'payment_method': 'card',
+        }, HTTP_IDEMPOTENCY_KEY='header-key')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Transaction.objects.get().idempotency_key, 'header-key')
+
+    def test_missing_idempotency_key_is_rejected(self):
+        response = self.client.post(reverse('payments:payment_create'), {
+            'session_id': self.session.pk, 'payment_method': 'card',
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_second_payment_for_session_is_rejected(self):
+        self.pay(key='key-1')
+        self.assertEqual(self.pay(key='key-2').status_code, 400)
+
+    def test_declined_payment_fails_and_keeps_session_pending(self):
+        transaction_id = self.pay(payment_method='declined-card').data['id']
+        process_pending_payments(gateway=self.gateway)
+        self.assertEqual(Transaction.objects.get(pk=transaction_id).status, 'failed')
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.status, 'pending')
+
+    def test_concurrent_status_change_keeps_the_payment(self):
+        transaction_id = self.pay().data['id']
+        session = self.session
+
+        def cancel_first(stale_session, status):
+            # The educator cancels after the worker read the session
+            Session.objects.filter(pk=session.pk).update(status='canceled', version=F('version') + 1)
+            return transition_session(stale_session, status)
+
+        with mock.patch('payments.services.payment_service.transition_session', cancel_first):
+            self.assertEqual(process_transaction(transaction_id, gateway=self.gateway), 'completed')
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'canceled')
+
+        other = make_session(self.student, self.educator, self.subject, start_time=session.end_time)
+        transaction, created = create_payment(self.student, other.pk, 'card', 'key-2')
+        with mock.patch('payments.services.payment_service.transition_session',
+                        side_effect=TransitionConflict("The session kept changing; try again.")):
+            with self.assertLogs('payments.services.payment_service', 'WARNING'):
+                self.assertEqual(process_transaction(transaction.pk, gateway=self.gateway), 'completed')
+        self.assertEqual(Transaction.objects.get(pk=transaction.pk).status, 'completed')
+
+    def test_transient_errors_are_retried_then_fail(self):
+        transaction_id = self.pay(payment_method='error').data['id']
+        with self.assertLogs('payments.services.payment_service', 'WARNING'):
+            for attempt in range(MAX_ATTEMPTS - 1):
+                self.assertEqual(process_transaction(transaction_id, gateway=self.gateway), 'pending')
+            self.assertEqual(process_transaction(transaction_id, gateway=self.gateway), 'failed')
+        self.assertIsNone(process_transaction(transaction_id, gateway=self.gateway))
+        self.assertEqual(Transaction.objects.get(pk=transaction_id).attempts, MAX_ATTEMPTS)
+
+    def test_only_one_worker_claims_a_transaction(self):
+        transaction_id = self.pay().data['id']
+        self.assertTrue(claim_transaction(transaction_id))
+        self.assertFalse(claim_transaction(transaction_id))
+        self.assertIsNone(process_transaction(transaction_id, gateway=self.gateway))
+
+    def test_retry_after_worker_crash_does_not_double_charge(self):
+        transaction_id = self.pay().data['id']
+        gateway = self.gateway
+
+        class CrashAfterCharge(FakeGateway):
+            def charge(self, *args, **kwargs):
+                gateway.charge(*args, **kwargs)
+                raise RuntimeError("worker died")
+
+        with self.assertRaises(RuntimeError):
+            process_transaction(transaction_id, gateway=CrashAfterCharge())
+        Transaction.objects.filter(pk=transaction_id).update(
+            updated_at=timezone.now() - STALE_AFTER - timedelta(seconds=1)
+        )
+        process_pending_payments(gateway=gateway)
+
+        transaction = Transaction.objects.get(pk=transaction_id)
+        self.assertEqual(transaction.status, 'completed')
+        self.assertEqual(len(gateway.charges), 1)
+        self.assertEqual(transaction.transaction_id, next(iter(gateway.charges.values()))[1].reference)
+
+    def test_worker_crash_on_last_attempt_fails_the_payment(self):
+        transaction_id = self.pay().data['id']
+        Transaction.objects.filter(pk=transaction_id).update(
+            status='processing', attempts=MAX_ATTEMPTS,
+            updated_at=timezone.now() - STALE_AFTER - timedelta(seconds=1)
+        )
+        self.assertEqual(process_pending_payments(gateway=self.gateway), [])
+
+        transaction = Transaction.objects.get(pk=transaction_id)
+        self.assertEqual(transaction.status, 'failed')
+        self.assertEqual(transaction.last_error, "The worker stopped during the last attempt.")
+        self.assertEqual(self.gateway.charges, {})
+        # The session can be paid again
+        self.assertEqual(self.pay(key='key-2').status_code, 202)
+
+
+@override_settings(OUTBOX={'IN_PROCESS': False})
+class PaymentWorkerPoolTests(TransactionTestCase):
+
+    def test_pool_processes_committed_payment(self):
+        subject = make_subject()
+        student = make_student()
+        session = make_session(student, make_educator(subjects=[subject]), subject)
+        pool = PaymentWorkerPool(workers=2)
+        with override_settings(PAYMENT_WORKERS=0):
+            transaction, created = create_payment(student, session.pk, 'card', 'pool-key')
+        self.assertEqual(pool.submit(transaction.pk).result(timeout=10), 'completed')
+        session.refresh_from_db()
+        self.assertEqual(session.status, 'confirmed')
+
+
+class TransactionExportTests(TestCase):
+    """Streaming CSV / JSON Lines exports and monthly statements."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[cls.subject])
+        cls.other = make_educator(subjects=[cls.subject])
+        cls.may = [
+            cls.add(cls.educator, '30.00', 'completed', datetime(2025, 5, 3, 10)),
+            cls.add(cls.educator, '45.50', 'completed', datetime(2025, 5, 31, 23)),
+            cls.add(cls.educator, '20.00', 'refunded', datetime(2025, 5, 12, 9)),
+        ]
+        cls.june = cls.add(cls.educator, '60.00', 'completed', datetime(2025, 6, 1, 8))
+        cls.foreign = cls.add(cls.other, '99.00', 'completed', datetime(2025, 5, 4, 10))
+
+    @classmethod
+    def add(cls, educator, amount, status, created_at):
+        transaction = Transaction.objects.create(
+            session=make_session(cls.student, educator, cls.subject, start_time=timezone.make_aware(created_at)),
+            student=cls.student, educator=educator, amount=Decimal(amount),
+            transaction_type='payment', status=status,
+        )
+        Transaction.objects.filter(pk=transaction.pk).update(created_at=timezone.make_aware(created_at))
+        return transaction
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.educator.user)
+
+    def export(self, export_format='csv', **params):
+        response = self.client.get(reverse('payments:transaction_export', args=[export_format]), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_lists_own_transactions(self):
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+        self.assertEqual([int(row['id']) for row in rows],
+                         sorted(t.pk for t in [*self.may, self.june]))
+        self.assertEqual(rows[0]['amount'], '30.00')
+        self.assertEqual(rows[0]['educator_email'], self.educator.user.email)
+        self.assertEqual(rows[0]['subject'], self.subject.name)
+
+    def test_filters_by_date_range_and_status(self):
+        content = self.export('jsonl', start='2025-05-01', end='2025-05-31', status='completed')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [t.pk for t in self.may[:2]])
+        self.assertEqual(rows[1]['amount'], '45.50')
+
+    def test_invalid_filters_and_format_are_rejected(self):
+        url = reverse('payments:transaction_export', args=['csv'])
+        self.assertEqual(self.client.get(url, {'status': 'lost'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2025-06-01', 'end': '2025-05-01'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('payments:transaction_export', args=['xml'])).status_code, 404)
+
+    def test_staff_export_the_whole_ledger(self):
+        self.educator.user.is_staff = True
+        self.educator.user.save()
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+        self.assertIn(str(self.foreign.pk), [row['id'] for row in rows])
+
+    def test_export_reads_in_keyset_batches(self):
+        queryset = Transaction.objects.all()
+        with CaptureQueriesContext(connection) as context:
+            chunks = list(export_transactions(queryset, 'csv', chunk_size=2))
+        self.assertEqual(len(chunks), 1 + 5)
+        # Five rows in batches of two, plus the final short batch
+        self.assertEqual(len(context), 3)
+        self.assertTrue(all('LIMIT 2' in query['sql'] for query in context.captured_queries))
+
+    def test_monthly_statement_totals(self):
+        response = self.client.get(reverse('payments:educator_statement', args=[2025, 5, 'csv']))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('statement-2025-05.csv', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 1 + 3 + 3)
+        self.assertEqual(rows[-3:], [
+            ['total_payment_completed', '75.50'],
+            ['total_payment_refunded', '20.00'],
+            ['net_earnings', '75.50'],
+        ])
+
+    def test_monthly_statement_jsonl_summary(self):
+        response = self.client.get(reverse('payments:educator_statement', args=[2025, 6, 'jsonl']))
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(lines[0]['id'], self.june.pk)
+        self.assertEqual(lines[-1]['summary']['net_earnings'], '60.00')
+
+    def test_statement_requires_educator(self):
+        self.client.force_authenticate(self.student.user)
+        response = self.client.get(reverse('payments:educator_statement', args=[2025, 5, 'csv']))
+        self.assertEqual(response.status_code, 403)
+
+    def test_management_command_exports_filtered_ledger(self):
+        out = io.StringIO()
+        call_command('export_transactions', '--format', 'jsonl', '--status', 'completed',
+                     '--educator', str(self.other.pk), stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.foreign.pk])
+
+
+class PayoutRunTests(TestCase):
+    """Batched, resumable payout runs."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.student = make_student()
+        cls.educators = [make_educator(subjects=[cls.subject]) for i in range(3)]
+        for educator in cls.educators:
+            PayoutAccount.objects.create(educator=educator, account_name='Name', account_number='123',
+                                         bank_name='Bank', is_verified=True)
+        cls.unverified = make_educator(subjects=[cls.subject])
+        PayoutAccount.objects.create(educator=cls.unverified, account_name='Name', account_number='456',
+                                     bank_name='Bank')
+
+    def pay(self, educator, amount, status='completed'):
+        return Transaction.objects.create(
+            session=make_session(self.student, educator, self.subject,
+                                 start_time=timezone.now() + timedelta(days=Transaction.objects.count() + 1)),
+            student=self.student, educator=educator, amount=Decimal(amount),
+            transaction_type='payment', status=status,
+        )
+
+    def payouts(self, run):
+        return {payout.educator_id: payout.amount for payout in run.payouts.all()}
+
+    def setUp(self):
+        first, second, third = self.educators
+        self.paid = [self.pay(first, '30.00'), self.pay(first, '12.50'), self.pay(third, '40.00')]
+        self.pay(second, '20.00', status='pending')
+        self.pay(third, '15.00', status='refunded')
+        self.pay(self.unverified, '99.00')
+        self.cutoff = timezone.now() + timedelta(minutes=1)
+
+    def test_run_pays_unpaid_completed_payments_per_verified_educator(self):
+        first, second, third = self.educators
+        run = run_payouts('run-1', cutoff=self.cutoff)
+        self.assertEqual(run.status, 'completed')
+        self.assertEqual(self.payouts(run), {first.pk: Decimal('42.50'), third.pk: Decimal('40.00')})
+        self.assertEqual((run.payout_count, run.payment_count, run.total_amount), (2, 3, Decimal('82.50')))
+        self.assertEqual(set(run.settled_payments.all()), set(self.paid))
+        payout = run.payouts.get(educator=first)
+        self.assertEqual((payout.transaction_type, payout.status, payout.session), ('payout', 'pending', None))
+
+    def test_repeating_a_run_id_does_not_pay_twice(self):
+        run_payouts('run-1', cutoff=self.cutoff)
+        self.pay(self.educators[1], '25.00')
+        run = run_payouts('run-1', cutoff=self.cutoff + timedelta(hours=1))
+        self.assertEqual(run.payout_count, 2)
+        self.assertEqual(Transaction.objects.filter(transaction_type='payout').count(), 2)
+
+    def test_next_run_settles_only_new_payments(self):
+        run_payouts('run-1', cutoff=self.cutoff)
+        self.pay(self.educators[0], '25.00')
+        run = run_payouts('run-2', cutoff=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(self.payouts(run), {self.educators[0].pk: Decimal('25.00')})
+
+    def test_payments_after_the_cutoff_wait_for_the_next_run(self):
+        run = run_payouts('run-1', cutoff=self.paid[2].updated_at)
+        self.assertEqual(self.payouts(run), {self.educators[0].pk: Decimal('42.50')})
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        run = run_payouts('run-1', cutoff=self.cutoff, chunk_size=1, max_chunks=1)
+        self.assertEqual(run.status, 'running')
+        self.assertEqual(run.last_educator_id, self.educators[0].pk)
+        self.assertEqual(self.payouts(run), {self.educators[0].pk: Decimal('42.50')})
+
+        run = run_payouts('run-1', chunk_size=1)
+        self.assertEqual(run.status, 'completed')
+        self.assertEqual((run.payout_count, run.payment_count, run.total_amount), (2, 3, Decimal('82.50')))
+
+    def test_chunk_query_count_does_not_grow_with_payments(self):
+        def chunk_queries(run_id):
+            with CaptureQueriesContext(connection) as context:
+                run_payouts(run_id, cutoff=timezone.now() + timedelta(minutes=1), max_chunks=1)
+            return len(context)
+
+        baseline = chunk_queries('run-1')
+        for educator in self.educators:
+            for i in range(5):
+                self.pay(educator, '10.00')
+        self.assertEqual(chunk_queries('run-2'), baseline)
+
+    @override_settings(PAYMENT_WORKERS=0)
+    def test_payment_workers_ignore_pending_payouts(self):
+        run = run_payouts('run-1', cutoff=self.cutoff)
+        process_pending_payments(gateway=FakeGateway())
+        self.assertFalse(run.payouts.exclude(status='pending').exists())
 
-# Create your tests here.
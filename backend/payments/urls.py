@@ -1,7 +1,7 @@
 from django.urls import path
 from payments.api.views import (
-    TransactionListView, TransactionDetailView, PaymentCreateView,
-    PayoutAccountView, PayoutAccountCreateView
+    TransactionListView, AsyncTransactionListView, TransactionDetailView, PaymentCreateView, PaymentStatusView,
+    PayoutAccountView, PayoutAccountCreateView, TransactionExportView, EducatorStatementView
 )
 
 app_name = 'payments'
@@ -9,8 +9,13 @@ app_name = 'payments'
 urlpatterns = [
     # Transaction endpoints
     path('transactions/', TransactionListView.as_view(), name='transaction_list'),
+    path('transactions/async/', AsyncTransactionListView.as_view(), name='transaction_list_async'),
     path('transactions/<int:pk>/', TransactionDetailView.as_view(), name='transaction_detail'),
+    path('transactions/export/<str:export_format>/', TransactionExportView.as_view(), name='transaction_export'),
+    path('statements/<int:year>/<int:month>/<str:export_format>/', EducatorStatementView.as_view(),
+         name='educator_statement'),
     path('pay/', PaymentCreateView.as_view(), name='payment_create'),
+    path('pay/<int:pk>/status/', PaymentStatusView.as_view(), name='payment_status'),
     
     # Payout account endpoints
     path('payout-account/', PayoutAccountView.as_view(), name='payout_account'),
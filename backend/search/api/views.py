@@ -0,0 +1,54 @@
+from rest_framework import generics, permissions
+from rest_framework.response import Response
+
+from courses.models import Subject
+from search.serializers.search_serializers import (
+    EducatorSearchParamsSerializer, EducatorSearchResultSerializer,
+    SearchParamsSerializer, SubjectSearchResultSerializer
+)
+from search.services.search_service import search_educators, search_subjects
+from users.models import Educator
+
+class SearchView(generics.GenericAPIView):
+    """Base view running a ranked search and returning one page of hits in rank order."""
+    permission_classes = [permissions.IsAuthenticated]
+    params_serializer_class = SearchParamsSerializer
+    model = None
+    
+    def search(self, params):
+        raise NotImplementedError
+    
+    def get(self, request, *args, **kwargs):
+        params_serializer = self.params_serializer_class(data=request.query_params)
+        params_serializer.is_valid(raise_exception=True)
+        params = dict(params_serializer.validated_data)
+        
+        hits = self.search(params)
+        scores = dict(hits)
+        queryset = self.get_serializer_class().setup_eager_loading(self.model.objects.filter(pk__in=scores))
+        objects = sorted(queryset, key=lambda obj: -scores[obj.pk])
+        for obj in objects:
+            obj.search_score = round(scores[obj.pk], 4)
+        
+        next_offset = params['offset'] + params['limit'] if len(hits) == params['limit'] else None
+        return Response({
+            'results': self.get_serializer(objects, many=True).data,
+            'next_offset': next_offset,
+        })
+
+class EducatorSearchView(SearchView):
+    """API view to search verified educators by name, bio, degree and subjects."""
+    serializer_class = EducatorSearchResultSerializer
+    params_serializer_class = EducatorSearchParamsSerializer
+    model = Educator
+    
+    def search(self, params):
+        return search_educators(params.pop('q'), **params)
+
+class SubjectSearchView(SearchView):
+    """API view to search subjects by name and description."""
+    serializer_class = SubjectSearchResultSerializer
+    model = Subject
+    
+    def search(self, params):
+        return search_subjects(params.pop('q'), **params)
@@ -0,0 +1,45 @@
+"""Search backend interface.
+
+Backends rank document ids for a text query. Filters on educator attributes
+(subject, hourly rate, rating) are always evaluated by the database so they
+reflect current data; ``SearchBackend.search_educators`` does this by
+checking the best-ranked ids and, when the filters turn out to be
+selective, loading the whole filtered id set once. Backends able to rank
+inside the database override it with a single query.
+"""
+from itertools import islice
+
+# Ranked ids checked against the filters before loading the whole filtered id set
+FILTER_CHUNK_SIZE = 100
+
+
+class SearchBackend:
+
+    def update(self, kind, documents):
+        """Index or re-index ``{object_id: text}`` documents of ``kind`` ('educator' or 'subject')."""
+
+    def remove(self, kind, object_ids):
+        """Drop documents of ``kind`` from the index."""
+
+    def reset(self):
+        """Forget any in-process state; it is reloaded from the document tables."""
+
+    def rank(self, kind, query, within=None):
+        """Yield ``(object_id, score)`` pairs matching ``query``, best first.
+
+        ``within`` optionally restricts the result to a set of object ids.
+        """
+        raise NotImplementedError
+
+    def search(self, kind, query, queryset, limit, offset=0):
+        """Return the ``(object_id, score)`` page of ranked ids also present in ``queryset``."""
+        wanted = offset + limit
+        size = max(2 * wanted, FILTER_CHUNK_SIZE)
+        chunk = list(islice(self.rank(kind, query), size))
+        allowed = set(queryset.filter(pk__in=[pk for pk, score in chunk]).values_list('pk', flat=True))
+        results = [(pk, score) for pk, score in chunk if pk in allowed]
+        if len(results) < wanted and len(chunk) == size:
+            # Selective filters: rank only the allowed ids instead of walking every match
+            allowed = set(queryset.values_list('pk', flat=True))
+            results = list(islice(self.rank(kind, query, within=allowed), wanted))
+        return results[offset:wanted]
@@ -0,0 +1,172 @@
+"""Pure-Python inverted index ranked with BM25.
+
+Postings store each document's BM25 term weight precomputed against the
+average document length of the last full load, so a query only sums
+``idf * weight`` per posting; incremental updates reuse that average, which
+is exact enough for ranking until the next reload.
+
+Documents matching every query term rank first, like a quorum search; only
+those are scored up front, which keeps queries made of common words cheap.
+Documents matching some of the terms follow and are only scored when a
+caller reads past the first tier. Used for SQLite and tests. The index lives in the process: it is loaded from
+the document tables on first use and then updated incrementally by the
+search signals, so in multi-process deployments each worker only sees its
+own writes until it reloads; use the MySQL backend there.
+"""
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from operator import itemgetter
+
+from search.backends.base import SearchBackend
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Lowercase, strip accents and split ``text`` into words."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _WORD.findall(text)
+
+
+def ranked(scores, first=500):
+    """Yield ``(doc_id, score)`` best first, selecting the top ``first`` without a full sort."""
+    if len(scores) <= first:
+        yield from sorted(scores.items(), key=itemgetter(1), reverse=True)
+        return
+    yield from heapq.nlargest(first, scores.items(), key=itemgetter(1))
+    # Callers rarely page past the first batch; only then sort everything
+    yield from sorted(scores.items(), key=itemgetter(1), reverse=True)[first:]
+
+
+class InvertedIndex:
+    """Term -> {doc_id: BM25 term weight} postings."""
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, average_length=None):
+        self.postings = {}
+        self._terms = {}
+        self.average_length = average_length
+
+    def __len__(self):
+        return len(self._terms)
+
+    def add(self, doc_id, text):
+        self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        if self.average_length is None:
+            self.average_length = max(1, sum(terms.values()))
+        norm = self.k1 * (1 - self.b + self.b * sum(terms.values()) / self.average_length)
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = frequency * (self.k1 + 1) / (frequency + norm)
+        self._terms[doc_id] = tuple(terms)
+
+    def remove(self, doc_id):
+        for term in self._terms.pop(doc_id, ()):
+            postings = self.postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.postings[term]
+
+    def _weighted_postings(self, query):
+        total = len(self._terms)
+        weighted = []
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if postings:
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                weighted.append((idf, postings))
+        return weighted
+
+    def scores(self, query, all_terms=False, exclude=(), within=None):
+        """Return ``{doc_id: score}`` for documents matching any (or every) query term.
+
+        ``within`` restricts scoring to the given document ids and ``exclude``
+        drops ids from the result.
+        """
+        weighted = self._weighted_postings(query)
+        if not weighted or (all_terms and len(weighted) < len(set(tokenize(query)))):
+            return {}
+        if within is not None:
+            weighted = [(idf, {doc_id: postings[doc_id] for doc_id in within if doc_id in postings})
+                        for idf, postings in weighted]
+
+        if all_terms:
+            # Intersect from the shortest postings list so the working set only shrinks
+            weighted.sort(key=lambda item: len(item[1]))
+            idf, postings = weighted[0]
+            scores = {doc_id: idf * weight for doc_id, weight in postings.items()}
+            for idf, postings in weighted[1:]:
+                scores = {doc_id: score + idf * postings[doc_id]
+                          for doc_id, score in scores.items() if doc_id in postings}
+            return scores
+
+        scores = {}
+        for idf, postings in weighted:
+            get = scores.get
+            for doc_id, weight in postings.items():
+                scores[doc_id] = get(doc_id, 0) + idf * weight
+        for doc_id in exclude:
+            scores.pop(doc_id, None)
+        return scores
+
+
+class MemoryBackend(SearchBackend):
+
+    def __init__(self):
+        self._indexes = None
+        self._lock = threading.RLock()
+
+    def _load(self):
+        from search.models import EducatorDocument, SubjectDocument
+
+        indexes = {}
+        for kind, model, key in (('educator', EducatorDocument, 'educator_id'),
+                                 ('subject', SubjectDocument, 'subject_id')):
+            documents = [(object_id, tokenize(content)) for object_id, content
+                         in model.objects.values_list(key, 'content').iterator(chunk_size=5000)]
+            lengths = sum(len(terms) for object_id, terms in documents)
+            index = indexes[kind] = InvertedIndex(average_length=max(1, lengths / max(1, len(documents))))
+            for object_id, terms in documents:
+                index.add(object_id, ' '.join(terms))
+        return indexes
+
+    def _index(self, kind):
+        with self._lock:
+            if self._indexes is None:
+                self._indexes = self._load()
+            return self._indexes[kind]
+
+    def update(self, kind, documents):
+        with self._lock:
+            if self._indexes is None:
+                # Loading reads the freshly written documents anyway
+                return
+            for object_id, text in documents.items():
+                self._indexes[kind].add(object_id, text)
+
+    def remove(self, kind, object_ids):
+        with self._lock:
+            if self._indexes is None:
+                return
+            for object_id in object_ids:
+                self._indexes[kind].remove(object_id)
+
+    def reset(self):
+        with self._lock:
+            self._indexes = None
+
+    def rank(self, kind, query, within=None):
+        index = self._index(kind)
+        with self._lock:
+            best = index.scores(query, all_terms=True, within=within)
+        yield from ranked(best)
+        with self._lock:
+            rest = index.scores(query, exclude=best, within=within)
+        yield from ranked(rest)
@@ -0,0 +1,31 @@
+"""MySQL FULLTEXT backend.
+
+Ranks with ``MATCH ... AGAINST`` in natural language mode over the document
+tables (see migration 0002), filtering and paginating in the same query.
+The signals keep the document rows current, so there is no separate index
+to maintain.
+"""
+from django.db.models.expressions import RawSQL
+
+from search.backends.base import SearchBackend
+
+
+class MySQLFullTextBackend(SearchBackend):
+
+    def _documents(self, kind, query):
+        from search.models import EducatorDocument, SubjectDocument
+
+        model = EducatorDocument if kind == 'educator' else SubjectDocument
+        table = model._meta.db_table
+        score = RawSQL(f"MATCH({table}.content) AGAINST (%s IN NATURAL LANGUAGE MODE)", [query])
+        return model.objects.annotate(score=score).filter(score__gt=0).order_by('-score', 'pk')
+
+    def rank(self, kind, query, within=None):
+        documents = self._documents(kind, query)
+        if within is not None:
+            documents = documents.filter(pk__in=within)
+        return documents.values_list('pk', 'score')
+
+    def search(self, kind, query, queryset, limit, offset=0):
+        documents = self._documents(kind, query).filter(**{f'{kind}__in': queryset})
+        return list(documents.values_list('pk', 'score')[offset:offset + limit])
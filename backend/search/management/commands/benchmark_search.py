@@ -0,0 +1,95 @@
+import json
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from common.benchmarking import benchmark_database, measure
+from common.synthetic_data import generate_dataset
+from courses.models import Subject
+from search.backends.memory import MemoryBackend
+from search.services.search_service import rebuild_index, search_educators, search_subjects
+from users.services.stats_service import rebuild_stats
+
+User = get_user_model()
+
+TOPICS = [
+    'Calculus', 'Algebra', 'Geometry', 'Statistics', 'Probability', 'Physics', 'Chemistry', 'Biology',
+    'Astronomy', 'Economics', 'Accounting', 'Literature', 'Grammar', 'History', 'Geography', 'Philosophy',
+    'Psychology', 'Programming', 'Databases', 'Networking', 'French', 'Spanish', 'German', 'Japanese',
+    'Vietnamese', 'Music', 'Piano', 'Guitar', 'Drawing', 'Painting',
+]
+WORDS = [
+    'patient', 'experienced', 'exam', 'preparation', 'university', 'high', 'school', 'beginner', 'advanced',
+    'teacher', 'tutor', 'research', 'engineer', 'olympiad', 'homework', 'conversation', 'certified',
+    'lecturer', 'interactive', 'practical', 'friendly', 'structured', 'online', 'projects', 'theory',
+]
+QUERIES = ['calculus phd', 'patient piano teacher', 'statistics exam preparation', 'spanish conversation',
+           'programming databases engineer', 'olympiad physics']
+
+
+class Command(BaseCommand):
+    help = "Benchmark educator and subject search against a synthetic dataset in a throwaway database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--educators', type=int, default=100000)
+        parser.add_argument('--subjects', type=int, default=len(TOPICS) * 4)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--keepdb', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options['keepdb']):
+            results = self.run(options)
+        self.stdout.write(json.dumps(results, indent=2, default=str))
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        results = {'options': {k: options[k] for k in ('educators', 'subjects', 'iterations')},
+                   'database': connection.vendor}
+
+        started = time.perf_counter()
+        dataset = generate_dataset(subjects=options['subjects'], students=10, educators=options['educators'],
+                                   sessions=0, seed=options['seed'])
+        subjects = list(Subject.objects.order_by('id'))
+        for n, subject in enumerate(subjects):
+            topic = TOPICS[n % len(TOPICS)]
+            subject.name = f'{topic} {n // len(TOPICS) + 1}'
+            subject.description = f'{topic} course: ' + ' '.join(rng.sample(WORDS, 6))
+        Subject.objects.bulk_update(subjects, ['name', 'description'], batch_size=1000)
+        users = list(User.objects.filter(user_type='educator').only('id'))
+        for user in users:
+            user.bio = ' '.join(rng.sample(WORDS, 8))
+        User.objects.bulk_update(users, ['bio'], batch_size=5000)
+        rebuild_stats(dataset['educators'])
+        results['generate_seconds'] = round(time.perf_counter() - started, 2)
+
+        started = time.perf_counter()
+        results['documents'] = rebuild_index()
+        results['index_documents_seconds'] = round(time.perf_counter() - started, 2)
+
+        backends = {'memory': MemoryBackend()}
+        started = time.perf_counter()
+        next(iter(backends['memory'].rank('educator', 'warm up')), None)
+        results['memory_load_seconds'] = round(time.perf_counter() - started, 2)
+        if connection.vendor == 'mysql':
+            from search.backends.mysql import MySQLFullTextBackend
+            backends['mysql'] = MySQLFullTextBackend()
+
+        subject_ids = dataset['subjects']
+        for name, backend in backends.items():
+            results[name] = {
+                'educators': measure(lambda: search_educators(rng.choice(QUERIES), backend=backend),
+                                     options['iterations']),
+                'educators_filtered': measure(lambda: search_educators(
+                    rng.choice(QUERIES), subject_id=rng.choice(subject_ids), min_rate=30, max_rate=60,
+                    min_rating=0, backend=backend,
+                ), options['iterations']),
+                'educators_page_5': measure(lambda: search_educators(rng.choice(QUERIES), offset=80,
+                                                                     backend=backend), options['iterations']),
+                'subjects': measure(lambda: search_subjects(rng.choice(QUERIES), backend=backend),
+                                    options['iterations']),
+            }
+        return results
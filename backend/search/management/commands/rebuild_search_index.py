@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from search.services.search_service import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Regenerate the educator and subject search documents from the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} document(s)."))
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+FULLTEXT_INDEXES = (
+    ('search_educatordocument', 'educatordoc_content_ft'),
+    ('search_subjectdocument', 'subjectdoc_content_ft'),
+)
+
+
+def add_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for table, name in FULLTEXT_INDEXES:
+        schema_editor.execute(f'ALTER TABLE {table} ADD FULLTEXT INDEX {name} (content)')
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for table, name in FULLTEXT_INDEXES:
+        schema_editor.execute(f'ALTER TABLE {table} DROP INDEX {name}')
+
+
+def populate_documents(apps, schema_editor):
+    Subject = apps.get_model('courses', 'Subject')
+    Educator = apps.get_model('users', 'Educator')
+    SubjectDocument = apps.get_model('search', 'SubjectDocument')
+    EducatorDocument = apps.get_model('search', 'EducatorDocument')
+
+    SubjectDocument.objects.bulk_create(
+        [SubjectDocument(subject_id=subject.id, content=f'{subject.name} {subject.description}'.strip())
+         for subject in Subject.objects.all()],
+        batch_size=1000,
+    )
+    documents = []
+    for educator in Educator.objects.select_related('user').prefetch_related('subjects').iterator(chunk_size=1000):
+        parts = [educator.user.first_name, educator.user.last_name, educator.degree, educator.user.bio or '']
+        for subject in educator.subjects.all():
+            parts.extend([subject.name, subject.description])
+        documents.append(EducatorDocument(educator_id=educator.id,
+                                          content=' '.join(part for part in parts if part)))
+    EducatorDocument.objects.bulk_create(documents, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('search', '0001_initial'),
+        ('users', '0002_educator_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_indexes, drop_fulltext_indexes),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
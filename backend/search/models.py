@@ -0,0 +1,26 @@
+from django.db import models
+from courses.models import Subject
+from users.models import Educator
+
+class EducatorDocument(models.Model):
+    """Searchable text of an educator: name, bio, degree and the subjects taught.
+    
+    Kept in sync by signals; on MySQL ``content`` carries a FULLTEXT index.
+    """
+    educator = models.OneToOneField(Educator, on_delete=models.CASCADE, primary_key=True,
+                                    related_name='search_document')
+    content = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Search document for {self.educator}"
+
+class SubjectDocument(models.Model):
+    """Searchable text of a subject: name and description."""
+    subject = models.OneToOneField(Subject, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='search_document')
+    content = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Search document for {self.subject}"
@@ -0,0 +1,30 @@
+from rest_framework import serializers
+from courses.serializers.subject_serializers import SubjectSerializer
+from users.serializers.user_serializers import EducatorSerializer
+
+class SearchParamsSerializer(serializers.Serializer):
+    """Query parameters shared by the search endpoints."""
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    offset = serializers.IntegerField(min_value=0, max_value=10000, default=0)
+
+class EducatorSearchParamsSerializer(SearchParamsSerializer):
+    """Query parameters for searching educators."""
+    subject_id = serializers.IntegerField(required=False)
+    min_rate = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_rate = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    min_rating = serializers.FloatField(min_value=0, max_value=5, required=False)
+
+class EducatorSearchResultSerializer(EducatorSerializer):
+    """Educator search hit with its relevance score."""
+    score = serializers.FloatField(source='search_score', read_only=True)
+    
+    class Meta(EducatorSerializer.Meta):
+        fields = EducatorSerializer.Meta.fields + ['score']
+
+class SubjectSearchResultSerializer(SubjectSerializer):
+    """Subject search hit with its relevance score."""
+    score = serializers.FloatField(source='search_score', read_only=True)
+    
+    class Meta(SubjectSerializer.Meta):
+        fields = SubjectSerializer.Meta.fields + ['score']
@@ -0,0 +1,126 @@
+"""Building search documents and querying the configured backend.
+
+``settings.SEARCH_BACKEND`` is a dotted path to a ``SearchBackend`` class; by
+default MySQL databases use FULLTEXT and everything else the in-process
+inverted index.
+"""
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from courses.models import Subject
+from search.models import EducatorDocument, SubjectDocument
+from users.models import Educator
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = getattr(settings, 'SEARCH_BACKEND', None)
+            if path is None:
+                path = ('search.backends.mysql.MySQLFullTextBackend' if connection.vendor == 'mysql'
+                        else 'search.backends.memory.MemoryBackend')
+            _backend = import_string(path)()
+        return _backend
+
+
+def educator_documents(educator_ids):
+    """Return ``{educator_id: text}`` for the given educators."""
+    documents = {}
+    educators = (Educator.objects.filter(id__in=educator_ids)
+                 .select_related('user').prefetch_related('subjects'))
+    for educator in educators:
+        parts = [educator.user.first_name, educator.user.last_name, educator.degree, educator.user.bio or '']
+        for subject in educator.subjects.all():
+            parts.extend([subject.name, subject.description])
+        documents[educator.id] = ' '.join(part for part in parts if part)
+    return documents
+
+
+def subject_documents(subject_ids):
+    """Return ``{subject_id: text}`` for the given subjects."""
+    return {
+        pk: f'{name} {description}'.strip()
+        for pk, name, description in Subject.objects.filter(id__in=subject_ids)
+        .values_list('id', 'name', 'description')
+    }
+
+
+def _save_documents(model, key, documents):
+    model.objects.bulk_create(
+        [model(**{key: object_id}, content=content) for object_id, content in documents.items()],
+        update_conflicts=True,
+        # MySQL upserts on any unique key and rejects an explicit target
+        unique_fields=[key] if connection.features.supports_update_conflicts_with_target else None,
+        update_fields=['content', 'updated_at'],
+    )
+
+
+def index_educators(educator_ids):
+    educator_ids = list(educator_ids)
+    documents = educator_documents(educator_ids)
+    _save_documents(EducatorDocument, 'educator_id', documents)
+    get_backend().update('educator', documents)
+    missing = set(educator_ids) - set(documents)
+    if missing:
+        get_backend().remove('educator', missing)
+
+
+def index_subjects(subject_ids, with_educators=True):
+    """Re-index subjects and, since their text is part of them, their educators."""
+    subject_ids = list(subject_ids)
+    documents = subject_documents(subject_ids)
+    _save_documents(SubjectDocument, 'subject_id', documents)
+    get_backend().update('subject', documents)
+    if with_educators:
+        educator_ids = Educator.subjects.through.objects.filter(subject_id__in=subject_ids) \
+            .values_list('educator_id', flat=True).distinct()
+        index_educators(educator_ids)
+
+
+def remove_documents(kind, object_ids):
+    # Document rows go away with the object through the cascade
+    get_backend().remove(kind, object_ids)
+
+
+def rebuild_index(batch_size=1000):
+    """Regenerate every document from the source tables. Returns the number indexed."""
+    indexed = 0
+    subject_ids = list(Subject.objects.order_by('id').values_list('id', flat=True))
+    for offset in range(0, len(subject_ids), batch_size):
+        batch = subject_ids[offset:offset + batch_size]
+        _save_documents(SubjectDocument, 'subject_id', subject_documents(batch))
+        indexed += len(batch)
+    educator_ids = list(Educator.objects.order_by('id').values_list('id', flat=True))
+    for offset in range(0, len(educator_ids), batch_size):
+        batch = educator_ids[offset:offset + batch_size]
+        _save_documents(EducatorDocument, 'educator_id', educator_documents(batch))
+        indexed += len(batch)
+    get_backend().reset()
+    return indexed
+
+
+def search_educators(query, subject_id=None, min_rate=None, max_rate=None, min_rating=None,
+                     limit=20, offset=0, backend=None):
+    """Return ranked ``(educator_id, score)`` pairs of verified educators matching ``query``."""
+    queryset = Educator.objects.filter(verification_status='verified')
+    if subject_id is not None:
+        queryset = queryset.filter(subjects__id=subject_id)
+    if min_rate is not None:
+        queryset = queryset.filter(hourly_rate__gte=min_rate)
+    if max_rate is not None:
+        queryset = queryset.filter(hourly_rate__lte=max_rate)
+    if min_rating is not None:
+        queryset = queryset.filter(stats__average_rating__gte=min_rating)
+    return (backend or get_backend()).search('educator', query, queryset, limit, offset)
+
+
+def search_subjects(query, limit=20, offset=0, backend=None):
+    """Return ranked ``(subject_id, score)`` pairs of subjects matching ``query``."""
+    return (backend or get_backend()).search('subject', query, Subject.objects.all(), limit, offset)
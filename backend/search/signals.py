@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from courses.models import Subject
+from search.services.search_service import index_educators, index_subjects, remove_documents
+from users.models import Educator
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Educator)
+def index_educator_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_educators([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def index_educator_on_user_save(sender, instance, raw=False, **kwargs):
+    # Names and bio are part of the educator document
+    if not raw and instance.user_type == 'educator':
+        index_educators(Educator.objects.filter(user=instance).values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Educator.subjects.through)
+def index_educator_on_subjects_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            index_educators([instance.pk])
+        return
+    # instance is a Subject and pk_set holds educators, except on clear
+    if action == 'pre_clear':
+        instance._search_educator_ids = list(instance.educators.values_list('id', flat=True))
+    elif action == 'post_clear':
+        index_educators(getattr(instance, '_search_educator_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        index_educators(pk_set)
+
+
+@receiver(post_delete, sender=Educator)
+def remove_educator_document(sender, instance, **kwargs):
+    remove_documents('educator', [instance.pk])
+
+
+@receiver(post_save, sender=Subject)
+def index_subject_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        # A new subject has no educators yet
+        index_subjects([instance.pk], with_educators=not created)
+
+
+@receiver(pre_delete, sender=Subject)
+def remember_subject_educators(sender, instance, **kwargs):
+    instance._search_educator_ids = list(instance.educators.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Subject)
+def remove_subject_document(sender, instance, **kwargs):
+    remove_documents('subject', [instance.pk])
+    # The deleted subject's text is no longer part of its former educators' documents
+    index_educators(getattr(instance, '_search_educator_ids', []))
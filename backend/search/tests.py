@@ -0,0 +1,108 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from common.testing import make_educator, make_student, make_subject
+from search.backends.memory import InvertedIndex, tokenize
+from search.models import EducatorDocument
+from search.services.search_service import get_backend, rebuild_index, search_educators, search_subjects
+from users.models import EducatorStats
+
+
+class InvertedIndexTests(TestCase):
+
+    def test_tokenizer_folds_case_and_accents(self):
+        self.assertEqual(tokenize('Nguyễn Văn, PhD!'), ['nguyen', 'van', 'phd'])
+
+    def test_ranking_and_incremental_updates(self):
+        index = InvertedIndex()
+        index.add(1, 'calculus tutor')
+        index.add(2, 'calculus phd lecturer')
+        index.add(3, 'piano teacher')
+        scores = index.scores('calculus phd')
+        self.assertEqual(max(scores, key=scores.get), 2)
+        self.assertNotIn(3, scores)
+
+        index.add(2, 'piano lecturer')
+        self.assertEqual(set(index.scores('calculus')), {1})
+        index.remove(1)
+        self.assertEqual(index.scores('calculus'), {})
+        self.assertNotIn('calculus', index.postings)
+
+
+class SearchTests(TestCase):
+    """Documents follow model changes through signals and search ranks and filters them."""
+
+    def setUp(self):
+        get_backend().reset()
+        self.addCleanup(get_backend().reset)
+        self.calculus = make_subject(name='Calculus', description='Limits, derivatives and integrals')
+        self.piano = make_subject(name='Piano', description='Classical and jazz piano')
+        self.phd = make_educator(subjects=[self.calculus], degree='PhD', hourly_rate=Decimal('50.00'))
+        self.msc = make_educator(subjects=[self.calculus], degree='MSc', hourly_rate=Decimal('20.00'))
+        self.pianist = make_educator(subjects=[self.piano], degree='BA')
+
+    def ids(self, *args, **kwargs):
+        return [pk for pk, score in search_educators(*args, **kwargs)]
+
+    def test_results_are_ranked(self):
+        self.assertEqual(self.ids('calculus phd'), [self.phd.id, self.msc.id])
+        self.assertEqual([pk for pk, score in search_subjects('jazz')], [self.piano.id])
+
+    def test_filters(self):
+        self.assertEqual(self.ids('calculus', max_rate=30), [self.msc.id])
+        self.assertEqual(self.ids('calculus', subject_id=self.piano.id), [])
+        EducatorStats.objects.filter(educator=self.msc).update(average_rating=4.5)
+        self.assertEqual(self.ids('calculus', min_rating=4), [self.msc.id])
+
+    @mock.patch('search.backends.base.FILTER_CHUNK_SIZE', 1)
+    def test_selective_filters_rank_within_allowed_ids(self):
+        self.assertEqual(self.ids('calculus phd', max_rate=30), [self.msc.id])
+        self.assertEqual(self.ids('calculus phd'), [self.phd.id, self.msc.id])
+
+    def test_changes_are_indexed_incrementally(self):
+        search_educators('warm up')  # load the index before changing data
+        self.pianist.user.bio = 'Also teaches calculus'
+        self.pianist.user.save()
+        self.assertIn(self.pianist.id, self.ids('calculus'))
+
+        self.msc.subjects.remove(self.calculus)
+        self.assertNotIn(self.msc.id, self.ids('derivatives'))
+
+        self.calculus.name = 'Analysis'
+        self.calculus.save()
+        self.assertEqual(self.ids('analysis'), [self.phd.id])
+
+        self.phd.delete()
+        self.assertEqual(self.ids('analysis'), [])
+
+    def test_unverified_educators_are_excluded(self):
+        self.phd.verification_status = 'pending'
+        self.phd.save()
+        self.assertEqual(self.ids('calculus'), [self.msc.id])
+
+    def test_rebuild_recreates_documents(self):
+        EducatorDocument.objects.all().delete()
+        rebuild_index()
+        self.assertEqual(EducatorDocument.objects.count(), 3)
+        self.assertEqual(self.ids('calculus phd')[0], self.phd.id)
+
+    def test_search_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(make_student().user)
+        response = client.get(reverse('search:educator_search'), {'q': 'calculus', 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['next_offset'], 1)
+        self.assertIn('score', response.data['results'][0])
+
+        response = client.get(reverse('search:educator_search'), {'q': 'calculus', 'offset': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next_offset'])
+
+        response = client.get(reverse('search:subject_search'), {'q': 'piano'})
+        self.assertEqual([hit['id'] for hit in response.data['results']], [self.piano.id])
+        self.assertEqual(client.get(reverse('search:educator_search')).status_code, 400)
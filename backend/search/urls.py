@@ -0,0 +1,9 @@
+from django.urls import path
+from search.api.views import EducatorSearchView, SubjectSearchView
+
+app_name = 'search'
+
+urlpatterns = [
+    path('educators/', EducatorSearchView.as_view(), name='educator_search'),
+    path('subjects/', SubjectSearchView.as_view(), name='subject_search'),
+]
@@ -1,11 +1,25 @@
+from django.db import transaction
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 
-from sessions.models import Session, Review
+from common.api.async_views import AsyncListView
+from common.api.mixins import EagerLoadingViewMixin
+from common.serializers.compact import CompactListMixin
+from common.pagination import ReviewCursorPagination, SessionCursorPagination
+from sessions.models import Session, Review, AvailabilityWindow, AvailabilityException
 from sessions.serializers.session_serializers import (
-    SessionSerializer, SessionCreateSerializer, 
-    ReviewSerializer, ReviewCreateSerializer
+    SessionSerializer, SessionCompactSerializer, SessionCreateSerializer, SlotCheckSerializer,
+    BulkSessionCreateSerializer, BulkStatusUpdateSerializer, SessionStatusSerializer,
+    ReviewListSerializer, ReviewCreateSerializer
 )
+from sessions.serializers.availability_serializers import (
+    AvailabilityWindowSerializer, AvailabilityExceptionSerializer,
+    SlotSearchSerializer, FreeSlotSerializer
+)
+from sessions.services.availability_service import search_free_slots
+from sessions.services.bulk_service import BulkBookingError, book_sessions, bulk_update_status
+from sessions.services.conflict_service import find_conflicts
+from sessions.services.state_service import TransitionConflict, TransitionError, transition_session
 
 # Custom permission classes
 class IsStudent(permissions.BasePermission):
@@ -22,10 +36,12 @@ class SessionListView(generics.ListAPIView):
     """API view to list sessions based on user role."""
     serializer_class = SessionSerializer
 
-class MySessionsListView(generics.ListAPIView):
-    """API view to list user's sessions with status filtering."""
+class MySessionsListView(CompactListMixin, EagerLoadingViewMixin, generics.ListAPIView):
+    """API view to list user's sessions with status filtering; ``?view=compact`` side-loads related objects."""
     serializer_class = SessionSerializer
+    compact_serializer_class = SessionCompactSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SessionCursorPagination
     
     def get_queryset(self):
         user = self.request.user
@@ -45,6 +61,10 @@ class MySessionsListView(generics.ListAPIView):
             
         return queryset.order_by('-start_time')
 
+class AsyncMySessionsListView(AsyncListView):
+    """Async view serving MySessionsListView for ASGI deployments."""
+    view_class = MySessionsListView
+
 class SessionCreateView(generics.CreateAPIView):
     """API view for students to book a new session with an educator."""
     serializer_class = SessionCreateSerializer
@@ -54,7 +74,76 @@ class SessionCreateView(generics.CreateAPIView):
         context = super().get_serializer_context()
         return context
 
-class SessionDetailView(generics.RetrieveAPIView):
+class SessionBulkCreateView(generics.GenericAPIView):
+    """API view to book many sessions (e.g. a weekly recurrence) in one transaction."""
+    serializer_class = BulkSessionCreateSerializer
+    permission_classes = [permissions.IsAuthenticated, IsStudent | IsEducator]
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        fields = {'session_notes': data['session_notes']} if 'session_notes' in data else {}
+        
+        try:
+            sessions, errors = book_sessions(
+                data['student'], data['educator_id'], data['subject_id'], data['slots'],
+                allow_partial=data['allow_partial'], **fields
+            )
+        except BulkBookingError as exc:
+            return Response({"errors": exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = SessionSerializer.setup_eager_loading(
+            Session.objects.filter(id__in=[session.id for session in sessions]).order_by('start_time')
+        )
+        return Response({
+            "created": SessionSerializer(queryset, many=True).data,
+            "errors": errors,
+        }, status=status.HTTP_201_CREATED if sessions else status.HTTP_400_BAD_REQUEST)
+
+class SessionBulkStatusView(generics.GenericAPIView):
+    """API view for educators to update the status of many sessions at once."""
+    serializer_class = BulkStatusUpdateSerializer
+    permission_classes = [permissions.IsAuthenticated, IsEducator]
+    http_method_names = ['patch']
+    
+    def patch(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated, unchanged, errors = bulk_update_status(
+            request.user.educator_profile, serializer.validated_data['ids'], serializer.validated_data['status']
+        )
+        return Response({"updated": updated, "unchanged": unchanged, "errors": errors})
+
+class SlotCheckView(generics.GenericAPIView):
+    """API view to check many candidate slots against the educator's (and student's) bookings."""
+    serializer_class = SlotCheckSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        slots = [(slot['start_time'], slot['end_time']) for slot in serializer.validated_data['slots']]
+        
+        # Students also get their own bookings taken into account
+        student_id = None
+        if request.user.user_type == 'student':
+            student_id = request.user.student_profile.id
+        
+        conflicts = find_conflicts(
+            slots, educator_id=serializer.validated_data['educator_id'], student_id=student_id
+        )
+        return Response([
+            {
+                'start_time': start_time,
+                'end_time': end_time,
+                'available': not slot_conflicts,
+                'conflicts': slot_conflicts,
+            }
+            for (start_time, end_time), slot_conflicts in zip(slots, conflicts)
+        ], status=status.HTTP_200_OK)
+
+class SessionDetailView(EagerLoadingViewMixin, generics.RetrieveAPIView):
     """API view to retrieve session details."""
     serializer_class = SessionSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -68,30 +157,36 @@ class SessionDetailView(generics.RetrieveAPIView):
         return Session.objects.none()
 
 class SessionUpdateStatusView(generics.UpdateAPIView):
-    """API view for educators to update session status (confirm/cancel)."""
-    serializer_class = SessionSerializer
+    """API view for educators to move a session through its status transitions.
+    
+    Sending the status the session already has succeeds without a change.
+    With the ``version`` the client read, a session changed since is a 409.
+    """
+    serializer_class = SessionStatusSerializer
     permission_classes = [permissions.IsAuthenticated, IsEducator]
     http_method_names = ['patch']
     
     def get_queryset(self):
-        return Session.objects.filter(educator__user=self.request.user)
+        return Session.objects.filter(educator__user=self.request.user).only(
+            'id', 'status', 'version', 'educator_id', 'start_time', 'end_time'
+        )
     
     def patch(self, request, *args, **kwargs):
         session = self.get_object()
-        status_value = request.data.get('status')
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        status_value = serializer.validated_data['status']
         
-        # Validate status transition
-        if status_value not in ['confirmed', 'canceled', 'completed']:
-            return Response(
-                {"error": "Invalid status. Must be 'confirmed', 'canceled', or 'completed'."}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        try:
+            transition_session(session, status_value, version=serializer.validated_data.get('version'))
+        except TransitionConflict as exc:
+            return Response({"error": str(exc), "status": session.status, "version": session.version},
+                            status=status.HTTP_409_CONFLICT)
+        except TransitionError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update session status
-        session.status = status_value
-        session.save()
-        
-        return Response({"message": f"Session status updated to {status_value}"}, status=status.HTTP_200_OK)
+        return Response({"message": f"Session status updated to {status_value}", "version": session.version},
+                        status=status.HTTP_200_OK)
 
 class ReviewCreateView(generics.CreateAPIView):
     """API view for students to create a review for a completed session."""
@@ -101,15 +196,69 @@ class ReviewCreateView(generics.CreateAPIView):
     def get_serializer_context(self):
         context = super().get_serializer_context()
         return context
+    
+    def perform_create(self, serializer):
+        # The review commits together with its outbox event
+        with transaction.atomic():
+            serializer.save()
 
-class ReviewListView(generics.ListAPIView):
+class ReviewListView(EagerLoadingViewMixin, generics.ListAPIView):
     """API view to list reviews for an educator."""
-    serializer_class = ReviewSerializer
+    serializer_class = ReviewListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ReviewCursorPagination
     
     def get_queryset(self):
-        educator_id = self.kwargs.get('educator_id')
-        return Review.objects.filter(
-            session__educator__id=educator_id,
-            session__status='completed'
-        )
\ No newline at end of file
+        # Reviews can only be written for completed sessions and carry their
+        # educator, so the review_educator_created_idx index serves the page
+        return Review.objects.filter(educator_id=self.kwargs.get('educator_id'))
+
+class AvailabilityWindowListCreateView(generics.ListCreateAPIView):
+    """API view for educators to list and add recurring availability windows."""
+    serializer_class = AvailabilityWindowSerializer
+    permission_classes = [permissions.IsAuthenticated, IsEducator]
+    
+    def get_queryset(self):
+        return AvailabilityWindow.objects.filter(educator__user=self.request.user)
+    
+    def perform_create(self, serializer):
+        serializer.save(educator=self.request.user.educator_profile)
+
+class AvailabilityWindowDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """API view for educators to update or remove an availability window."""
+    serializer_class = AvailabilityWindowSerializer
+    permission_classes = [permissions.IsAuthenticated, IsEducator]
+    
+    def get_queryset(self):
+        return AvailabilityWindow.objects.filter(educator__user=self.request.user)
+
+class AvailabilityExceptionListCreateView(generics.ListCreateAPIView):
+    """API view for educators to list and add availability exceptions."""
+    serializer_class = AvailabilityExceptionSerializer
+    permission_classes = [permissions.IsAuthenticated, IsEducator]
+    
+    def get_queryset(self):
+        return AvailabilityException.objects.filter(educator__user=self.request.user)
+    
+    def perform_create(self, serializer):
+        serializer.save(educator=self.request.user.educator_profile)
+
+class AvailabilityExceptionDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """API view for educators to update or remove an availability exception."""
+    serializer_class = AvailabilityExceptionSerializer
+    permission_classes = [permissions.IsAuthenticated, IsEducator]
+    
+    def get_queryset(self):
+        return AvailabilityException.objects.filter(educator__user=self.request.user)
+
+class FreeSlotSearchView(generics.GenericAPIView):
+    """API view to search free time of verified educators within a time range."""
+    serializer_class = FreeSlotSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, *args, **kwargs):
+        params = SlotSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        slots = search_free_slots(**params.validated_data)
+        return Response(self.get_serializer(slots, many=True).data, status=status.HTTP_200_OK)
+
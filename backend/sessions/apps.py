@@ -5,3 +5,7 @@ class SessionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sessions'
     label = 'learning_sessions'  # Add a unique label to avoid conflict with Django's sessions
+
+    def ready(self):
+        # Register signal handlers
+        from sessions import signals  # noqa: F401
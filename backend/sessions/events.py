@@ -0,0 +1,14 @@
+"""Domain events of sessions.
+
+Sent with ``sender=Session`` inside the transaction making the change, so
+receivers may write alongside it (as the notifications outbox does); work
+outside the database belongs in ``transaction.on_commit``.
+"""
+from django.dispatch import Signal
+
+# sessions: the booked Session objects, of one student and one educator
+sessions_booked = Signal()
+
+# educator_id, status, and changes: (session id, old status, version after the
+# change) of the educator's sessions moved to status by state_service
+session_status_changed = Signal()
@@ -0,0 +1,64 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from common.benchmarking import benchmark_database, measure
+from common.synthetic_data import generate_dataset
+from sessions.models import Session
+from sessions.serializers.session_serializers import SessionCompactSerializer, SessionSerializer
+
+
+class Command(BaseCommand):
+    help = ("Compare payload size and serialization time of the full and compact (?view=compact) "
+            "session list representations, in a throwaway database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='100,1000', help="Comma-separated numbers of sessions per list.")
+        parser.add_argument('--educators', type=int, default=50)
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--keepdb', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options['keepdb']):
+            results = self.run(options)
+        self.stdout.write(json.dumps(results, indent=2, default=str))
+
+    def run(self, options):
+        counts = [int(value) for value in options['rows'].split(',')]
+        generate_dataset(subjects=20, students=options['students'], educators=options['educators'],
+                         sessions=max(counts), review_ratio=0.3, seed=options['seed'])
+        context = {'request': RequestFactory().get('/')}
+        results = {'options': {k: options[k] for k in ('educators', 'students', 'iterations')}, 'lists': {}}
+
+        for count in counts:
+            modes = {}
+            for mode, serializer_class in (('full', SessionSerializer), ('compact', SessionCompactSerializer)):
+                queryset = serializer_class.setup_eager_loading(Session.objects.order_by('-start_time'))[:count]
+                objects = list(queryset)
+
+                def serialize():
+                    return JSONRenderer().render(serializer_class(objects, many=True, context=context).data)
+
+                def fetch_and_serialize():
+                    rows = list(queryset.all())
+                    return JSONRenderer().render(serializer_class(rows, many=True, context=context).data)
+
+                started = time.perf_counter()
+                body = serialize()
+                modes[mode] = {
+                    'payload_bytes': len(body),
+                    'first_render_ms': round((time.perf_counter() - started) * 1000, 3),
+                    'serialize': measure(serialize, options['iterations']),
+                    'fetch_and_serialize': measure(fetch_and_serialize, options['iterations']),
+                }
+            modes['payload_ratio'] = round(modes['compact']['payload_bytes'] / modes['full']['payload_bytes'], 3)
+            modes['serialize_speedup'] = round(
+                modes['full']['serialize']['mean_ms'] / modes['compact']['serialize']['mean_ms'], 2
+            )
+            results['lists'][count] = modes
+        return results
@@ -0,0 +1,83 @@
+import json
+import random
+import time
+from datetime import datetime, time as clock, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from common.benchmarking import benchmark_database, measure
+from common.synthetic_data import generate_dataset
+from sessions.models import AvailabilitySlot, AvailabilityWindow, Session
+from sessions.services.availability_service import rebuild_slots, search_free_slots
+
+
+class Command(BaseCommand):
+    help = "Benchmark the free-slot search against a synthetic dataset in a throwaway database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--educators', type=int, default=10000)
+        parser.add_argument('--sessions', type=int, default=1000000)
+        parser.add_argument('--students', type=int, default=20000)
+        parser.add_argument('--days', type=int, default=7, help="Slot horizon to materialize.")
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--keepdb', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options['keepdb']):
+            results = self.run(options)
+        self.stdout.write(json.dumps(results, indent=2, default=str))
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        results = {'options': {k: options[k] for k in ('educators', 'sessions', 'students', 'days', 'iterations')}}
+
+        started = time.perf_counter()
+        dataset = generate_dataset(
+            educators=options['educators'], students=options['students'],
+            sessions=options['sessions'], seed=options['seed'],
+        )
+        # Weekday office hours for every educator
+        AvailabilityWindow.objects.bulk_create([
+            AvailabilityWindow(educator_id=educator_id, weekday=weekday,
+                               start_time=clock(9), end_time=clock(17))
+            for educator_id in dataset['educators'] for weekday in range(5)
+        ], batch_size=5000)
+        results['generate_seconds'] = round(time.perf_counter() - started, 2)
+
+        started = time.perf_counter()
+        results['slots'] = rebuild_slots(dataset['educators'], days=options['days'])
+        results['rebuild_seconds'] = round(time.perf_counter() - started, 2)
+        results['session_rows'] = Session.objects.count()
+
+        today = timezone.localdate()
+        tz = timezone.get_current_timezone()
+
+        def random_range(hours):
+            day = today + timedelta(days=rng.randrange(options['days']))
+            start = timezone.make_aware(datetime.combine(day, clock(rng.randrange(9, 17 - hours))), tz)
+            return start, start + timedelta(hours=hours)
+
+        def search_two_hours():
+            start, end = random_range(2)
+            search_free_slots(start, end, min_minutes=120)
+
+        def search_two_hours_by_subject():
+            start, end = random_range(2)
+            search_free_slots(start, end, subject_id=rng.choice(dataset['subjects']), min_minutes=120)
+
+        def book_and_sync():
+            slot = AvailabilitySlot.objects.filter(is_booked=False).order_by('?').first()
+            # The post_save signal updates the slot index
+            Session.objects.create(
+                student_id=rng.choice(dataset['students']), educator_id=slot.educator_id,
+                subject_id=rng.choice(dataset['subjects']),
+                start_time=slot.start_time, end_time=slot.end_time,
+            )
+
+        iterations = options['iterations']
+        results['search_2h'] = measure(search_two_hours, iterations)
+        results['search_2h_subject'] = measure(search_two_hours_by_subject, iterations)
+        results['book_and_sync'] = measure(book_and_sync, iterations)
+        return results
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from sessions.services.availability_service import HORIZON_DAYS, rebuild_slots
+from users.models import Educator
+
+
+class Command(BaseCommand):
+    help = "Regenerate the availability slot index for the rolling booking horizon."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=HORIZON_DAYS,
+                            help="Number of days from today to materialize.")
+        parser.add_argument('--educator', type=int, action='append', dest='educators',
+                            help="Only rebuild the given educator id (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        educators = Educator.objects.filter(
+            Q(availability_windows__isnull=False) | Q(availability_exceptions__isnull=False)
+        )
+        if options['educators']:
+            educators = educators.filter(id__in=options['educators'])
+        educator_ids = educators.order_by('id').values_list('id', flat=True).distinct()
+
+        created = rebuild_slots(educator_ids, days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Materialized {created} availability slots."))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-16 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('learning_sessions', '0001_initial'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['educator', 'start_time', 'end_time'], name='session_educator_interval_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['student', 'start_time', 'end_time'], name='session_student_interval_idx'),
+        ),
+    ]
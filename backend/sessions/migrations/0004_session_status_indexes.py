@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-16 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('learning_sessions', '0003_availability'),
+        ('users', '0002_educator_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['student', 'status', '-start_time'], name='session_student_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['educator', 'status', '-start_time'], name='session_educator_status_idx'),
+        ),
+    ]
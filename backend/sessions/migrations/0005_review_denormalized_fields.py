@@ -0,0 +1,30 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('learning_sessions', '0004_session_status_indexes'),
+        ('users', '0003_educator_verification_index'),
+    ]
+
+    operations = [
+        # Nullable until 0006 has copied the values from the sessions
+        migrations.AddField(
+            model_name='review',
+            name='educator',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='users.educator'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='student',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='users.student'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='subject',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='courses.subject'),
+        ),
+    ]
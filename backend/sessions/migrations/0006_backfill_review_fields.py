@@ -0,0 +1,34 @@
+from django.db import migrations
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 5000
+
+
+def copy_session_fields(apps, schema_editor):
+    Review = apps.get_model('learning_sessions', 'Review')
+    Session = apps.get_model('learning_sessions', 'Session')
+
+    def from_session(field):
+        return Subquery(Session.objects.filter(pk=OuterRef('session_id')).values(field)[:1])
+
+    # Primary key ranges, each committed on its own, so a large table is
+    # never locked at once and an interrupted backfill resumes where it stopped
+    last_id = Review.objects.aggregate(last=Max('id'))['last'] or 0
+    for start in range(0, last_id, BATCH_SIZE):
+        Review.objects.filter(id__gt=start, id__lte=start + BATCH_SIZE, educator__isnull=True).update(
+            educator_id=from_session('educator_id'),
+            student_id=from_session('student_id'),
+            subject_id=from_session('subject_id'),
+        )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('learning_sessions', '0005_review_denormalized_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_session_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-16 23:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('learning_sessions', '0006_backfill_review_fields'),
+        ('users', '0003_educator_verification_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='review',
+            name='educator',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='users.educator'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='users.student'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='subject',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='courses.subject'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['educator', '-created_at'], name='review_educator_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning_sessions', '0007_review_educator_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,6 +1,70 @@
+from decimal import Decimal, ROUND_HALF_UP
+
 from django.db import models
+from django.db.models import Count, F, Func, Sum
+from django.db.models.functions import Cast, Coalesce
 from django.utils import timezone
 
+class MinutesBetween(Func):
+    """Whole minutes elapsed between two datetime expressions, computed in SQL."""
+    arity = 2
+    output_field = models.IntegerField()
+    template = 'TIMESTAMPDIFF(MINUTE, %(expressions)s)'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        start, end = self.source_expressions
+        start_sql, start_params = compiler.compile(start)
+        end_sql, end_params = compiler.compile(end)
+        sql = f'CAST(ROUND((julianday({end_sql}) - julianday({start_sql})) * 86400) AS INTEGER) / 60'
+        return sql, (*end_params, *start_params)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        start, end = self.source_expressions
+        start_sql, start_params = compiler.compile(start)
+        end_sql, end_params = compiler.compile(end)
+        sql = f'CAST(EXTRACT(EPOCH FROM ({end_sql} - {start_sql})) AS INTEGER) / 60'
+        return sql, (*end_params, *start_params)
+
+class HourlyCost(Func):
+    """Cost of a number of minutes billed at an hourly rate, computed in SQL."""
+    arity = 2
+    arg_joiner = ' * '
+    output_field = models.DecimalField(max_digits=10, decimal_places=2)
+    template = '(%(expressions)s) / 60'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # SQLite stores whole-number decimals as integers; avoid integer division
+        return self.as_sql(compiler, connection, template='(%(expressions)s) / 60.0', **extra_context)
+
+class SessionQuerySet(models.QuerySet):
+    """QuerySet for sessions with database-computed duration and cost."""
+
+    def with_cost(self):
+        """Annotate ``annotated_duration_minutes`` and ``annotated_cost`` computed in SQL.
+
+        The cost reads ``educator.hourly_rate`` through the same join used by
+        ``select_related('educator')``, so no educator is fetched per row.
+        """
+        duration = MinutesBetween(F('start_time'), F('end_time'))
+        return self.annotate(
+            annotated_duration_minutes=duration,
+            annotated_cost=Cast(
+                HourlyCost(duration, F('educator__hourly_rate')),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            ),
+        )
+
+    def cost_summary(self):
+        """Aggregate session count, total minutes and total cost in a single query."""
+        return self.with_cost().aggregate(
+            session_count=Count('id'),
+            total_minutes=Coalesce(Sum('annotated_duration_minutes'), 0),
+            total_cost=Coalesce(
+                Sum('annotated_cost'), Decimal('0.00'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+
 class Session(models.Model):
     """Model representing tutoring sessions between students and educators."""
     
@@ -17,29 +81,54 @@ class Session(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Bumped by every status change; see sessions.services.state_service
+    version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     meeting_link = models.URLField(blank=True, null=True)
     session_notes = models.TextField(blank=True)
     
+    objects = SessionQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-start_time']
+        indexes = [
+            # Interval overlap checks for bookings
+            models.Index(fields=['educator', 'start_time', 'end_time'], name='session_educator_interval_idx'),
+            models.Index(fields=['student', 'start_time', 'end_time'], name='session_student_interval_idx'),
+            # "My sessions" filtered by status, newest first; the educator one also
+            # serves an educator's completed sessions joined by the review list
+            models.Index(fields=['student', 'status', '-start_time'], name='session_student_status_idx'),
+            models.Index(fields=['educator', 'status', '-start_time'], name='session_educator_status_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so signal handlers can detect transitions
+        if 'status' in field_names:
+            instance._loaded_status = values[field_names.index('status')]
+        return instance
     
     def __str__(self):
         return f"{self.subject} - {self.student} with {self.educator} ({self.start_time.strftime('%Y-%m-%d %H:%M')})"
     
     @property
     def duration_minutes(self):
-        """Calculate the duration of the session in minutes."""
+        """Duration of the session in minutes, preferring the ``with_cost()`` annotation."""
+        if hasattr(self, 'annotated_duration_minutes'):
+            return self.annotated_duration_minutes
         delta = self.end_time - self.start_time
-        return delta.seconds // 60
+        return int(delta.total_seconds()) // 60
     
     @property
     def session_cost(self):
-        """Calculate the cost of the session based on educator's hourly rate."""
+        """Cost of the session from the educator's hourly rate, preferring the ``with_cost()`` annotation."""
+        if hasattr(self, 'annotated_cost'):
+            return self.annotated_cost
         hourly_rate = self.educator.hourly_rate
-        hours = self.duration_minutes / 60
-        return hours * hourly_rate
+        cost = Decimal(self.duration_minutes) * hourly_rate / 60
+        return cost.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
     
     def is_upcoming(self):
         """Check if the session is in the future."""
@@ -49,9 +138,95 @@ class Review(models.Model):
     """Model representing reviews for completed sessions."""
     
     session = models.OneToOneField(Session, on_delete=models.CASCADE, related_name='review')
+    # Copied from the session so reviews are listed per educator without a join
+    educator = models.ForeignKey('users.Educator', on_delete=models.CASCADE, related_name='reviews')
+    student = models.ForeignKey('users.Student', on_delete=models.CASCADE, related_name='reviews')
+    subject = models.ForeignKey('courses.Subject', on_delete=models.CASCADE, related_name='reviews')
     rating = models.PositiveSmallIntegerField(choices=[(i, i) for i in range(1, 6)])
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # An educator's reviews, newest first
+            models.Index(fields=['educator', '-created_at'], name='review_educator_created_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if self.educator_id is None or self.student_id is None or self.subject_id is None:
+            self.educator_id = self.session.educator_id
+            self.student_id = self.session.student_id
+            self.subject_id = self.session.subject_id
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"Review for {self.session}"
+
+class AvailabilityWindow(models.Model):
+    """Recurring weekly window during which an educator accepts bookings."""
+    
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+    
+    educator = models.ForeignKey('users.Educator', on_delete=models.CASCADE, related_name='availability_windows')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    
+    class Meta:
+        ordering = ['weekday', 'start_time']
+    
+    def __str__(self):
+        return f"{self.educator} - {self.get_weekday_display()} {self.start_time}-{self.end_time}"
+
+class AvailabilityException(models.Model):
+    """One-off change to an educator's weekly availability on a given date.
+    
+    Without times the exception covers the whole day. ``is_available`` adds
+    extra availability instead of blocking time off.
+    """
+    
+    educator = models.ForeignKey('users.Educator', on_delete=models.CASCADE, related_name='availability_exceptions')
+    date = models.DateField()
+    start_time = models.TimeField(blank=True, null=True)
+    end_time = models.TimeField(blank=True, null=True)
+    is_available = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['date', 'start_time']
+    
+    def __str__(self):
+        state = "available" if self.is_available else "unavailable"
+        return f"{self.educator} - {self.date} {state}"
+
+class AvailabilitySlot(models.Model):
+    """Materialized bookable slot of an educator, kept in sync with sessions.
+    
+    Rows are generated from availability windows and exceptions for a rolling
+    horizon and flagged as booked whenever a blocking session overlaps them.
+    """
+    
+    educator = models.ForeignKey('users.Educator', on_delete=models.CASCADE, related_name='availability_slots')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    is_booked = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['start_time']
+        constraints = [
+            models.UniqueConstraint(fields=['educator', 'start_time'], name='unique_educator_slot_start'),
+        ]
+        indexes = [
+            # Free-slot search over a time range
+            models.Index(fields=['is_booked', 'start_time'], name='slot_free_start_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.educator} - {self.start_time.strftime('%Y-%m-%d %H:%M')}"
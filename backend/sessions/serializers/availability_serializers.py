@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from rest_framework import serializers
+from sessions.models import AvailabilityWindow, AvailabilityException
+from sessions.services.availability_service import SLOT_MINUTES
+
+class AvailabilityWindowSerializer(serializers.ModelSerializer):
+    """Serializer for an educator's recurring weekly availability window."""
+    class Meta:
+        model = AvailabilityWindow
+        fields = ['id', 'weekday', 'start_time', 'end_time']
+    
+    def validate(self, attrs):
+        start_time = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if end_time <= start_time:
+            raise serializers.ValidationError({"end_time": "End time must be after start time."})
+        return attrs
+
+class AvailabilityExceptionSerializer(serializers.ModelSerializer):
+    """Serializer for a dated exception to an educator's availability."""
+    class Meta:
+        model = AvailabilityException
+        fields = ['id', 'date', 'start_time', 'end_time', 'is_available']
+    
+    def validate(self, attrs):
+        start_time = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if (start_time is None) != (end_time is None):
+            raise serializers.ValidationError("Provide both start and end time, or neither for the whole day.")
+        if start_time is not None and end_time <= start_time:
+            raise serializers.ValidationError({"end_time": "End time must be after start time."})
+        return attrs
+
+class SlotSearchSerializer(serializers.Serializer):
+    """Query parameters for searching free slots across educators."""
+    MAX_RANGE = timedelta(days=7)
+    
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    subject_id = serializers.IntegerField(required=False)
+    min_minutes = serializers.IntegerField(required=False, min_value=SLOT_MINUTES, default=SLOT_MINUTES)
+    
+    def validate(self, attrs):
+        if attrs['end_time'] <= attrs['start_time']:
+            raise serializers.ValidationError({"end_time": "End time must be after start time."})
+        if attrs['end_time'] - attrs['start_time'] > self.MAX_RANGE:
+            raise serializers.ValidationError({"end_time": "Search range cannot exceed 7 days."})
+        return attrs
+
+class FreeSlotSerializer(serializers.Serializer):
+    """Serializer for a free time range of an educator."""
+    educator_id = serializers.IntegerField()
+    first_name = serializers.CharField()
+    last_name = serializers.CharField()
+    hourly_rate = serializers.DecimalField(max_digits=6, decimal_places=2)
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
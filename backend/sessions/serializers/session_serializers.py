@@ -1,16 +1,65 @@
 from rest_framework import serializers
-from sessions.models import Session, Review
-from users.serializers.user_serializers import StudentSerializer, EducatorSerializer
-from courses.serializers.subject_serializers import SubjectSerializer
+from sessions.models import Session, SessionQuerySet, Review
+from users.serializers.user_serializers import (
+    StudentSerializer, EducatorSerializer, participant_converters, participant_includes
+)
+from courses.models import Subject
+from courses.serializers.subject_serializers import SubjectSerializer, COMPACT_SUBJECT_FIELDS
+from common.serializers.compact import CompactListSerializer, prefixed, variant_url
+from common.serializers.fields import ImageVariantField
+from common.serializers.mixins import EagerLoadingMixin
+from sessions.services.bulk_service import FREQUENCIES, MAX_BULK_SESSIONS, expand_recurrence
+from sessions.services.conflict_service import SessionConflictError, book_session
+from users.models import Educator, Student
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for the Review model."""
     class Meta:
         model = Review
         fields = ['id', 'session', 'rating', 'comment', 'created_at']
         read_only_fields = ['created_at']
 
-class SessionSerializer(serializers.ModelSerializer):
+class ReviewerSerializer(serializers.ModelSerializer):
+    """Public summary of the student who wrote a review."""
+    first_name = serializers.CharField(source='user.first_name', read_only=True)
+    last_name = serializers.CharField(source='user.last_name', read_only=True)
+    profile_picture = ImageVariantField(source='user.profile_picture', read_only=True)
+    
+    class Meta:
+        model = Student
+        fields = ['id', 'first_name', 'last_name', 'profile_picture']
+
+class ReviewSubjectSerializer(serializers.ModelSerializer):
+    """Summary of the subject a review is about."""
+    icon = ImageVariantField(read_only=True)
+    
+    class Meta:
+        model = Subject
+        fields = ['id', 'name', 'icon']
+
+class ReviewListSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """Serializer for an educator's reviews with the reviewer and subject embedded."""
+    reviewer = ReviewerSerializer(source='student', read_only=True)
+    subject = ReviewSubjectSerializer(read_only=True)
+    
+    select_related_fields = ('student__user', 'subject')
+    
+    # Columns read by the serializer, so listing never loads whole user rows
+    ONLY_FIELDS = (
+        'id', 'session_id', 'rating', 'comment', 'created_at', 'student_id', 'subject_id',
+        'student__id', 'student__user_id', 'student__user__first_name', 'student__user__last_name',
+        'student__user__profile_picture_variants', 'subject__id', 'subject__name', 'subject__icon_variants',
+    )
+    
+    class Meta:
+        model = Review
+        fields = ['id', 'session', 'rating', 'comment', 'created_at', 'reviewer', 'subject']
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return super().setup_eager_loading(queryset).only(*cls.ONLY_FIELDS)
+
+class SessionSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for Session model."""
     student = StudentSerializer(read_only=True)
     educator = EducatorSerializer(read_only=True)
@@ -22,9 +71,39 @@ class SessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Session
         fields = ['id', 'student', 'educator', 'subject', 'start_time', 'end_time', 
-                 'status', 'created_at', 'updated_at', 'meeting_link', 'session_notes',
+                 'status', 'version', 'created_at', 'updated_at', 'meeting_link', 'session_notes',
                  'duration_minutes', 'session_cost', 'review']
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['version', 'created_at', 'updated_at']
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # Sessions listed directly get duration and cost computed in SQL
+        queryset = super().setup_eager_loading(queryset)
+        if isinstance(queryset, SessionQuerySet):
+            queryset = queryset.with_cost()
+        return queryset
+
+class SessionCompactSerializer(CompactListSerializer):
+    """Compact session list: related objects by id, side-loaded once in ``included``."""
+    fields = {
+        'id': 'id', 'student': 'student_id', 'educator': 'educator_id', 'subject': 'subject_id',
+        'start_time': 'start_time', 'end_time': 'end_time', 'status': 'status',
+        'version': 'version', 'created_at': 'created_at', 'updated_at': 'updated_at', 'meeting_link': 'meeting_link',
+        'session_notes': 'session_notes', 'duration_minutes': 'annotated_duration_minutes',
+        'session_cost': 'annotated_cost', 'review': 'review__id',
+    }
+    included = participant_includes() + (
+        ('subjects', 'subject_id', prefixed('subject__', COMPACT_SUBJECT_FIELDS)),
+        ('reviews', 'review__id', {
+            'id': 'review__id', 'rating': 'review__rating', 'comment': 'review__comment',
+            'created_at': 'review__created_at',
+        }),
+    )
+    converters = {**participant_converters(), 'subject__icon_variants': variant_url()}
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return super().setup_eager_loading(queryset.with_cost())
 
 class SessionCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating a new session."""
@@ -35,6 +114,16 @@ class SessionCreateSerializer(serializers.ModelSerializer):
         model = Session
         fields = ['educator_id', 'subject_id', 'start_time', 'end_time', 'session_notes']
     
+    def validate_educator_id(self, educator_id):
+        if not Educator.objects.filter(pk=educator_id).exists():
+            raise serializers.ValidationError("Educator not found.")
+        return educator_id
+    
+    def validate(self, attrs):
+        if attrs['end_time'] <= attrs['start_time']:
+            raise serializers.ValidationError({"end_time": "End time must be after start time."})
+        return attrs
+    
     def create(self, validated_data):
         # Extract IDs from validated data
         educator_id = validated_data.pop('educator_id')
@@ -43,16 +132,112 @@ class SessionCreateSerializer(serializers.ModelSerializer):
         # Get the current user as student
         student = self.context['request'].user.student_profile
         
-        # Create the session
-        session = Session.objects.create(
-            student=student,
-            educator_id=educator_id,
-            subject_id=subject_id,
-            **validated_data
-        )
+        # Create the session unless it overlaps an existing booking
+        try:
+            session = book_session(
+                student=student,
+                educator_id=educator_id,
+                subject_id=subject_id,
+                **validated_data
+            )
+        except SessionConflictError as exc:
+            raise serializers.ValidationError({
+                "non_field_errors": ["This time slot overlaps an existing session."],
+                "conflicts": exc.conflicts,
+            })
         
         return session
 
+class SlotSerializer(serializers.Serializer):
+    """Serializer for a candidate time slot."""
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    
+    def validate(self, attrs):
+        if attrs['end_time'] <= attrs['start_time']:
+            raise serializers.ValidationError({"end_time": "End time must be after start time."})
+        return attrs
+
+class RecurrenceSerializer(serializers.Serializer):
+    """Serializer for a simple recurrence rule (e.g. weekly, 16 times)."""
+    start_time = serializers.DateTimeField(help_text="Start of the first occurrence.")
+    end_time = serializers.DateTimeField(help_text="End of the first occurrence.")
+    frequency = serializers.ChoiceField(choices=list(FREQUENCIES))
+    interval = serializers.IntegerField(min_value=1, max_value=52, default=1)
+    count = serializers.IntegerField(min_value=1, max_value=MAX_BULK_SESSIONS, required=False)
+    until = serializers.DateField(required=False)
+    
+    def validate(self, attrs):
+        if attrs['end_time'] <= attrs['start_time']:
+            raise serializers.ValidationError({"end_time": "End time must be after start time."})
+        if ('count' in attrs) == ('until' in attrs):
+            raise serializers.ValidationError("Provide exactly one of 'count' or 'until'.")
+        return attrs
+
+class BulkSessionCreateSerializer(serializers.Serializer):
+    """Serializer for booking many sessions between one student and one educator.
+    
+    Students pass ``educator_id``, educators pass ``student_id``. Sessions are
+    given either as an explicit list or as a recurrence rule.
+    """
+    educator_id = serializers.IntegerField(required=False)
+    student_id = serializers.IntegerField(required=False)
+    subject_id = serializers.IntegerField()
+    session_notes = serializers.CharField(required=False, allow_blank=True)
+    sessions = SlotSerializer(many=True, required=False, allow_empty=False, max_length=MAX_BULK_SESSIONS)
+    recurrence = RecurrenceSerializer(required=False)
+    allow_partial = serializers.BooleanField(default=False,
+                                             help_text="Book the valid sessions even if others fail.")
+    
+    def validate(self, attrs):
+        user = self.context['request'].user
+        if user.user_type == 'student':
+            if 'educator_id' not in attrs:
+                raise serializers.ValidationError({"educator_id": "This field is required."})
+            if not Educator.objects.filter(pk=attrs['educator_id']).exists():
+                raise serializers.ValidationError({"educator_id": "Educator not found."})
+            attrs['student'] = user.student_profile
+        else:
+            if 'student_id' not in attrs:
+                raise serializers.ValidationError({"student_id": "This field is required."})
+            try:
+                attrs['student'] = Student.objects.get(pk=attrs['student_id'])
+            except Student.DoesNotExist:
+                raise serializers.ValidationError({"student_id": "Student not found."})
+            attrs['educator_id'] = user.educator_profile.id
+        
+        if ('sessions' in attrs) == ('recurrence' in attrs):
+            raise serializers.ValidationError("Provide exactly one of 'sessions' or 'recurrence'.")
+        if 'recurrence' in attrs:
+            slots = expand_recurrence(**attrs.pop('recurrence'))
+            if len(slots) > MAX_BULK_SESSIONS:
+                raise serializers.ValidationError(
+                    {"recurrence": f"A recurrence can create at most {MAX_BULK_SESSIONS} sessions."}
+                )
+        else:
+            slots = [(slot['start_time'], slot['end_time']) for slot in attrs.pop('sessions')]
+        attrs['slots'] = slots
+        return attrs
+
+class BulkStatusUpdateSerializer(serializers.Serializer):
+    """Serializer for changing the status of many sessions at once."""
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=500)
+    status = serializers.ChoiceField(choices=['confirmed', 'canceled', 'completed'])
+
+class SessionStatusSerializer(serializers.Serializer):
+    """Serializer for changing the status of one session.
+
+    ``version`` is the session version the client last read; when given, the
+    change is refused if the session changed since.
+    """
+    status = serializers.ChoiceField(choices=['confirmed', 'canceled', 'completed'])
+    version = serializers.IntegerField(min_value=0, required=False)
+
+class SlotCheckSerializer(serializers.Serializer):
+    """Serializer for checking many candidate slots against existing bookings."""
+    educator_id = serializers.IntegerField()
+    slots = SlotSerializer(many=True, allow_empty=False, max_length=200)
+
 class ReviewCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating a review for a completed session."""
     class Meta:
@@ -0,0 +1,197 @@
+"""Materialized availability slots and free-slot search.
+
+Educator availability (weekly windows plus dated exceptions) is expanded into
+``AvailabilitySlot`` rows of ``SLOT_MINUTES`` for a rolling horizon. Slots are
+flagged as booked from the sessions overlapping them, so searching for free
+time across educators is a single indexed range query instead of combining
+windows and sessions per educator at request time.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from sessions.models import AvailabilityException, AvailabilitySlot, AvailabilityWindow, Session
+from sessions.services.conflict_service import BLOCKING_STATUSES, find_conflicts
+
+SLOT_MINUTES = 30
+HORIZON_DAYS = 28
+
+
+def _subtract(intervals, removed_start, removed_end):
+    result = []
+    for start, end in intervals:
+        if removed_end <= start or removed_start >= end:
+            result.append((start, end))
+            continue
+        if start < removed_start:
+            result.append((start, removed_start))
+        if removed_end < end:
+            result.append((removed_end, end))
+    return result
+
+
+def day_intervals(day, windows, exceptions, tz):
+    """Return the available ``(start, end)`` datetimes of an educator on ``day``."""
+    def at(clock):
+        return timezone.make_aware(datetime.combine(day, clock), tz)
+
+    intervals = [(at(window.start_time), at(window.end_time))
+                 for window in windows if window.weekday == day.weekday()]
+    for exception in exceptions:
+        if exception.date != day:
+            continue
+        start = at(exception.start_time or time.min)
+        end = at(exception.end_time) if exception.end_time else at(time.min) + timedelta(days=1)
+        if exception.is_available:
+            intervals.append((start, end))
+        else:
+            intervals = _subtract(intervals, start, end)
+    return sorted(intervals)
+
+
+def expand_slots(intervals, slot_minutes=SLOT_MINUTES):
+    """Cut availability intervals into consecutive fixed-size slots."""
+    step = timedelta(minutes=slot_minutes)
+    slots = set()
+    for start, end in intervals:
+        while start + step <= end:
+            slots.add((start, start + step))
+            start += step
+    return sorted(slots)
+
+
+def _booked_flags(slots, sessions):
+    """Flag each slot overlapping one of the sorted ``(start, end)`` sessions."""
+    starts = [start for start, end in sessions]
+    return [
+        any(sessions[i][1] > slot_start for i in range(bisect_left(starts, slot_end)))
+        for slot_start, slot_end in slots
+    ]
+
+
+def rebuild_slots(educator_ids, start_date=None, days=HORIZON_DAYS, batch_size=500):
+    """Regenerate the slot index of the given educators for ``days`` from ``start_date``.
+
+    Educators are processed in batches; each batch reads its windows,
+    exceptions and blocking sessions with one query each.
+    """
+    tz = timezone.get_current_timezone()
+    start_date = start_date or timezone.localdate()
+    horizon_start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    horizon_end = horizon_start + timedelta(days=days)
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+    educator_ids = list(educator_ids)
+    created = 0
+
+    for offset in range(0, len(educator_ids), batch_size):
+        batch = educator_ids[offset:offset + batch_size]
+        windows = defaultdict(list)
+        for window in AvailabilityWindow.objects.filter(educator_id__in=batch):
+            windows[window.educator_id].append(window)
+        exceptions = defaultdict(list)
+        for exception in AvailabilityException.objects.filter(
+                educator_id__in=batch, date__gte=dates[0], date__lte=dates[-1]):
+            exceptions[exception.educator_id].append(exception)
+        sessions = defaultdict(list)
+        for educator_id, start, end in Session.objects.filter(
+                educator_id__in=batch,
+                start_time__lt=horizon_end,
+                end_time__gt=horizon_start,
+                status__in=BLOCKING_STATUSES).values_list('educator_id', 'start_time', 'end_time'):
+            sessions[educator_id].append((start, end))
+
+        rows = []
+        for educator_id in batch:
+            intervals = []
+            for day in dates:
+                intervals.extend(day_intervals(day, windows[educator_id], exceptions[educator_id], tz))
+            slots = expand_slots(intervals)
+            flags = _booked_flags(slots, sorted(sessions[educator_id]))
+            rows.extend(
+                AvailabilitySlot(educator_id=educator_id, start_time=start, end_time=end, is_booked=booked)
+                for (start, end), booked in zip(slots, flags)
+            )
+
+        with transaction.atomic():
+            AvailabilitySlot.objects.filter(
+                educator_id__in=batch, start_time__gte=horizon_start, start_time__lt=horizon_end
+            ).delete()
+            AvailabilitySlot.objects.bulk_create(rows, batch_size=1000)
+        created += len(rows)
+
+    return created
+
+
+def sync_session_slots(session):
+    """Refresh the booked flag of the slots overlapping ``session``.
+
+    Called whenever a session is created, deleted or changes status; other
+    sessions overlapping the same slots are taken into account.
+    """
+    sync_slots_between(session.educator_id, session.start_time, session.end_time)
+
+
+def sync_slots_between(educator_id, start_time, end_time):
+    """Refresh the booked flag of the educator's slots overlapping ``[start_time, end_time)``."""
+    slots = list(AvailabilitySlot.objects.filter(
+        educator_id=educator_id,
+        start_time__lt=end_time,
+        end_time__gt=start_time,
+    ).values_list('id', 'start_time', 'end_time'))
+    if not slots:
+        return
+
+    conflicts = find_conflicts([(start, end) for pk, start, end in slots], educator_id=educator_id)
+    booked = [pk for (pk, start, end), slot_conflicts in zip(slots, conflicts) if slot_conflicts]
+    free = [pk for (pk, start, end), slot_conflicts in zip(slots, conflicts) if not slot_conflicts]
+    if booked:
+        AvailabilitySlot.objects.filter(id__in=booked, is_booked=False).update(is_booked=True)
+    if free:
+        AvailabilitySlot.objects.filter(id__in=free, is_booked=True).update(is_booked=False)
+
+
+def search_free_slots(start_time, end_time, subject_id=None, min_minutes=SLOT_MINUTES):
+    """Return free time of verified educators within ``[start_time, end_time)``.
+
+    Reads the slot index with a single query and merges consecutive free slots
+    per educator into ranges of at least ``min_minutes``.
+    """
+    queryset = AvailabilitySlot.objects.filter(
+        is_booked=False,
+        start_time__gte=start_time,
+        end_time__lte=end_time,
+        educator__verification_status='verified',
+    )
+    if subject_id:
+        queryset = queryset.filter(educator__subjects=subject_id)
+    rows = queryset.order_by('educator_id', 'start_time').values_list(
+        'educator_id', 'start_time', 'end_time',
+        'educator__user__first_name', 'educator__user__last_name', 'educator__hourly_rate',
+    )
+
+    results = []
+    minimum = timedelta(minutes=min_minutes)
+
+    def flush(run):
+        if run and run['end_time'] - run['start_time'] >= minimum:
+            results.append(run)
+
+    run = None
+    for educator_id, start, end, first_name, last_name, hourly_rate in rows:
+        if run and run['educator_id'] == educator_id and run['end_time'] == start:
+            run['end_time'] = end
+            continue
+        flush(run)
+        run = {
+            'educator_id': educator_id,
+            'first_name': first_name,
+            'last_name': last_name,
+            'hourly_rate': hourly_rate,
+            'start_time': start,
+            'end_time': end,
+        }
+    flush(run)
+    return results
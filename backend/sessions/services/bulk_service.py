@@ -0,0 +1,149 @@
+"""Booking and updating many sessions per request.
+
+Both operations touch the database a constant number of times regardless of
+the number of sessions: one conflict query and one ``bulk_create`` for
+bookings, one read and one ``UPDATE ... WHERE id IN`` for status changes.
+``bulk_create`` and ``update()`` skip model signals, so the slot index and
+educator stats the signals normally maintain are updated here explicitly;
+status changes follow the rules of ``state_service``.
+"""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from sessions.events import sessions_booked
+from sessions.models import Session
+from sessions.services.availability_service import sync_slots_between
+from sessions.services.conflict_service import find_conflicts
+from sessions.services.state_service import TransitionError, check_transition, record_status_changes
+from users.models import Educator, Student
+
+MAX_BULK_SESSIONS = 200
+
+FREQUENCIES = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+}
+
+
+class BulkBookingError(Exception):
+    """Raised when some sessions of an all-or-nothing booking are invalid."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} session(s) could not be booked.")
+        self.errors = errors
+
+
+def expand_recurrence(start_time, end_time, frequency, interval=1, count=None, until=None):
+    """Return the ``(start, end)`` occurrences of a simple recurrence rule.
+
+    Occurrences repeat every ``interval`` days or weeks, ``count`` times or
+    while they start on or before the ``until`` date.
+    """
+    step = FREQUENCIES[frequency] * interval
+    slots = []
+    while len(slots) < (count or MAX_BULK_SESSIONS + 1):
+        if until is not None and timezone.localtime(start_time).date() > until:
+            break
+        slots.append((start_time, end_time))
+        start_time, end_time = start_time + step, end_time + step
+    return slots
+
+
+def _item_error(index, start_time, end_time, message, conflicts=()):
+    error = {'index': index, 'start_time': start_time, 'end_time': end_time, 'error': message}
+    if conflicts:
+        error['conflicts'] = list(conflicts)
+    return error
+
+
+def book_sessions(student, educator_id, subject_id, slots, allow_partial=False, **fields):
+    """Book many sessions between one student and one educator in a transaction.
+
+    Every slot is checked against existing bookings of both parties and
+    against the other slots of the request. Returns ``(sessions, errors)``;
+    unless ``allow_partial`` is set, any error raises ``BulkBookingError``
+    and nothing is created.
+    """
+    slots = list(slots)
+    with transaction.atomic():
+        # Same lock order as book_session so single and bulk bookings serialize
+        Educator.objects.select_for_update().only('pk').get(pk=educator_id)
+        Student.objects.select_for_update().only('pk').get(pk=student.pk)
+
+        errors = []
+        accepted = []
+        conflicts = find_conflicts(slots, educator_id=educator_id, student_id=student.pk)
+        for index in sorted(range(len(slots)), key=lambda i: slots[i]):
+            start_time, end_time = slots[index]
+            if conflicts[index]:
+                errors.append(_item_error(index, start_time, end_time,
+                                          "This time slot overlaps an existing session.", conflicts[index]))
+            elif accepted and accepted[-1][1] > start_time:
+                errors.append(_item_error(index, start_time, end_time,
+                                          "This time slot overlaps another session in the request."))
+            else:
+                accepted.append((start_time, end_time))
+        errors.sort(key=lambda error: error['index'])
+
+        if errors and not allow_partial:
+            raise BulkBookingError(errors)
+        if not accepted:
+            return [], errors
+
+        booked = Session.objects.filter(educator_id=educator_id, student=student)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # Both parties are locked, so their new sessions are the ones after this id
+            last_id = booked.aggregate(last=Max('pk'))['last'] or 0
+        sessions = Session.objects.bulk_create([
+            Session(student=student, educator_id=educator_id, subject_id=subject_id,
+                    start_time=start_time, end_time=end_time, **fields)
+            for start_time, end_time in accepted
+        ])
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # MySQL does not report the generated ids
+            sessions = list(booked.filter(pk__gt=last_id).order_by('start_time'))
+
+        sync_slots_between(educator_id, accepted[0][0], accepted[-1][1])
+        sessions_booked.send(sender=Session, sessions=sessions)
+    return sessions, errors
+
+
+def bulk_update_status(educator, session_ids, status):
+    """Set ``status`` on many of the educator's sessions with a single UPDATE.
+
+    Returns ``(updated_ids, unchanged_ids, errors)``; sessions already in
+    ``status`` are left untouched, and unknown ids and sessions the state
+    machine does not allow to move to ``status`` are reported as errors.
+    """
+    session_ids = list(dict.fromkeys(session_ids))
+    with transaction.atomic():
+        current = {
+            pk: (old_status, version, start_time, end_time)
+            for pk, old_status, version, start_time, end_time in Session.objects.select_for_update()
+            .filter(educator=educator, id__in=session_ids)
+            .values_list('id', 'status', 'version', 'start_time', 'end_time')
+        }
+        errors, unchanged, updated = [], [], []
+        for pk in session_ids:
+            if pk not in current:
+                errors.append({'id': pk, 'error': "Session not found."})
+                continue
+            try:
+                check_transition(current[pk][0], status)
+            except TransitionError as exc:
+                errors.append({'id': pk, 'error': str(exc)})
+                continue
+            (unchanged if current[pk][0] == status else updated).append(pk)
+        if not updated:
+            return updated, unchanged, errors
+
+        Session.objects.filter(id__in=updated).update(
+            status=status, version=F('version') + 1, updated_at=timezone.now()
+        )
+        record_status_changes(educator.pk, status, [
+            (pk, current[pk][0], current[pk][1] + 1, *current[pk][2:]) for pk in updated
+        ])
+    return updated, unchanged, errors
@@ -0,0 +1,101 @@
+"""Interval conflict checks for session bookings.
+
+Overlap is tested with the half-open interval rule
+``existing.start_time < end_time AND existing.end_time > start_time``, which is
+served by the ``(educator|student, start_time, end_time)`` composite indexes
+on ``Session``.
+"""
+from bisect import bisect_left
+
+from django.db import transaction
+from django.db.models import Q
+
+from sessions.events import sessions_booked
+from sessions.models import Session
+from users.models import Educator, Student
+
+# Statuses that keep a time slot occupied
+BLOCKING_STATUSES = ('pending', 'confirmed', 'completed')
+
+
+class SessionConflictError(Exception):
+    """Raised when a booking overlaps an existing session."""
+
+    def __init__(self, conflicts):
+        self.conflicts = list(conflicts)
+        super().__init__(f"Session overlaps {len(self.conflicts)} existing session(s).")
+
+
+def overlapping_sessions(start_time, end_time, educator_id=None, student_id=None):
+    """Return blocking sessions of the educator or student overlapping the interval.
+
+    Both owners are checked by one range query.
+    """
+    owners = Q()
+    if educator_id is not None:
+        owners |= Q(educator_id=educator_id)
+    if student_id is not None:
+        owners |= Q(student_id=student_id)
+    if not owners:
+        return Session.objects.none()
+    return Session.objects.filter(
+        owners,
+        start_time__lt=end_time,
+        end_time__gt=start_time,
+        status__in=BLOCKING_STATUSES,
+    )
+
+
+def find_conflicts(slots, educator_id=None, student_id=None):
+    """Check many candidate ``(start_time, end_time)`` slots at once.
+
+    Fetches every blocking session intersecting the envelope of all slots in a
+    single range query, then matches slots against them in memory. Returns a
+    list with the ids of the conflicting sessions for each slot, in order.
+    """
+    slots = list(slots)
+    if not slots:
+        return []
+
+    envelope_start = min(start for start, end in slots)
+    envelope_end = max(end for start, end in slots)
+    booked = sorted(
+        overlapping_sessions(envelope_start, envelope_end, educator_id, student_id)
+        .values_list('start_time', 'end_time', 'id')
+    )
+    starts = [start for start, end, pk in booked]
+
+    conflicts = []
+    for start, end in slots:
+        # Only sessions starting before the slot ends can overlap it
+        candidates = range(bisect_left(starts, end))
+        conflicts.append([booked[i][2] for i in candidates if booked[i][1] > start])
+    return conflicts
+
+
+def book_session(student, educator_id, subject_id, start_time, end_time, **fields):
+    """Create a session after checking for overlaps, serialized per educator.
+
+    The educator and student rows are locked for the duration of the check and
+    insert so concurrent bookings for the same educator cannot both succeed.
+    """
+    with transaction.atomic():
+        Educator.objects.select_for_update().only('pk').get(pk=educator_id)
+        Student.objects.select_for_update().only('pk').get(pk=student.pk)
+
+        conflicts = list(overlapping_sessions(
+            start_time, end_time, educator_id=educator_id, student_id=student.pk
+        ).values_list('id', flat=True))
+        if conflicts:
+            raise SessionConflictError(conflicts)
+
+        session = Session.objects.create(
+            student=student,
+            educator_id=educator_id,
+            subject_id=subject_id,
+            start_time=start_time,
+            end_time=end_time,
+            **fields
+        )
+        sessions_booked.send(sender=Session, sessions=[session])
+        return session
@@ -0,0 +1,115 @@
+"""Session status state machine with optimistic locking.
+
+A session goes ``pending`` -> ``confirmed`` -> ``completed`` and can be
+``canceled`` until it is completed; ``completed`` and ``canceled`` are final.
+Asking for the status a session already has is a no-op, so a repeated
+request does no harm.
+
+Every change is a single conditional ``UPDATE ... SET status, version,
+updated_at WHERE id = <id> AND status = <old> AND version = <n>``. When an
+educator and a payment worker change the same session concurrently, the
+loser's UPDATE matches no row. The loser re-reads status and version and
+checks its transition again against the winner's status, instead of
+overwriting it. A caller passing the ``version`` its client read gets
+``TransitionConflict`` rather than a retry.
+
+``update()`` skips model signals, so the slot index and educator stats are
+maintained here (for ``bulk_service`` too), and ``session_status_changed``
+is sent in the same transaction.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from sessions.events import session_status_changed
+from sessions.models import Session
+from sessions.services.availability_service import sync_slots_between
+from sessions.services.conflict_service import BLOCKING_STATUSES
+from users.services.stats_service import record_completed_session
+
+TRANSITIONS = {
+    'pending': {'confirmed', 'canceled'},
+    'confirmed': {'completed', 'canceled'},
+    'completed': set(),
+    'canceled': set(),
+}
+
+# Re-reads after losing a race before giving up
+MAX_RETRIES = 5
+
+
+class TransitionError(Exception):
+    """Raised for a status change the state machine does not allow."""
+
+
+class TransitionConflict(Exception):
+    """Raised when a session changed since the version the caller read."""
+
+
+def check_transition(old_status, status):
+    """Raise ``TransitionError`` unless a session may go from ``old_status`` to ``status``."""
+    if status not in TRANSITIONS:
+        raise TransitionError(f"Unknown status '{status}'.")
+    if status != old_status and status not in TRANSITIONS[old_status]:
+        raise TransitionError(f"A {old_status} session cannot be {status}.")
+
+
+def transition_session(session, status, version=None):
+    """Move ``session`` to ``status``; returns False when it already had that status.
+
+    ``session`` needs ``status``, ``version``, ``educator_id``, ``start_time``
+    and ``end_time`` loaded and is updated in place. With ``version``, the
+    change is refused with ``TransitionConflict`` if the session is at another
+    version; otherwise a concurrent change is re-read and the transition
+    checked again, up to ``MAX_RETRIES`` times.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        check_transition(session.status, status)
+        if session.status == status:
+            return False
+        if version is not None and version != session.version:
+            raise TransitionConflict("The session changed since it was read.")
+
+        old_status, now = session.status, timezone.now()
+        with transaction.atomic():
+            updated = Session.objects.filter(
+                pk=session.pk, status=old_status, version=session.version,
+            ).update(status=status, version=F('version') + 1, updated_at=now)
+            if updated:
+                record_status_changes(session.educator_id, status, [
+                    (session.pk, old_status, session.version + 1, session.start_time, session.end_time),
+                ])
+        if updated:
+            session.status, session.version, session.updated_at = status, session.version + 1, now
+            session._loaded_status = status
+            return True
+
+        current = Session.objects.filter(pk=session.pk).values_list('status', 'version').first()
+        if current is None:
+            raise Session.DoesNotExist("The session no longer exists.")
+        session.status, session.version = current
+        session._loaded_status = session.status
+    raise TransitionConflict("The session kept changing; try again.")
+
+
+def record_status_changes(educator_id, status, changes):
+    """Apply the side effects of sessions of one educator moving to ``status``.
+
+    ``changes`` are ``(session id, old status, new version, start, end)``
+    tuples. Must run in the transaction that changed the sessions.
+    """
+    completed_delta = sum((status == 'completed') - (old_status == 'completed')
+                          for pk, old_status, version, start, end in changes)
+    if completed_delta:
+        record_completed_session(educator_id, completed_delta)
+
+    # Only sessions whose blocking state flipped affect the slot index
+    flipped = [(start, end) for pk, old_status, version, start, end in changes
+               if (old_status in BLOCKING_STATUSES) != (status in BLOCKING_STATUSES)]
+    if flipped:
+        sync_slots_between(educator_id, min(start for start, end in flipped),
+                           max(end for start, end in flipped))
+
+    session_status_changed.send(sender=Session, educator_id=educator_id, status=status, changes=[
+        (pk, old_status, version) for pk, old_status, version, start, end in changes
+    ])
@@ -0,0 +1,54 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from sessions.models import AvailabilityException, AvailabilityWindow, Review, Session
+from sessions.services.availability_service import rebuild_slots, sync_session_slots
+from users.services.stats_service import record_completed_session, record_review
+
+
+@receiver(post_save, sender=Session)
+def update_slots_on_session_save(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the slot index in sync when a session is booked or changes status."""
+    if created or update_fields is None or 'status' in update_fields:
+        sync_session_slots(instance)
+
+
+@receiver(post_delete, sender=Session)
+def update_slots_on_session_delete(sender, instance, **kwargs):
+    sync_session_slots(instance)
+
+
+@receiver(post_save, sender=AvailabilityWindow)
+@receiver(post_delete, sender=AvailabilityWindow)
+@receiver(post_save, sender=AvailabilityException)
+@receiver(post_delete, sender=AvailabilityException)
+def rebuild_slots_on_availability_change(sender, instance, **kwargs):
+    """Regenerate the educator's slots when their availability changes."""
+    rebuild_slots([instance.educator_id])
+
+
+@receiver(post_save, sender=Session)
+def update_stats_on_session_save(sender, instance, created, **kwargs):
+    """Count sessions entering or leaving the 'completed' status."""
+    was_completed = not created and getattr(instance, '_loaded_status', None) == 'completed'
+    is_completed = instance.status == 'completed'
+    if was_completed != is_completed:
+        record_completed_session(instance.educator_id, 1 if is_completed else -1)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Session)
+def update_stats_on_session_delete(sender, instance, **kwargs):
+    if getattr(instance, '_loaded_status', instance.status) == 'completed':
+        record_completed_session(instance.educator_id, -1)
+
+
+@receiver(post_save, sender=Review)
+def update_stats_on_review_create(sender, instance, created, **kwargs):
+    if created:
+        record_review(instance.educator_id, instance.rating)
+
+
+@receiver(post_delete, sender=Review)
+def update_stats_on_review_delete(sender, instance, **kwargs):
+    record_review(instance.educator_id, instance.rating, sign=-1)
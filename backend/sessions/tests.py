@@ -1,3 +1,749 @@
-from django.test import TestCase
+import threading
+from time import sleep
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from common.testing import QueryCountMixin, make_educator, make_session, make_student, make_subject
+from sessions.models import (
+    AvailabilityException, AvailabilitySlot, AvailabilityWindow, Review, Session
+)
+from sessions.services.availability_service import search_free_slots
+from sessions.services.conflict_service import SessionConflictError, book_session, find_conflicts
+from sessions.services.state_service import TransitionConflict, TransitionError, transition_session
+from sessions.events import session_status_changed, sessions_booked
+from users.models import EducatorStats
+
+
+class SessionQueryCountTests(QueryCountMixin, TestCase):
+    """The number of queries must not grow with the number of sessions returned."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.educator = make_educator(subjects=[cls.subject])
+
+    def add_sessions(self, count, **fields):
+        sessions = []
+        for i in range(count):
+            educator = make_educator(subjects=[self.subject, make_subject()])
+            session = make_session(self.student, educator, self.subject,
+                                   minutes=30 + i, **fields)
+            sessions.append(session)
+        return sessions
+
+    def test_my_sessions_query_count_is_constant(self):
+        url = reverse('sessions:my_sessions')
+        self.add_sessions(1)
+        baseline = self.count_queries(url)
+        self.add_sessions(9)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_session_detail_query_count(self):
+        session = self.add_sessions(1, status='completed')[0]
+        Review.objects.create(session=session, rating=5)
+        url = reverse('sessions:session_detail', args=[session.pk])
+        # Session (with student, educator, users, subject and review joined),
+        # student favorite subjects and educator subjects.
+        self.assertEqual(self.count_queries(url), 3)
+
+    def test_educator_reviews_query_count_is_constant(self):
+        url = reverse('sessions:educator_reviews', args=[self.educator.pk])
+
+        def add_reviews(count):
+            for i in range(count):
+                session = make_session(self.student, self.educator, self.subject,
+                                       status='completed')
+                Review.objects.create(session=session, rating=4)
+
+        add_reviews(1)
+        baseline = self.count_queries(url)
+        add_reviews(9)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_educator_reviews_embed_reviewer_and_subject(self):
+        session = make_session(self.student, self.educator, self.subject, status='completed')
+        review = Review.objects.create(session=session, rating=4, comment='Great')
+        self.assertEqual((review.educator_id, review.student_id, review.subject_id),
+                         (self.educator.pk, self.student.pk, self.subject.pk))
+
+        url = reverse('sessions:educator_reviews', args=[self.educator.pk])
+        # Reviews with the student, user and subject joined; no session join
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(len(context), 1)
+        self.assertNotIn('learning_sessions_session', context.captured_queries[0]['sql'])
+        result = response.data['results'][0]
+        self.assertEqual(result['reviewer']['id'], self.student.pk)
+        self.assertEqual(result['reviewer']['first_name'], self.student.user.first_name)
+        self.assertEqual(result['subject'], {'id': self.subject.pk, 'name': self.subject.name, 'icon': None})
+
+
+class SessionPaginationTests(TestCase):
+    """Keyset pagination of the user's sessions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[cls.subject])
+        start = timezone.now() + timedelta(days=1)
+        for i in range(25):
+            make_session(cls.student, cls.educator, cls.subject,
+                         start_time=start + timedelta(hours=i), minutes=30)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def test_pages_cover_every_session_once_in_order(self):
+        url = reverse('sessions:my_sessions') + '?page_size=10'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 10)
+            seen.extend(session['start_time'] for session in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_deep_page_costs_the_same_as_the_first(self):
+        first = reverse('sessions:my_sessions') + '?page_size=5'
+        with CaptureQueriesContext(connection) as first_page:
+            response = self.client.get(first)
+        url = response.data['next']
+        for i in range(3):
+            url = self.client.get(url).data['next']
+        with CaptureQueriesContext(connection) as deep_page:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(len(deep_page), len(first_page))
+
+
+class CompactSessionListTests(TestCase):
+    """``?view=compact`` returns ids plus each related object once in ``included``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[cls.subject])
+        other = make_educator(subjects=[cls.subject])
+        start = timezone.now() + timedelta(days=1)
+        for i in range(6):
+            make_session(cls.student, other if i == 0 else cls.educator, cls.subject,
+                         start_time=start + timedelta(hours=i), status='completed')
+        Review.objects.create(session=Session.objects.get(educator=other), rating=5, comment='Great')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def test_compact_page_matches_full_page(self):
+        url = reverse('sessions:my_sessions')
+        full = self.client.get(url).json()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, {'view': 'compact'})
+        self.assertEqual(len(context), 1)
+        compact = response.json()
+        included = compact['included']
+
+        self.assertEqual([row['id'] for row in compact['results']], [row['id'] for row in full['results']])
+        self.assertEqual(len(included['educators']), 2)
+        self.assertEqual(len(included['users']), 3)
+        self.assertEqual(list(included['reviews'].values())[0]['comment'], 'Great')
+        for row, expected in zip(compact['results'], full['results']):
+            educator = included['educators'][str(row['educator'])]
+            user = included['users'][str(educator['user'])]
+            self.assertEqual(educator['hourly_rate'], expected['educator']['hourly_rate'])
+            self.assertEqual(user['last_name'], expected['educator']['user']['last_name'])
+            self.assertEqual(included['subjects'][str(row['subject'])]['name'], expected['subject']['name'])
+            for field in ('start_time', 'status', 'duration_minutes', 'session_cost'):
+                self.assertEqual(row[field], expected[field])
+            self.assertEqual(row['review'], expected['review'] and expected['review']['id'])
+
+    def test_compact_pages_follow_cursor(self):
+        url = reverse('sessions:my_sessions') + '?view=compact&page_size=4'
+        first = self.client.get(url).json()
+        second = self.client.get(first['next']).json()
+        self.assertEqual(len(first['results']) + len(second['results']), 6)
+        self.assertIn('view=compact', first['next'])
+        self.assertEqual(len(first['included']['educators']), 1)
+
+
+class SessionCostTests(TestCase):
+    """Duration and cost computed in SQL by ``SessionQuerySet.with_cost()``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[cls.subject], hourly_rate=Decimal('30.00'))
+
+    def test_with_cost_matches_python_fallback(self):
+        session = make_session(self.student, self.educator, self.subject, minutes=90)
+        annotated = Session.objects.with_cost().get(pk=session.pk)
+        self.assertEqual(annotated.duration_minutes, 90)
+        self.assertEqual(annotated.session_cost, Decimal('45.00'))
+        self.assertEqual(session.duration_minutes, 90)
+        self.assertEqual(session.session_cost, Decimal('45.00'))
+
+    def test_duration_longer_than_a_day(self):
+        session = make_session(self.student, self.educator, self.subject, minutes=25 * 60)
+        annotated = Session.objects.with_cost().get(pk=session.pk)
+        self.assertEqual(annotated.duration_minutes, 1500)
+        self.assertEqual(annotated.session_cost, Decimal('750.00'))
+        self.assertEqual(session.duration_minutes, 1500)
+
+    def test_cost_does_not_fetch_educator(self):
+        for minutes in (30, 60, 120):
+            make_session(self.student, self.educator, self.subject, minutes=minutes)
+        with self.assertNumQueries(1):
+            costs = [session.session_cost for session in Session.objects.with_cost()]
+        self.assertEqual(sorted(costs), [Decimal('15.00'), Decimal('30.00'), Decimal('60.00')])
+
+    def test_cost_summary(self):
+        for minutes in (30, 60, 120):
+            make_session(self.student, self.educator, self.subject, minutes=minutes)
+        with self.assertNumQueries(1):
+            summary = Session.objects.filter(educator=self.educator).cost_summary()
+        self.assertEqual(summary['session_count'], 3)
+        self.assertEqual(summary['total_minutes'], 210)
+        self.assertEqual(summary['total_cost'], Decimal('105.00'))
+
+    def test_cost_summary_of_empty_queryset(self):
+        summary = Session.objects.none().cost_summary()
+        self.assertEqual(summary['total_cost'], Decimal('0.00'))
+
+    def test_my_sessions_returns_annotated_cost(self):
+        make_session(self.student, self.educator, self.subject, minutes=45)
+        client = APIClient()
+        client.force_authenticate(self.student.user)
+        response = client.get(reverse('sessions:my_sessions'))
+        self.assertEqual(response.data['results'][0]['duration_minutes'], 45)
+        self.assertEqual(Decimal(response.data['results'][0]['session_cost']), Decimal('22.50'))
+
+
+class SessionBookingConflictTests(TestCase):
+    """Overlap detection for session bookings."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[cls.subject])
+        cls.start = timezone.now().replace(microsecond=0) + timedelta(days=2)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def book(self, start, minutes=60, educator=None):
+        return self.client.post(reverse('sessions:session_create'), {
+            'educator_id': (educator or self.educator).pk,
+            'subject_id': self.subject.pk,
+            'start_time': start.isoformat(),
+            'end_time': (start + timedelta(minutes=minutes)).isoformat(),
+        })
+
+    def test_overlapping_booking_is_rejected(self):
+        self.assertEqual(self.book(self.start).status_code, 201)
+        response = self.book(self.start + timedelta(minutes=30))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data['conflicts']), 1)
+        self.assertEqual(Session.objects.count(), 1)
+
+    def test_adjacent_booking_is_allowed(self):
+        self.assertEqual(self.book(self.start).status_code, 201)
+        self.assertEqual(self.book(self.start + timedelta(minutes=60)).status_code, 201)
+
+    def test_student_overlap_with_another_educator_is_rejected(self):
+        self.assertEqual(self.book(self.start).status_code, 201)
+        other = make_educator(subjects=[self.subject])
+        self.assertEqual(self.book(self.start, educator=other).status_code, 400)
+
+    def test_canceled_session_frees_the_slot(self):
+        make_session(self.student, self.educator, self.subject,
+                     start_time=self.start, status='canceled')
+        self.assertEqual(self.book(self.start).status_code, 201)
+
+    def test_end_before_start_is_rejected(self):
+        self.assertEqual(self.book(self.start, minutes=-30).status_code, 400)
+
+    def test_find_conflicts_uses_one_query(self):
+        booked = make_session(make_student(), self.educator, self.subject,
+                              start_time=self.start, minutes=60)
+        slots = [
+            (self.start - timedelta(hours=1), self.start),
+            (self.start + timedelta(minutes=30), self.start + timedelta(minutes=90)),
+            (self.start + timedelta(hours=2), self.start + timedelta(hours=3)),
+            (self.start - timedelta(hours=2), self.start + timedelta(hours=4)),
+        ]
+        with self.assertNumQueries(1):
+            conflicts = find_conflicts(slots, educator_id=self.educator.pk)
+        self.assertEqual(conflicts, [[], [booked.pk], [], [booked.pk]])
+
+    def test_check_slots_endpoint(self):
+        booked = make_session(self.student, make_educator(), self.subject, start_time=self.start)
+        response = self.client.post(reverse('sessions:session_check_slots'), {
+            'educator_id': self.educator.pk,
+            'slots': [
+                {'start_time': self.start, 'end_time': self.start + timedelta(minutes=30)},
+                {'start_time': self.start + timedelta(hours=1), 'end_time': self.start + timedelta(hours=2)},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([slot['available'] for slot in response.data], [False, True])
+        self.assertEqual(response.data[0]['conflicts'], [booked.pk])
+
+
+@override_settings(OUTBOX={'IN_PROCESS': False})
+class ConcurrentBookingTests(TransactionTestCase):
+    """Parallel bookings for one educator must never produce overlapping sessions."""
+
+    def test_parallel_bookings_do_not_overlap(self):
+        subject = make_subject()
+        educator = make_educator(subjects=[subject])
+        students = [make_student() for i in range(8)]
+        start = timezone.now() + timedelta(days=3)
+        barrier = threading.Barrier(len(students))
+        results = []
+
+        def attempt(student, offset):
+            slot_start = start + timedelta(minutes=offset)
+            barrier.wait()
+            try:
+                for retry in range(50):
+                    try:
+                        book_session(student, educator.pk, subject.pk,
+                                     slot_start, slot_start + timedelta(minutes=60))
+                        results.append('booked')
+                        return
+                    except OperationalError:
+                        # SQLite reports lock contention instead of blocking
+                        sleep(0.01)
+                results.append('gave up')
+            except SessionConflictError:
+                results.append('rejected')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(student, i * 15))
+                   for i, student in enumerate(students)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), len(students))
+        self.assertIn('booked', results)
+        sessions = list(Session.objects.filter(educator=educator).order_by('start_time'))
+        self.assertEqual(len(sessions), results.count('booked'))
+        for previous, current in zip(sessions, sessions[1:]):
+            self.assertLessEqual(previous.end_time, current.start_time)
+
+
+class AvailabilitySlotIndexTests(TestCase):
+    """Slot index materialization and free-slot search."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.other_subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[cls.subject])
+        # Next Tuesday, so the whole day is inside the horizon
+        today = timezone.localdate()
+        cls.tuesday = today + timedelta(days=(1 - today.weekday()) % 7 or 7)
+
+    def at(self, hour, minute=0, day=None):
+        return timezone.make_aware(datetime.combine(day or self.tuesday, time(hour, minute)))
+
+    def add_window(self, educator=None, start=9, end=17):
+        return AvailabilityWindow.objects.create(
+            educator=educator or self.educator, weekday=1, start_time=time(start), end_time=time(end)
+        )
+
+    def test_window_materializes_slots(self):
+        self.add_window()
+        slots = AvailabilitySlot.objects.filter(educator=self.educator, start_time__date=self.tuesday)
+        self.assertEqual(slots.count(), 16)
+        self.assertFalse(slots.filter(is_booked=True).exists())
+
+    def test_booking_and_cancellation_update_slots(self):
+        self.add_window()
+        session = make_session(self.student, self.educator, self.subject,
+                               start_time=self.at(14), minutes=60)
+        booked = AvailabilitySlot.objects.filter(educator=self.educator, is_booked=True)
+        self.assertEqual([slot.start_time for slot in booked], [self.at(14), self.at(14, 30)])
+
+        session.status = 'canceled'
+        session.save()
+        self.assertFalse(AvailabilitySlot.objects.filter(educator=self.educator, is_booked=True).exists())
+
+    def test_existing_sessions_are_booked_on_rebuild(self):
+        make_session(self.student, self.educator, self.subject, start_time=self.at(10), minutes=30)
+        self.add_window()
+        self.assertEqual(
+            list(AvailabilitySlot.objects.filter(is_booked=True).values_list('start_time', flat=True)),
+            [self.at(10)],
+        )
+
+    def test_exception_blocks_time_off(self):
+        self.add_window()
+        AvailabilityException.objects.create(
+            educator=self.educator, date=self.tuesday, start_time=time(12), end_time=time(13)
+        )
+        slots = AvailabilitySlot.objects.filter(educator=self.educator, start_time__date=self.tuesday)
+        self.assertEqual(slots.count(), 14)
+        self.assertFalse(slots.filter(start_time=self.at(12)).exists())
+
+    def test_whole_day_exception(self):
+        self.add_window()
+        AvailabilityException.objects.create(educator=self.educator, date=self.tuesday)
+        self.assertFalse(AvailabilitySlot.objects.filter(start_time__date=self.tuesday).exists())
+
+    def test_search_free_slots(self):
+        self.add_window()
+        busy = make_educator(subjects=[self.subject])
+        self.add_window(busy)
+        make_session(self.student, busy, self.subject, start_time=self.at(15), minutes=30)
+        unverified = make_educator(subjects=[self.subject], verification_status='pending')
+        self.add_window(unverified)
+        other = make_educator(subjects=[self.other_subject])
+        self.add_window(other)
+
+        with self.assertNumQueries(1):
+            results = search_free_slots(self.at(14), self.at(16), subject_id=self.subject.pk, min_minutes=120)
+        self.assertEqual([result['educator_id'] for result in results], [self.educator.pk])
+        self.assertEqual((results[0]['start_time'], results[0]['end_time']), (self.at(14), self.at(16)))
+
+        results = search_free_slots(self.at(14), self.at(16), subject_id=self.subject.pk)
+        self.assertEqual(
+            [(result['educator_id'], result['start_time']) for result in results],
+            [(self.educator.pk, self.at(14)), (busy.pk, self.at(14)), (busy.pk, self.at(15, 30))],
+        )
+
+    def test_free_slots_endpoint(self):
+        self.add_window()
+        client = APIClient()
+        client.force_authenticate(self.student.user)
+        response = client.get(reverse('sessions:free_slots'), {
+            'start_time': self.at(14).isoformat(),
+            'end_time': self.at(16).isoformat(),
+            'subject_id': self.subject.pk,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['educator_id'], self.educator.pk)
+
+    def test_educator_manages_windows(self):
+        client = APIClient()
+        client.force_authenticate(self.educator.user)
+        response = client.post(reverse('sessions:availability_list'),
+                               {'weekday': 1, 'start_time': '09:00', 'end_time': '10:00'})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(AvailabilitySlot.objects.filter(start_time=self.at(9)).exists())
+
+        client.delete(reverse('sessions:availability_detail', args=[response.data['id']]))
+        self.assertFalse(AvailabilitySlot.objects.filter(educator=self.educator).exists())
+
+
+class BulkSessionTests(TestCase):
+    """Bulk booking and status updates use a constant number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[cls.subject])
+        cls.start = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def weekly(self, count, **extra):
+        return {
+            'educator_id': self.educator.id,
+            'subject_id': self.subject.id,
+            'recurrence': {
+                'start_time': self.start.isoformat(),
+                'end_time': (self.start + timedelta(hours=1)).isoformat(),
+                'frequency': 'weekly',
+                'count': count,
+            },
+            **extra,
+        }
+
+    def test_recurrence_books_in_constant_queries(self):
+        self.client.force_authenticate(self.student.user)
+        url = reverse('sessions:session_bulk_create')
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.post(url, self.weekly(2), format='json').status_code, 201)
+        Session.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(url, self.weekly(16), format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data['created']), 16)
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(Session.objects.filter(student=self.student).count(), 16)
+
+    def test_educator_books_for_student(self):
+        self.client.force_authenticate(self.educator.user)
+        data = self.weekly(3, student_id=self.student.id)
+        del data['educator_id']
+        response = self.client.post(reverse('sessions:session_bulk_create'), data, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Session.objects.filter(educator=self.educator, student=self.student).count(), 3)
+
+    def test_conflicts_are_reported_per_item(self):
+        existing = make_session(self.student, self.educator, self.subject,
+                                start_time=self.start + timedelta(weeks=1))
+        self.client.force_authenticate(self.student.user)
+        url = reverse('sessions:session_bulk_create')
+
+        response = self.client.post(url, self.weekly(3), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([(e['index'], e['conflicts']) for e in response.data['errors']], [(1, [existing.id])])
+        self.assertEqual(Session.objects.count(), 1)
+
+        response = self.client.post(url, self.weekly(3, allow_partial=True), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+
+    def test_bulk_insert_without_returned_ids_returns_only_new_sessions(self):
+        canceled = make_session(self.student, self.educator, self.subject, start_time=self.start, status='canceled')
+        received = []
+
+        def receiver(sender, sessions, **kwargs):
+            received.extend(session.pk for session in sessions)
+
+        sessions_booked.connect(receiver, sender=Session)
+        self.addCleanup(sessions_booked.disconnect, receiver, sender=Session)
+        self.client.force_authenticate(self.student.user)
+        # As on MySQL, which does not report the ids of bulk inserted rows
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            response = self.client.post(reverse('sessions:session_bulk_create'), self.weekly(2), format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        created = [session['id'] for session in response.data['created']]
+        self.assertEqual(len(created), 2)
+        self.assertNotIn(canceled.pk, created)
+        self.assertEqual(received, created)
+
+    def test_overlaps_within_the_request_are_rejected(self):
+        self.client.force_authenticate(self.student.user)
+        slot = {'start_time': self.start.isoformat(), 'end_time': (self.start + timedelta(hours=1)).isoformat()}
+        response = self.client.post(reverse('sessions:session_bulk_create'), {
+            'educator_id': self.educator.id, 'subject_id': self.subject.id, 'sessions': [slot, slot],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+
+    def test_bulk_status_update_is_a_single_update(self):
+        other_educator = make_educator()
+        sessions = [make_session(self.student, self.educator, self.subject,
+                                 start_time=self.start + timedelta(days=n), status='confirmed') for n in range(5)]
+        foreign = make_session(self.student, other_educator, self.subject)
+        self.client.force_authenticate(self.educator.user)
+        ids = [session.id for session in sessions]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(reverse('sessions:session_bulk_status'),
+                                         {'ids': ids + [foreign.id], 'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data['updated']), ids)
+        self.assertEqual(response.data['errors'], [{'id': foreign.id, 'error': 'Session not found.'}])
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "learning_sessions_session"')
+                             for query in context.captured_queries), 1)
+        self.assertEqual(Session.objects.filter(status='completed').count(), 5)
+        self.assertEqual(EducatorStats.objects.get(educator=self.educator).session_count, 5)
+
+        response = self.client.patch(reverse('sessions:session_bulk_status'),
+                                     {'ids': ids[:2], 'status': 'completed'}, format='json')
+        self.assertEqual(response.data['unchanged'], ids[:2])
+
+    def test_bulk_status_update_follows_transitions(self):
+        pending = make_session(self.student, self.educator, self.subject, start_time=self.start)
+        canceled = make_session(self.student, self.educator, self.subject,
+                                start_time=self.start + timedelta(days=1), status='canceled')
+        self.client.force_authenticate(self.educator.user)
+        response = self.client.patch(reverse('sessions:session_bulk_status'),
+                                     {'ids': [pending.id, canceled.id], 'status': 'confirmed'}, format='json')
+        self.assertEqual(response.data['updated'], [pending.id])
+        self.assertEqual(response.data['errors'], [{'id': canceled.id,
+                                                    'error': 'A canceled session cannot be confirmed.'}])
+        pending.refresh_from_db()
+        self.assertEqual((pending.status, pending.version), ('confirmed', 1))
+
+
+class SessionStateMachineTests(TestCase):
+    """Status changes follow the allowed transitions and are conditional on the version."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[cls.subject])
+
+    def setUp(self):
+        self.session = make_session(self.student, self.educator, self.subject)
+        self.client = APIClient()
+        self.client.force_authenticate(self.educator.user)
+        self.url = reverse('sessions:session_update_status', args=[self.session.pk])
+
+    def test_transition_is_one_conditional_update(self):
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(transition_session(self.session, 'confirmed'))
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"version" = ', updates[0].split('WHERE')[1])
+        self.assertNotIn('session_notes', updates[0])
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.status, self.session.version), ('confirmed', 1))
+
+    def test_disallowed_transitions_are_rejected(self):
+        transition_session(self.session, 'canceled')
+        with self.assertRaises(TransitionError):
+            transition_session(self.session, 'confirmed')
+        response = self.client.patch(self.url, {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Session.objects.get(pk=self.session.pk).status, 'canceled')
+
+    def test_repeated_request_is_a_no_op(self):
+        self.assertEqual(self.client.patch(self.url, {'status': 'confirmed'}, format='json').data['version'], 1)
+        with self.assertNumQueries(1):
+            response = self.client.patch(self.url, {'status': 'confirmed', 'version': 0}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['version'], 1)
+
+    def test_stale_version_is_a_conflict(self):
+        transition_session(Session.objects.get(pk=self.session.pk), 'confirmed')
+        response = self.client.patch(self.url, {'status': 'canceled', 'version': 0}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['version'], 1)
+        response = self.client.patch(self.url, {'status': 'canceled', 'version': 1}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_stale_instance_is_re_read_and_rechecked(self):
+        stale = Session.objects.get(pk=self.session.pk)
+        transition_session(self.session, 'confirmed')
+        self.assertTrue(transition_session(stale, 'canceled'))
+        self.assertEqual((stale.status, stale.version), ('canceled', 2))
+
+        stale = make_session(self.student, self.educator, self.subject, status='confirmed')
+        Session.objects.filter(pk=stale.pk).update(status='canceled', version=1)
+        with self.assertRaises(TransitionError):
+            transition_session(stale, 'completed')
+        self.assertEqual((stale.status, stale.version), ('canceled', 1))
+
+    def test_transitions_update_stats_and_send_events(self):
+        events = []
+        receiver = lambda sender, **kwargs: events.append(kwargs)  # noqa: E731
+        session_status_changed.connect(receiver)
+        self.addCleanup(session_status_changed.disconnect, receiver)
+
+        transition_session(self.session, 'confirmed')
+        transition_session(self.session, 'completed')
+        self.assertEqual([(event['status'], event['changes']) for event in events], [
+            ('confirmed', [(self.session.pk, 'pending', 1)]),
+            ('completed', [(self.session.pk, 'confirmed', 2)]),
+        ])
+        self.assertEqual(events[0]['educator_id'], self.educator.pk)
+        self.assertEqual(EducatorStats.objects.get(educator=self.educator).session_count, 1)
+
+
+@override_settings(OUTBOX={'IN_PROCESS': False})
+class ConcurrentTransitionTests(TransactionTestCase):
+    """Racing status changes of one session never overwrite each other."""
+
+    def test_racing_transitions_apply_exactly_one_outcome(self):
+        subject = make_subject()
+        educator = make_educator(subjects=[subject])
+        session = make_session(make_student(), educator, subject, status='confirmed')
+        # Half of the writers complete the session, the others cancel it
+        targets = ['completed', 'canceled'] * 4
+        barrier = threading.Barrier(len(targets))
+        results = []
+
+        def attempt(target):
+            stale = Session.objects.get(pk=session.pk)
+            barrier.wait()
+            try:
+                for retry in range(50):
+                    try:
+                        results.append((target, transition_session(stale, target)))
+                        return
+                    except OperationalError:
+                        # SQLite reports lock contention instead of blocking
+                        sleep(0.01)
+                results.append((target, 'gave up'))
+            except (TransitionError, TransitionConflict):
+                results.append((target, 'rejected'))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(target,)) for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        session.refresh_from_db()
+        winners = [target for target, outcome in results if outcome is True]
+        self.assertEqual(len(results), len(targets))
+        self.assertEqual(winners, [session.status])
+        self.assertEqual(session.version, 1)
+        # Writers of the winning status see a no-op, the others a refused transition
+        for target, outcome in results:
+            if target != session.status:
+                self.assertEqual(outcome, 'rejected')
+            else:
+                self.assertIn(outcome, (True, False))
+        expected = 1 if session.status == 'completed' else 0
+        self.assertEqual(EducatorStats.objects.get(educator=educator).session_count, expected)
+
+
+class ReviewBackfillMigrationTests(TransactionTestCase):
+    """The data migration copies educator, student and subject from the session."""
+    migrate_from = [('learning_sessions', '0005_review_denormalized_fields')]
+    migrate_to = [('learning_sessions', '0007_review_educator_index')]
+
+    def test_backfill_copies_session_fields(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        Review = apps.get_model('learning_sessions', 'Review')
+        Session = apps.get_model('learning_sessions', 'Session')
+
+        subject = make_subject()
+        student = make_student()
+        educator = make_educator(subjects=[subject])
+        start = timezone.now()
+        review_ids = []
+        for i in range(3):
+            session = Session.objects.create(student_id=student.pk, educator_id=educator.pk, subject_id=subject.pk,
+                                             start_time=start + timedelta(hours=i),
+                                             end_time=start + timedelta(hours=i, minutes=30), status='completed')
+            review_ids.append(Review.objects.create(session_id=session.pk, rating=5).pk)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        for review in Review.objects.filter(pk__in=review_ids):
+            self.assertEqual((review.educator_id, review.student_id, review.subject_id),
+                             (educator.pk, student.pk, subject.pk))
+
+    def tearDown(self):
+        # Leave the schema fully migrated for the following tests
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
 
-# Create your tests here.
@@ -1,6 +1,8 @@
 from django.urls import path
 from sessions.api.views import (
-    MySessionsListView, SessionListView, SessionCreateView, SessionDetailView, SessionUpdateStatusView,
+    MySessionsListView, AsyncMySessionsListView, SessionListView, SessionCreateView, SessionDetailView, SessionUpdateStatusView,
+    SessionBulkCreateView, SessionBulkStatusView, SlotCheckView, FreeSlotSearchView, AvailabilityWindowListCreateView, AvailabilityWindowDetailView,
+    AvailabilityExceptionListCreateView, AvailabilityExceptionDetailView,
     ReviewCreateView, ReviewListView
 )
 
@@ -10,9 +12,20 @@ urlpatterns = [
     # Session endpoints
     path('', SessionListView.as_view(), name='session_list'),
     path('create/', SessionCreateView.as_view(), name='session_create'),
+    path('bulk-create/', SessionBulkCreateView.as_view(), name='session_bulk_create'),
+    path('bulk-status/', SessionBulkStatusView.as_view(), name='session_bulk_status'),
+    path('check-slots/', SlotCheckView.as_view(), name='session_check_slots'),
     path('<int:pk>/', SessionDetailView.as_view(), name='session_detail'),
     path('<int:pk>/status/', SessionUpdateStatusView.as_view(), name='session_update_status'),
     path('my-sessions/', MySessionsListView.as_view(), name='my_sessions'),
+    path('my-sessions/async/', AsyncMySessionsListView.as_view(), name='my_sessions_async'),
+    
+    # Availability endpoints
+    path('availability/', AvailabilityWindowListCreateView.as_view(), name='availability_list'),
+    path('availability/<int:pk>/', AvailabilityWindowDetailView.as_view(), name='availability_detail'),
+    path('availability/exceptions/', AvailabilityExceptionListCreateView.as_view(), name='availability_exception_list'),
+    path('availability/exceptions/<int:pk>/', AvailabilityExceptionDetailView.as_view(), name='availability_exception_detail'),
+    path('free-slots/', FreeSlotSearchView.as_view(), name='free_slots'),
     
     # Review endpoints
     path('reviews/create/', ReviewCreateView.as_view(), name='review_create'),
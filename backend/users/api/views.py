@@ -1,15 +1,24 @@
-from rest_framework import status, generics, permissions
+from rest_framework import status, generics, permissions, exceptions
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.request import Request
+from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
+from django.views.decorators.csrf import csrf_exempt
 
-from users.models import Student, Educator
+from common.api.async_views import AsyncAPIView, AsyncListView
+from common.api.mixins import EagerLoadingViewMixin, VersionedCacheMixin
+from users.models import Student, Educator, EducatorStats
 from users.serializers.user_serializers import (
     UserLoginSerializer, UserSerializer, UserRegistrationSerializer, StudentSerializer,
-    EducatorSerializer, EducatorRegistrationSerializer
+    EducatorSerializer, EducatorRegistrationSerializer, EducatorStatsSerializer
 )
+from users.services.auth_service import run_hashing
+from users.services.stats_service import STATS_MAX_AGE
+from users.services.token_service import AccessToken, TokenError, issue_tokens, refresh_tokens, revoke_session
+from users.throttling import LoginEmailThrottle, LoginIPThrottle
 
 User = get_user_model()
 
@@ -22,10 +31,8 @@ class UserRegistrationView(generics.CreateAPIView):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            print(Token)
-            token, created = Token.objects.get_or_create(user=user)
             return Response({
-                'token': token.key,
+                **issue_tokens(user),
                 'user_id': user.id,
                 'email': user.email,
                 'user_type': user.user_type
@@ -42,9 +49,8 @@ class EducatorRegistrationView(generics.CreateAPIView):
         if serializer.is_valid():
             educator = serializer.save()
             user = educator.user
-            token, created = Token.objects.get_or_create(user=user)
             return Response({
-                'token': token.key,
+                **issue_tokens(user),
                 'user_id': user.id,
                 'email': user.email,
                 'user_type': user.user_type,
@@ -56,28 +62,72 @@ class CustomAuthToken(generics.CreateAPIView):
     """Custom token authentication view with user details."""
     serializer_class = UserLoginSerializer
     permission_classes = [permissions.AllowAny]
+    # Checked before the password is hashed
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
     
     def post(self, request, *args, **kwargs):
-        serializer = self.serializer_class(data=request.data, context={'request': request})
+        return Response(self.login(request.data, request))
+    
+    @classmethod
+    def login(cls, data, request):
+        """Check the credentials and return the user's token and details."""
+        serializer = cls.serializer_class(data=data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
-        return Response({
-            'token': token.key,
+        return {
+            **issue_tokens(user),
             'user_id': user.id,
             'email': user.email,
             'user_type': user.user_type
-        })
+        }
+
+class AsyncCustomAuthToken(AsyncAPIView):
+    """Async view serving CustomAuthToken for ASGI deployments; hashes in the password hashing pool."""
+    http_method_names = ['post', 'options']
+    throttle_classes = CustomAuthToken.throttle_classes
+    parser_classes = [JSONParser, FormParser, MultiPartParser]
+    
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token login, as the DRF view: no session, so no CSRF check
+        return csrf_exempt(super().as_view(**initkwargs))
+    
+    async def post(self, request, *args, **kwargs):
+        drf_request = Request(request, parsers=[parser() for parser in self.parser_classes])
+        try:
+            await self.check_throttles(drf_request)
+            # Loading the user, hashing and a rehash all run off the event loop
+            data = await run_hashing(CustomAuthToken.login, drf_request.data, request)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+        return self.render(data)
 
 class LogoutView(APIView):
     """API view for user logout."""
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
-        # Delete the user's token to logout
-        request.user.auth_token.delete()
+        # End the login session; deleting a legacy token also drops it from the auth cache
+        if isinstance(request.auth, AccessToken):
+            revoke_session(request.auth.session_key)
+        elif isinstance(request.auth, Token):
+            request.auth.delete()
+        else:
+            Token.objects.filter(user=request.user).delete()
         return Response({"message": "Successfully logged out."}, status=status.HTTP_200_OK)
 
+class TokenRefreshView(APIView):
+    """API view exchanging a refresh token for a new access and refresh token."""
+    permission_classes = [permissions.AllowAny]
+    # The access token being replaced has usually expired
+    authentication_classes = []
+    
+    def post(self, request):
+        try:
+            return Response(refresh_tokens(request.data.get('refresh') if isinstance(request.data, dict) else None))
+        except TokenError as exc:
+            raise exceptions.AuthenticationFailed(str(exc))
+
 class UserProfileView(generics.RetrieveUpdateAPIView):
     """API view to retrieve or update user profile."""
     serializer_class = UserSerializer
@@ -102,20 +152,47 @@ class EducatorProfileView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return get_object_or_404(Educator, user=self.request.user)
 
-class EducatorListView(generics.ListAPIView):
+class EducatorStatsView(generics.RetrieveAPIView):
+    """API view for educators to retrieve their own stats, including earnings."""
+    serializer_class = EducatorStatsSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_object(self):
+        return get_object_or_404(EducatorStats, educator__user=self.request.user)
+
+class EducatorListView(VersionedCacheMixin, EagerLoadingViewMixin, generics.ListAPIView):
     """API view to list all verified educators."""
     serializer_class = EducatorSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespaces = ('educator',)
+    # Stats updates do not bump 'educator'; expiry bounds how stale they get
+    cache_timeout = STATS_MAX_AGE
+    
+    # Sort options served by the EducatorStats indexes
+    ORDERINGS = {
+        'rating': ('-stats__average_rating', '-stats__review_count', 'id'),
+        'popularity': ('-stats__session_count', 'id'),
+    }
     
     def get_queryset(self):
         queryset = Educator.objects.filter(verification_status='verified')
         subject_id = self.request.query_params.get('subject_id', None)
         if subject_id:
             queryset = queryset.filter(subjects__id=subject_id)
+        ordering = self.ORDERINGS.get(self.request.query_params.get('ordering'))
+        if ordering:
+            queryset = queryset.order_by(*ordering)
         return queryset
 
-class EducatorDetailView(generics.RetrieveAPIView):
+class AsyncEducatorListView(AsyncListView):
+    """Async view serving EducatorListView for ASGI deployments."""
+    view_class = EducatorListView
+
+class EducatorDetailView(VersionedCacheMixin, EagerLoadingViewMixin, generics.RetrieveAPIView):
     """API view to retrieve educator details."""
     serializer_class = EducatorSerializer
     permission_classes = [permissions.IsAuthenticated]
+    cache_namespaces = ('educator',)
+    # Stats updates do not bump 'educator'; expiry bounds how stale they get
+    cache_timeout = STATS_MAX_AGE
     queryset = Educator.objects.all()
\ No newline at end of file
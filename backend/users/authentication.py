@@ -0,0 +1,186 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication, SessionAuthentication, TokenAuthentication, get_authorization_header
+)
+from rest_framework.authtoken.models import Token
+
+from common.lru_cache import LRUCache
+from users.services.token_service import read_access_token, revocations
+
+_options = getattr(settings, 'TOKEN_AUTH_CACHE', {})
+token_cache = LRUCache(
+    max_entries=_options.get('MAX_ENTRIES', 10000),
+    timeout=_options.get('TIMEOUT', 60),
+)
+# user id -> user, for signed access tokens
+user_cache = LRUCache(
+    max_entries=_options.get('MAX_ENTRIES', 10000),
+    timeout=_options.get('TIMEOUT', 60),
+)
+
+
+def invalidate_token(key):
+    token_cache.delete(key)
+
+
+def invalidate_user_tokens(user_id):
+    token_cache.delete_where(lambda entry: entry[1].user_id == user_id)
+    user_cache.delete(user_id)
+
+
+def parse_authorization(request, keyword):
+    """Return the credentials of an ``Authorization: <keyword> <credentials>`` header, or None."""
+    auth = get_authorization_header(request).split()
+    if not auth or auth[0].lower() != keyword.lower().encode():
+        return None
+    if len(auth) != 2:
+        raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+    try:
+        return auth[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed(
+            _('Invalid token header. Token string should not contain invalid characters.')
+        )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication keeping token -> (user, token) in a bounded TTL/LRU cache.
+
+    The user is loaded together with its student/educator profile, so
+    ``request.user.user_type`` and ``request.user.student_profile`` /
+    ``educator_profile`` cost no queries on a warm request. Entries are
+    dropped on logout and on user or profile saves in this process, and expire
+    after ``TOKEN_AUTH_CACHE['TIMEOUT']`` seconds everywhere else.
+
+    ``aauthenticate`` does the same from async views, sharing the cache.
+    """
+
+    def get_queryset(self):
+        return Token.objects.select_related('user', 'user__student_profile', 'user__educator_profile')
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is None:
+            try:
+                token = self.get_queryset().get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            entry = (token.user, token)
+            token_cache.set(key, entry)
+        return self.check_entry(entry)
+
+    async def aauthenticate(self, request):
+        key = parse_authorization(request, self.keyword)
+        if key is None:
+            return None
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        entry = token_cache.get(key)
+        if entry is None:
+            try:
+                token = await self.get_queryset().aget(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            entry = (token.user, token)
+            token_cache.set(key, entry)
+        return self.check_entry(entry)
+
+    def check_entry(self, entry):
+        user, token = entry
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        # Hand out copies so request-level changes never leak into the cache
+        user = copy.copy(user)
+        token = copy.copy(token)
+        token.user = user
+        return user, token
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """``Authorization: Bearer <access token>`` authentication without queries.
+
+    Access tokens are checked in process (see
+    ``users.services.token_service``): signature, age, and the revocation
+    list, which costs one query per ``AUTH_TOKENS['SYNC_INTERVAL']`` seconds.
+    Users are kept in ``user_cache`` as in ``CachedTokenAuthentication``, so a
+    warm request costs no queries at all. ``request.auth`` is the
+    ``AccessToken``.
+    """
+    keyword = 'Bearer'
+
+    def get_queryset(self):
+        return get_user_model().objects.select_related('student_profile', 'educator_profile')
+
+    def authenticate(self, request):
+        access = self.read_token(request)
+        if access is None:
+            return None
+        revocations.sync()
+        self.check_revoked(access)
+        user = user_cache.get(access.user_id)
+        if user is None:
+            user = self.get_queryset().filter(pk=access.user_id).first()
+            self.cache_user(access, user)
+        return self.check_user(user, access)
+
+    async def aauthenticate(self, request):
+        access = self.read_token(request)
+        if access is None:
+            return None
+        await revocations.async_sync()
+        self.check_revoked(access)
+        user = user_cache.get(access.user_id)
+        if user is None:
+            user = await self.get_queryset().filter(pk=access.user_id).afirst()
+            self.cache_user(access, user)
+        return self.check_user(user, access)
+
+    def read_token(self, request):
+        token = parse_authorization(request, self.keyword)
+        if token is None:
+            return None
+        access = read_access_token(token)
+        if access is None:
+            raise exceptions.AuthenticationFailed(_('Invalid or expired token.'))
+        return access
+
+    @staticmethod
+    def cache_user(access, user):
+        if user is None:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        user_cache.set(access.user_id, user)
+
+    @staticmethod
+    def check_revoked(access):
+        if revocations.is_revoked(access.session_key):
+            raise exceptions.AuthenticationFailed(_('Token revoked.'))
+
+    def check_user(self, user, access):
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        # Hand out a copy so request-level changes never leak into the cache
+        return copy.copy(user), access
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class AsyncSessionAuthentication(SessionAuthentication):
+    """Session authentication for async views.
+
+    The user comes from ``request.auser()``. Async views only serve safe
+    methods, so no CSRF check is needed.
+    """
+
+    async def aauthenticate(self, request):
+        user = await request.auser()
+        if not user or not user.is_active:
+            return None
+        return user, None
@@ -0,0 +1,61 @@
+"""Password hashers with their cost parameters taken from ``PASSWORD_HASHING``.
+
+Django's default PBKDF2 hasher spends its whole budget on CPU (1,000,000
+SHA-256 iterations, several hundred milliseconds per login), and its scrypt
+hasher uses a parallelism of 5, which a single thread runs as five
+sequential passes. Memory-hard hashes resist GPU cracking through memory
+instead, so they reach the same strength at a fraction of the CPU time. The
+hashers here encode exactly like Django's, so stored hashes stay compatible
+both ways.
+
+Django rehashes a password on the next successful login when it was stored
+with another algorithm than the first of ``PASSWORD_HASHERS``, or with
+other parameters (``must_update``). Changing ``PASSWORD_HASHING`` therefore
+migrates passwords as users log in.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+DEFAULTS = {
+    'SCRYPT': {'WORK_FACTOR': 2 ** 14, 'BLOCK_SIZE': 8, 'PARALLELISM': 1},
+    'ARGON2': {'TIME_COST': 2, 'MEMORY_COST': 19 * 1024, 'PARALLELISM': 1},
+    'WORKERS': 4,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """scrypt with ``PASSWORD_HASHING['SCRYPT']``; uses 128 * WORK_FACTOR * BLOCK_SIZE bytes."""
+    # OpenSSL otherwise rejects work factors needing more than 32 MiB
+    maxmem = 2 ** 28
+
+    @property
+    def work_factor(self):
+        return get_config()['SCRYPT']['WORK_FACTOR']
+
+    @property
+    def block_size(self):
+        return get_config()['SCRYPT']['BLOCK_SIZE']
+
+    @property
+    def parallelism(self):
+        return get_config()['SCRYPT']['PARALLELISM']
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with ``PASSWORD_HASHING['ARGON2']`` (MEMORY_COST in KiB); requires ``argon2-cffi``."""
+
+    @property
+    def time_cost(self):
+        return get_config()['ARGON2']['TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return get_config()['ARGON2']['MEMORY_COST']
+
+    @property
+    def parallelism(self):
+        return get_config()['ARGON2']['PARALLELISM']
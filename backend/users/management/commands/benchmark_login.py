@@ -0,0 +1,134 @@
+import asyncio
+import importlib.util
+import json
+import random
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from common.benchmarking import ameasure_concurrent, benchmark_database, measure, measure_concurrent
+from common.synthetic_data import generate_dataset
+
+User = get_user_model()
+
+PASSWORD = 'bench-password'
+
+# name -> (PASSWORD_HASHERS entry, algorithm)
+HASHERS = {
+    'pbkdf2': ('django.contrib.auth.hashers.PBKDF2PasswordHasher', 'pbkdf2_sha256'),
+    'scrypt': ('users.hashers.ScryptPasswordHasher', 'scrypt'),
+    'argon2': ('users.hashers.Argon2PasswordHasher', 'argon2'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput of the sync (WSGI) and async (ASGI) login views per password hasher, "
+        "the cost of the first login after switching hashers (which rehashes), and how cheaply throttled "
+        "attempts are rejected, in a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hasher', action='append', dest='hashers', choices=HASHERS,
+                            help="Hasher to measure (repeatable, default: all installed).")
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=200, help="Logins per scenario and view.")
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent clients of the sync view.")
+        parser.add_argument('--clients', type=int, default=64, help="Concurrent clients of the async view.")
+        parser.add_argument('--keepdb', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with benchmark_database(keepdb=options['keepdb']):
+            results = self.run(options)
+        self.stdout.write(json.dumps(results, indent=2, default=str))
+
+    def run(self, options):
+        self.rng = random.Random(options['seed'])
+        hashers = options['hashers'] or [name for name in HASHERS
+                                         if name != 'argon2' or importlib.util.find_spec('argon2')]
+        dataset = generate_dataset(subjects=1, students=options['users'], educators=0, sessions=0,
+                                   seed=options['seed'])
+        users = User.objects.filter(student_profile__id__in=dataset['students'])
+        self.emails = list(users.values_list('email', flat=True))
+        # Returning users: login reads their token rather than creating it
+        Token.objects.bulk_create([Token(user_id=pk, key=Token.generate_key())
+                                   for pk in users.values_list('pk', flat=True)])
+        results = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'options': {k: options[k] for k in ('users', 'requests', 'threads', 'clients')},
+                'password_hashing': getattr(settings, 'PASSWORD_HASHING', {}),
+            },
+            'hashers': {},
+        }
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                               LOGIN_THROTTLE={'ENABLED': False}):
+            for name in hashers:
+                with self.hashers(name):
+                    hasher = get_hasher(HASHERS[name][1])
+                    self.store_passwords(name)
+                    results['hashers'][name] = {
+                        'hash': measure(lambda: hasher.encode(PASSWORD, hasher.salt()), 10),
+                        'wsgi': measure_concurrent(self.sync_login, options['requests'], options['threads']),
+                        'asgi': asyncio.run(ameasure_concurrent(self.async_login, options['requests'],
+                                                                options['clients'])),
+                    }
+
+            if 'pbkdf2' in hashers and len(hashers) > 1:
+                # Every user's first login after switching verifies the old hash and stores a new one
+                target = next(name for name in hashers if name != 'pbkdf2')
+                self.store_passwords('pbkdf2')
+                emails = iter(list(self.emails))
+                with self.hashers(target):
+                    results[f'rehash_pbkdf2_to_{target}'] = measure_concurrent(
+                        lambda: self.sync_login(next(emails)), len(self.emails), options['threads'],
+                    )
+                results[f'rehash_pbkdf2_to_{target}']['rehashed'] = User.objects.filter(
+                    password__startswith=HASHERS[target][1] + '$',
+                ).count()
+
+        # A storm against one account: all but the first attempts are refused before any hashing
+        cache.clear()
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], LOGIN_THROTTLE={
+            'IP': {'CAPACITY': 10 ** 9, 'RATE': 1.0}, 'EMAIL': {'CAPACITY': 1, 'RATE': 0.001},
+        }):
+            email = self.emails[0]
+            results['throttled_storm'] = measure_concurrent(
+                lambda: self.sync_login(email, expected=(200, 429)), options['requests'], options['threads'],
+            )
+        return results
+
+    @staticmethod
+    def hashers(name):
+        path = HASHERS[name][0]
+        return override_settings(PASSWORD_HASHERS=[path, *(p for p, _ in HASHERS.values() if p != path)])
+
+    def store_passwords(self, name):
+        User.objects.update(password=make_password(PASSWORD, hasher=HASHERS[name][1]))
+
+    def sync_login(self, email=None, expected=(200,)):
+        response = Client().post(reverse('users:login'), {'email': email or self.rng.choice(self.emails),
+                                                          'password': PASSWORD})
+        if response.status_code not in expected:
+            raise AssertionError(f"login: {response.status_code}")
+
+    async def async_login(self):
+        response = await AsyncClient().post(reverse('users:login_async'), {
+            'email': self.rng.choice(self.emails), 'password': PASSWORD,
+        }, content_type='application/json')
+        if response.status_code != 200:
+            raise AssertionError(f"async login: {response.status_code}")
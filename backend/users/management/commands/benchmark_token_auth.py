@@ -0,0 +1,65 @@
+import json
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from common.benchmarking import benchmark_database, measure
+from common.synthetic_data import generate_dataset
+from users.api.views import UserProfileView
+from users.authentication import CachedTokenAuthentication, SignedTokenAuthentication, token_cache, user_cache
+from users.services.token_service import issue_tokens, revocations
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ("Compare stock TokenAuthentication, CachedTokenAuthentication and signed access tokens "
+            "(SignedTokenAuthentication) on the profile endpoint.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--active-users', type=int, default=100,
+                            help="Number of distinct tokens used by the requests.")
+        parser.add_argument('--iterations', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            results = self.run(options)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        generate_dataset(students=options['users'], educators=10, sessions=0, seed=options['seed'])
+        user_ids = list(User.objects.filter(user_type='student').order_by('?')
+                        .values_list('id', flat=True)[:options['active_users']])
+        Token.objects.bulk_create([Token(user_id=pk, key=Token.generate_key()) for pk in user_ids])
+        keys = list(Token.objects.values_list('key', flat=True))
+        access_tokens = [issue_tokens(user)['token'] for user in User.objects.filter(id__in=user_ids)]
+        factory = APIRequestFactory()
+
+        results = {'options': {k: options[k] for k in ('users', 'active_users', 'iterations')}}
+        for name, authentication_class, keyword, credentials in (
+            ('stock', TokenAuthentication, 'Token', keys),
+            ('cached', CachedTokenAuthentication, 'Token', keys),
+            ('signed', SignedTokenAuthentication, 'Bearer', access_tokens),
+        ):
+            view = UserProfileView.as_view(authentication_classes=[authentication_class])
+            token_cache.clear()
+            user_cache.clear()
+            revocations.clear()
+
+            def request(key=None):
+                response = view(factory.get('/api/users/profile/', HTTP_AUTHORIZATION=(
+                    f'{keyword} {key or rng.choice(credentials)}'
+                )))
+                assert response.status_code == 200, response.status_code
+
+            for key in credentials:
+                request(key)
+            results[name] = measure(request, options['iterations'], warmup=0)
+        return results
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from rest_framework.authtoken.models import Token
+
+from users.services.token_service import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete expired login sessions and revocations (run it periodically, e.g. hourly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--legacy', action='store_true',
+                            help="Also delete every authtoken key issued before signed tokens, logging "
+                                 "out their clients.")
+
+    def handle(self, *args, **options):
+        sessions, revoked = purge_expired()
+        self.stdout.write(f"Deleted {sessions} expired session(s) and {revoked} expired revocation(s).")
+        if options['legacy']:
+            deleted, _ = Token.objects.all().delete()
+            self.stdout.write(f"Deleted {deleted} legacy token(s).")
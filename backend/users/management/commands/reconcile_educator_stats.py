@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from users.services.stats_service import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild EducatorStats from reviews, sessions and transactions (run nightly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--educator', type=int, action='append', dest='educators',
+                            help="Only rebuild the given educator id (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_stats(options['educators'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {rebuilt} educator(s)."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-16 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('users', '0002_educator_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='educator',
+            index=models.Index(fields=['verification_status'], name='educator_verification_idx'),
+        ),
+    ]
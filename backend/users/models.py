@@ -48,6 +48,7 @@ class User(AbstractUser):
     email = models.EmailField(_('email address'), unique=True)
     user_type = models.CharField(max_length=10, choices=USER_TYPE_CHOICES, default='student')
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)  # See common.uploads
     bio = models.TextField(blank=True, null=True)
     date_joined = models.DateTimeField(auto_now_add=True)
     is_verified = models.BooleanField(default=False)
@@ -80,5 +81,60 @@ class Educator(models.Model):
                                           default='pending')
     contract_signed = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            # The public educator list only shows verified educators
+            models.Index(fields=['verification_status'], name='educator_verification_idx'),
+        ]
+    
     def __str__(self):
         return f"Educator: {self.user.email}"
+
+class EducatorStats(models.Model):
+    """Pre-aggregated rating, activity and earnings summary of an educator.
+    
+    Kept up to date incrementally from review, session and transaction
+    changes; ``manage.py reconcile_educator_stats`` rebuilds it from scratch.
+    """
+    educator = models.OneToOneField(Educator, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    review_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0)
+    session_count = models.PositiveIntegerField(default=0)  # Completed sessions
+    total_earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # Completed payments
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            # Directory sorting by rating and by popularity
+            models.Index(fields=['-average_rating', '-review_count'], name='stats_rating_idx'),
+            models.Index(fields=['-session_count'], name='stats_popularity_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Stats for {self.educator}"
+
+
+class LoginSession(models.Model):
+    """A login: the user's refresh token, of which only the SHA-256 is stored.
+    
+    See users.services.token_service. The row is deleted on logout and
+    purged once it expires, so the table only holds live logins.
+    """
+    key = models.CharField(max_length=32, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='login_sessions')
+    refresh_hash = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"Login session of user {self.user_id}"
+
+class RevokedSession(models.Model):
+    """A logged out session, denylisted until its last access token expires."""
+    session_key = models.CharField(max_length=32, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return f"Revoked session {self.session_key}"
@@ -1,17 +1,33 @@
 from rest_framework import serializers
 # from rest_framework.compat import authenticate
 from django.contrib.auth import get_user_model, authenticate
-from users.models import Student, Educator
+from users.models import Student, Educator, EducatorStats
+from common.serializers.compact import decimal_string, prefixed, variant_url
+from common.serializers.fields import ImageVariantField
+from common.uploads import attach_upload
+from common.serializers.mixins import EagerLoadingMixin
 
 User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the custom User model."""
+    profile_picture = ImageVariantField(required=False, allow_null=True)
+    
     class Meta:
         model = User
         fields = ['id', 'email', 'first_name', 'last_name', 'user_type', 
                   'profile_picture', 'bio', 'date_joined', 'is_verified']
         read_only_fields = ['date_joined', 'is_verified']
+    
+    def update(self, instance, validated_data):
+        # A new picture is stored off-request; clearing it is immediate
+        picture = validated_data.get('profile_picture')
+        if picture:
+            del validated_data['profile_picture']
+        instance = super().update(instance, validated_data)
+        if picture:
+            attach_upload(instance, 'profile_picture', picture)
+        return instance
 
 class UserLoginSerializer(serializers.Serializer):
     email = serializers.CharField(label="Email")
@@ -81,15 +97,18 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return attrs
     
     def create(self, validated_data):
+        picture = validated_data.get('profile_picture')
         user = User.objects.create_user(
             email=validated_data['email'],
             password=validated_data['password'],
             first_name=validated_data['first_name'],
             last_name=validated_data['last_name'],
             user_type=validated_data.get('user_type', 'student'),
-            profile_picture=validated_data.get('profile_picture', None),
             bio=validated_data.get('bio', '')
         )
+        if picture:
+            # Stored, with its thumbnails, outside of the request
+            attach_upload(user, 'profile_picture', picture)
         
         # Create profile based on user type
         if user.user_type == 'student':
@@ -103,26 +122,76 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         
         return user
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for the Student model."""
     user = UserSerializer(read_only=True)
     favorite_subjects = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
     
+    select_related_fields = ('user',)
+    prefetch_related_fields = ('favorite_subjects',)
+    
     class Meta:
         model = Student
         fields = ['id', 'user', 'favorite_subjects']
 
-class EducatorSerializer(serializers.ModelSerializer):
+class EducatorPublicStatsSerializer(EagerLoadingMixin, serializers.ModelSerializer):
+    """Public part of an educator's pre-aggregated stats."""
+    average_rating = serializers.DecimalField(max_digits=3, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = EducatorStats
+        fields = ['average_rating', 'review_count', 'session_count']
+        read_only_fields = fields
+
+class EducatorStatsSerializer(EducatorPublicStatsSerializer):
+    """Full stats of an educator, including earnings, for the educator themselves."""
+    class Meta(EducatorPublicStatsSerializer.Meta):
+        fields = EducatorPublicStatsSerializer.Meta.fields + ['total_earnings', 'updated_at']
+        read_only_fields = fields
+
+class EducatorSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for the Educator model."""
     user = UserSerializer(read_only=True)
     subjects = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    stats = EducatorPublicStatsSerializer(read_only=True)
+    
+    select_related_fields = ('user',)
+    prefetch_related_fields = ('subjects',)
     
     class Meta:
         model = Educator
         fields = ['id', 'user', 'degree', 'hourly_rate', 'subjects', 
-                  'verification_status', 'contract_signed']
+                  'verification_status', 'contract_signed', 'stats']
         read_only_fields = ['verification_status', 'contract_signed']
 
+# Compact representations side-loaded by compact list serializers
+# (see common.serializers.compact), as lookups relative to the object
+COMPACT_USER_FIELDS = {
+    'id': 'id', 'first_name': 'first_name', 'last_name': 'last_name',
+    'user_type': 'user_type', 'profile_picture': 'profile_picture_variants',
+}
+COMPACT_STUDENT_FIELDS = {'id': 'id', 'user': 'user_id'}
+COMPACT_EDUCATOR_FIELDS = {
+    'id': 'id', 'user': 'user_id', 'degree': 'degree', 'hourly_rate': 'hourly_rate',
+    'verification_status': 'verification_status',
+}
+
+def participant_includes(prefix=''):
+    """Side-loaded student, educator and users of the object read through ``prefix``."""
+    return (
+        ('students', f'{prefix}student_id', prefixed(f'{prefix}student__', COMPACT_STUDENT_FIELDS)),
+        ('educators', f'{prefix}educator_id', prefixed(f'{prefix}educator__', COMPACT_EDUCATOR_FIELDS)),
+        ('users', f'{prefix}student__user_id', prefixed(f'{prefix}student__user__', COMPACT_USER_FIELDS)),
+        ('users', f'{prefix}educator__user_id', prefixed(f'{prefix}educator__user__', COMPACT_USER_FIELDS)),
+    )
+
+def participant_converters(prefix=''):
+    return {
+        f'{prefix}educator__hourly_rate': decimal_string,
+        f'{prefix}student__user__profile_picture_variants': variant_url(),
+        f'{prefix}educator__user__profile_picture_variants': variant_url(),
+    }
+
 class EducatorRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for educator registration with verification documents."""
     user = UserRegistrationSerializer()
@@ -141,9 +210,10 @@ class EducatorRegistrationSerializer(serializers.ModelSerializer):
         
         educator = Educator.objects.get(user=user)
         educator.degree = validated_data.get('degree', '')
-        educator.degree_certificate = validated_data.get('degree_certificate', None)
-        educator.id_verification = validated_data.get('id_verification', None)
         educator.hourly_rate = validated_data.get('hourly_rate', 0.00)
         educator.save()
+        for field_name in ('degree_certificate', 'id_verification'):
+            if validated_data.get(field_name):
+                attach_upload(educator, field_name, validated_data[field_name])
         
         return educator
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""Password checks off the event loop for the async login view.
+
+Hashing a password is pure CPU work, and Django's ``aauthenticate`` runs the
+sync ``authenticate`` through ``sync_to_async`` on the single
+thread-sensitive executor, so concurrent async logins would hash one after
+another. ``run_hashing`` runs them in a dedicated pool of
+``PASSWORD_HASHING['WORKERS']`` threads instead. hashlib's scrypt and PBKDF2
+and argon2-cffi release the GIL while hashing, so logins hash in parallel
+while the event loop keeps serving other requests. The pool is bounded, so a
+login storm queues for it rather than starving everything else of CPU.
+"""
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.db import close_old_connections
+
+from users.hashers import get_config
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_config()['WORKERS'],
+                                           thread_name_prefix='password-hasher')
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # The pool's threads keep their own database connections
+        close_old_connections()
+
+
+async def run_hashing(func, *args, **kwargs):
+    """Await ``func(*args, **kwargs)`` run in the password hashing pool.
+
+    ``func`` may use the ORM (to load the user and save a rehashed password).
+    """
+    context = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(context.run, _run, func, args, kwargs))
@@ -0,0 +1,105 @@
+"""Incremental maintenance and full rebuild of ``EducatorStats``.
+
+Incremental updates are single ``UPDATE ... SET col = col + delta``
+statements, so concurrent reviews or payments for the same educator never
+lose an increment. ``rebuild_stats`` recomputes rows from the source tables
+in batches and is used by the nightly reconcile command.
+
+The cached educator directory embeds the public stats. Incremental updates
+leave it alone, or every review would empty it; the cached stats catch up
+when the educator views' entries expire (``STATS_MAX_AGE``) or when
+``rebuild_stats`` bumps the ``educator`` namespace.
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import Cast
+
+from common.cache import bump_version
+from users.models import Educator, EducatorStats
+
+# Longest time the cached educator directory may show outdated stats, in seconds
+STATS_MAX_AGE = 5 * 60
+
+
+def _apply(educator_id, **deltas):
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if not EducatorStats.objects.filter(educator_id=educator_id).update(**changes):
+        # Missing row (e.g. educator created before stats existed)
+        rebuild_stats([educator_id])
+
+
+def _refresh_average(educator_id):
+    EducatorStats.objects.filter(educator_id=educator_id, review_count__gt=0).update(
+        average_rating=Cast(F('rating_total'), FloatField()) / F('review_count')
+    )
+    EducatorStats.objects.filter(educator_id=educator_id, review_count=0).update(average_rating=0)
+
+
+def record_review(educator_id, rating, sign=1):
+    """Account for a review being added (``sign=1``) or removed (``sign=-1``)."""
+    _apply(educator_id, review_count=sign, rating_total=sign * rating)
+    _refresh_average(educator_id)
+
+
+def record_completed_session(educator_id, delta=1):
+    """Account for ``delta`` sessions entering (positive) or leaving (negative) 'completed'."""
+    _apply(educator_id, session_count=delta)
+
+
+def record_earnings(educator_id, amount):
+    """Add (or with a negative amount, remove) completed payment earnings."""
+    _apply(educator_id, total_earnings=amount)
+
+
+def rebuild_stats(educator_ids=None, batch_size=1000):
+    """Recompute stats from reviews, sessions and transactions. Returns the row count."""
+    from payments.models import Transaction
+    from sessions.models import Review, Session
+
+    if educator_ids is None:
+        educator_ids = Educator.objects.order_by('id').values_list('id', flat=True)
+    educator_ids = list(educator_ids)
+    rebuilt = 0
+
+    for offset in range(0, len(educator_ids), batch_size):
+        batch = educator_ids[offset:offset + batch_size]
+        reviews = {
+            row['educator_id']: row
+            for row in Review.objects.filter(educator_id__in=batch)
+            .values('educator_id').annotate(count=Count('id'), total=Sum('rating'))
+        }
+        sessions = dict(
+            Session.objects.filter(educator_id__in=batch, status='completed')
+            .values('educator_id').annotate(count=Count('id')).values_list('educator_id', 'count')
+        )
+        earnings = dict(
+            Transaction.objects.filter(educator_id__in=batch, transaction_type='payment', status='completed')
+            .values('educator_id').annotate(total=Sum('amount')).values_list('educator_id', 'total')
+        )
+
+        rows = []
+        for educator_id in batch:
+            review = reviews.get(educator_id, {'count': 0, 'total': 0})
+            rows.append(EducatorStats(
+                educator_id=educator_id,
+                review_count=review['count'],
+                rating_total=review['total'],
+                average_rating=review['total'] / review['count'] if review['count'] else 0,
+                session_count=sessions.get(educator_id, 0),
+                total_earnings=earnings.get(educator_id) or Decimal('0.00'),
+            ))
+        EducatorStats.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            # MySQL upserts on any unique key and rejects an explicit target
+            unique_fields=['educator'] if connection.features.supports_update_conflicts_with_target else None,
+            update_fields=['review_count', 'rating_total', 'average_rating', 'session_count',
+                           'total_earnings', 'updated_at'],
+        )
+        rebuilt += len(rows)
+
+    if rebuilt:
+        bump_version('educator')
+    return rebuilt
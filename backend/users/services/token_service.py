@@ -0,0 +1,194 @@
+"""Signed access tokens, rotating refresh tokens and revocation of login sessions.
+
+DRF's authtoken keys never expire and every request looks one up. Instead,
+a login now starts a ``LoginSession`` and returns two tokens:
+
+* an access token, a ``django.core.signing`` payload naming the user and the
+  session, signed with ``SECRET_KEY`` and valid for ``ACCESS_TTL`` seconds.
+  Checking it costs an HMAC and no query (see
+  ``users.authentication.SignedTokenAuthentication``);
+* a refresh token ``<session key>.<secret>``, of which the session stores
+  only the SHA-256. Refreshing returns a new pair and rotates the secret; an
+  outdated secret of a live session means the token was copied, so the
+  session is revoked. A session ends ``REFRESH_TTL`` seconds after its last
+  refresh.
+
+Logging out deletes the session and records a ``RevokedSession`` until the
+session's last access token expires. Every process keeps the unexpired
+revocations in memory (``revocations``) and reloads them from the database
+at most every ``SYNC_INTERVAL`` seconds, so a logout takes effect at once in
+its own process and within that interval everywhere else. Both tables only
+hold live rows; ``manage.py purge_auth_tokens`` deletes expired ones.
+"""
+import hashlib
+import secrets
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from users.models import LoginSession, RevokedSession
+
+DEFAULTS = {
+    'ACCESS_TTL': 300,
+    'REFRESH_TTL': 14 * 24 * 3600,
+    'SYNC_INTERVAL': 5,
+}
+
+ACCESS_TOKEN_SALT = 'users.access-token'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'AUTH_TOKENS', {})}
+
+
+class TokenError(Exception):
+    """Raised for a refresh token that is malformed, expired, revoked or outdated."""
+
+
+class AccessToken:
+    """Claims of a valid access token, set as ``request.auth``."""
+    __slots__ = ('user_id', 'session_key')
+
+    def __init__(self, user_id, session_key):
+        self.user_id = user_id
+        self.session_key = session_key
+
+
+def make_access_token(user_id, session_key):
+    return signing.dumps({'u': user_id, 's': session_key}, salt=ACCESS_TOKEN_SALT)
+
+
+def read_access_token(token):
+    """Return the ``AccessToken`` of a correctly signed, unexpired token, else None.
+
+    Revocation is checked separately, against ``revocations``.
+    """
+    try:
+        claims = signing.loads(token, salt=ACCESS_TOKEN_SALT, max_age=get_config()['ACCESS_TTL'])
+    except signing.BadSignature:
+        return None
+    return AccessToken(claims['u'], claims['s'])
+
+
+def _hash(secret):
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def _token_pair(session, secret):
+    return {
+        'token': make_access_token(session.user_id, session.key),
+        'refresh': f'{session.key}.{secret}',
+        'expires_in': get_config()['ACCESS_TTL'],
+    }
+
+
+def issue_tokens(user):
+    """Start a login session for ``user`` and return its access and refresh tokens."""
+    secret = secrets.token_urlsafe(32)
+    session = LoginSession.objects.create(
+        key=secrets.token_hex(16), user=user, refresh_hash=_hash(secret),
+        expires_at=timezone.now() + timedelta(seconds=get_config()['REFRESH_TTL']),
+    )
+    return _token_pair(session, secret)
+
+
+def refresh_tokens(refresh):
+    """Return a new token pair for the refresh token ``refresh``, which stops being valid."""
+    key, _, secret = (refresh if isinstance(refresh, str) else '').partition('.')
+    if not key or not secret:
+        raise TokenError("Malformed refresh token.")
+    with transaction.atomic():
+        session = (LoginSession.objects.select_for_update().select_related('user')
+                   .filter(key=key, expires_at__gt=timezone.now()).first())
+        if session is None or not session.user.is_active:
+            raise TokenError("Refresh token expired or revoked.")
+        reused = not constant_time_compare(session.refresh_hash, _hash(secret))
+        if not reused:
+            secret = secrets.token_urlsafe(32)
+            session.refresh_hash = _hash(secret)
+            session.expires_at = timezone.now() + timedelta(seconds=get_config()['REFRESH_TTL'])
+            session.save(update_fields=['refresh_hash', 'expires_at', 'refreshed_at'])
+            return _token_pair(session, secret)
+    # Whoever holds the current secret got it from the same copy
+    revoke_session(key)
+    raise TokenError("Refresh token already used; the session is revoked.")
+
+
+def revoke_session(key):
+    """End the login session ``key``: its refresh token and access tokens stop working."""
+    expires_at = timezone.now() + timedelta(seconds=get_config()['ACCESS_TTL'])
+    with transaction.atomic():
+        LoginSession.objects.filter(key=key).delete()
+        RevokedSession.objects.update_or_create(session_key=key, defaults={'expires_at': expires_at})
+    revocations.add(key, expires_at)
+
+
+def purge_expired():
+    """Delete expired sessions and revocations; returns how many of each."""
+    now = timezone.now()
+    sessions, _ = LoginSession.objects.filter(expires_at__lte=now).delete()
+    revoked, _ = RevokedSession.objects.filter(expires_at__lte=now).delete()
+    return sessions, revoked
+
+
+class RevocationList:
+    """Revoked session keys of this process, reloaded from ``RevokedSession`` when due.
+
+    Only holds sessions revoked within the last ``ACCESS_TTL`` seconds, as
+    older ones have no valid access token left.
+    """
+
+    def __init__(self):
+        self._revoked = {}  # session key -> expiry timestamp
+        self._synced_at = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, key):
+        expires = self._revoked.get(key)
+        return expires is not None and expires > time.time()
+
+    def add(self, key, expires_at):
+        with self._lock:
+            self._revoked[key] = expires_at.timestamp()
+
+    def clear(self):
+        with self._lock:
+            self._revoked = {}
+            self._synced_at = None
+
+    def claim_sync(self):
+        """Return whether the caller should reload now; one caller per interval does."""
+        with self._lock:
+            now = time.monotonic()
+            if self._synced_at is not None and now - self._synced_at < get_config()['SYNC_INTERVAL']:
+                return False
+            self._synced_at = now
+            return True
+
+    def sync(self):
+        if self.claim_sync():
+            self._merge(list(self._queryset()))
+
+    async def async_sync(self):
+        if self.claim_sync():
+            self._merge([row async for row in self._queryset()])
+
+    @staticmethod
+    def _queryset():
+        return RevokedSession.objects.filter(expires_at__gt=timezone.now()).values_list('session_key', 'expires_at')
+
+    def _merge(self, rows):
+        now = time.time()
+        with self._lock:
+            revoked = {key: expires for key, expires in self._revoked.items() if expires > now}
+            revoked.update((key, expires_at.timestamp()) for key, expires_at in rows)
+            self._revoked = revoked
+
+
+revocations = RevocationList()
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from common.cache import bump_version
+from common.uploads import track_variants
+from users.authentication import invalidate_token, invalidate_user_tokens
+from users.models import Student, Educator, EducatorStats
+
+User = get_user_model()
+
+track_variants(User, 'profile_picture')
+
+
+@receiver(post_save, sender=Educator)
+@receiver(post_delete, sender=Educator)
+@receiver(m2m_changed, sender=Educator.subjects.through)
+def invalidate_educator_cache(sender, **kwargs):
+    bump_version('educator')
+
+
+@receiver(post_save, sender=User)
+def invalidate_educator_cache_on_user_save(sender, instance, **kwargs):
+    # Educator payloads embed the user's name, bio and picture
+    if instance.user_type == 'educator':
+        bump_version('educator')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_cache_on_user_change(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Educator)
+@receiver(post_delete, sender=Educator)
+def invalidate_auth_cache_on_profile_change(sender, instance, **kwargs):
+    invalidate_user_tokens(instance.user_id)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_auth_cache_on_token_delete(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=Educator)
+def create_educator_stats(sender, instance, created, **kwargs):
+    if created:
+        EducatorStats.objects.get_or_create(educator=instance)
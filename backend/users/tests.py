@@ -1,3 +1,555 @@
-from django.test import TestCase
+import json
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from common.lru_cache import LRUCache
+from common.testing import QueryCountMixin, make_educator, make_image_upload, make_session, make_student, make_subject
+from common.uploads import backfill_variants, build_variants, pending_uploads, process_pending_uploads
+from payments.models import Transaction
+from sessions.models import Review
+from users.authentication import CachedTokenAuthentication, token_cache, user_cache
+from users.models import EducatorStats, LoginSession, RevokedSession
+from users.throttling import take_token
+from users.serializers.user_serializers import UserSerializer
+from users.services.stats_service import rebuild_stats
+from users.services.token_service import purge_expired, read_access_token, revocations
+
+User = get_user_model()
+
+
+class EducatorQueryCountTests(QueryCountMixin, TestCase):
+    """The number of queries must not grow with the number of educators returned."""
+
+    def test_educator_list_query_count_is_constant(self):
+        url = reverse('users:educator_list')
+        make_educator(subjects=[self.subject])
+        baseline = self.count_queries(url)
+        for i in range(9):
+            make_educator(subjects=[self.subject, make_subject()])
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_educator_detail_query_count(self):
+        educator = make_educator(subjects=[self.subject])
+        url = reverse('users:educator_detail', args=[educator.pk])
+        self.assertEqual(self.count_queries(url), 2)
+
+
+class EducatorCacheTests(TestCase):
+    """Versioned read-through cache of the educator directory."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = make_subject()
+        cls.student = make_student()
+        cls.educator = make_educator(subjects=[cls.subject])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student.user)
+
+    def test_cached_per_query_string(self):
+        url = reverse('users:educator_list')
+        other_subject = make_subject()
+        self.assertEqual(len(json.loads(self.client.get(url).content)), 1)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        response = self.client.get(url, {'subject_id': other_subject.pk})
+        self.assertEqual(json.loads(response.content), [])
+
+    def test_profile_changes_invalidate(self):
+        url = reverse('users:educator_detail', args=[self.educator.pk])
+        self.client.get(url)
+        self.educator.user.bio = 'Updated bio'
+        self.educator.user.save()
+        self.assertEqual(json.loads(self.client.get(url).content)['user']['bio'], 'Updated bio')
+
+        self.educator.subjects.clear()
+        self.assertEqual(json.loads(self.client.get(url).content)['subjects'], [])
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Token authentication served from the in-process auth cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_student()
+        cls.token = Token.objects.create(user=cls.student.user)
+
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_warm_request_makes_no_auth_queries(self):
+        url = reverse('sessions:my_sessions')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        forced = APIClient()
+        forced.force_authenticate(self.student.user)
+        with CaptureQueriesContext(connection) as unauthenticated:
+            forced.get(url)
+        self.assertEqual(len(warm), len(unauthenticated))
+
+    def test_profile_is_loaded_with_the_user(self):
+        authentication = CachedTokenAuthentication()
+        user, token = authentication.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = authentication.authenticate_credentials(self.token.key)
+            self.assertEqual(user.student_profile.pk, self.student.pk)
+            self.assertEqual(token.user_id, user.pk)
+
+    def test_logout_invalidates_token(self):
+        self.assertEqual(self.client.get(reverse('users:user_profile')).status_code, 200)
+        self.assertEqual(self.client.post(reverse('users:logout')).status_code, 200)
+        self.assertIn(self.client.get(reverse('users:user_profile')).status_code, (401, 403))
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.client.get(reverse('users:user_profile')).status_code, 200)
+        user = self.student.user
+        user.is_active = False
+        user.save()
+        self.assertIn(self.client.get(reverse('users:user_profile')).status_code, (401, 403))
+
+    def test_user_changes_are_visible(self):
+        self.client.get(reverse('users:user_profile'))
+        User.objects.filter(pk=self.student.user.pk).update(first_name='Stale')
+        self.student.user.first_name = 'Fresh'
+        self.student.user.save()
+        self.assertEqual(self.client.get(reverse('users:user_profile')).data['first_name'], 'Fresh')
+
+    def test_cache_is_bounded(self):
+        cache = LRUCache(max_entries=2, timeout=60)
+        for key in 'abc':
+            cache.set(key, key)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 2)
+
+
+class EducatorStatsTests(TestCase):
+    """Stats are kept current by signals and match a full rebuild."""
+
+    def setUp(self):
+        self.subject = make_subject()
+        self.student = make_student()
+        self.educator = make_educator(subjects=[self.subject])
+        self.client = APIClient()
+
+    def stats(self, educator=None):
+        return EducatorStats.objects.get(educator=educator or self.educator)
+
+    def complete_session(self, rating=None, **fields):
+        session = make_session(self.student, self.educator, self.subject, **fields)
+        session.status = 'completed'
+        session.save()
+        if rating:
+            Review.objects.create(session=session, rating=rating)
+        return session
+
+    def pay(self, session, status='completed'):
+        return Transaction.objects.create(
+            student=self.student, educator=self.educator, session=session,
+            amount=Decimal('30.00'), transaction_type='payment', status=status,
+        )
+
+    def test_new_educator_gets_empty_stats(self):
+        stats = self.stats()
+        self.assertEqual((stats.review_count, stats.session_count), (0, 0))
+        self.assertEqual(stats.total_earnings, Decimal('0.00'))
+
+    def test_reviews_and_sessions_update_incrementally(self):
+        self.complete_session(rating=5)
+        session = self.complete_session(rating=2)
+        stats = self.stats()
+        self.assertEqual((stats.review_count, stats.session_count), (2, 2))
+        self.assertAlmostEqual(stats.average_rating, 3.5)
+
+        session.review.delete()
+        session.status = 'canceled'
+        session.save()
+        stats = self.stats()
+        self.assertEqual((stats.review_count, stats.session_count), (1, 1))
+        self.assertAlmostEqual(stats.average_rating, 5.0)
+
+    def test_earnings_follow_completed_payments(self):
+        session = self.complete_session()
+        transaction = self.pay(session, status='pending')
+        self.assertEqual(self.stats().total_earnings, Decimal('0.00'))
+        transaction.status = 'completed'
+        transaction.save()
+        self.assertEqual(self.stats().total_earnings, Decimal('30.00'))
+        transaction.status = 'refunded'
+        transaction.save()
+        self.assertEqual(self.stats().total_earnings, Decimal('0.00'))
+
+    def test_reconcile_matches_incremental_stats(self):
+        self.pay(self.complete_session(rating=4))
+        self.complete_session(rating=3)
+        incremental = self.stats()
+        EducatorStats.objects.filter(educator=self.educator).update(
+            review_count=0, rating_total=0, average_rating=0, session_count=0, total_earnings=0,
+        )
+        call_command('reconcile_educator_stats', stdout=StringIO())
+        rebuilt = self.stats()
+        for field in ('review_count', 'rating_total', 'average_rating', 'session_count', 'total_earnings'):
+            self.assertEqual(getattr(rebuilt, field), getattr(incremental, field), field)
+
+    def test_missing_row_is_rebuilt_on_update(self):
+        EducatorStats.objects.filter(educator=self.educator).delete()
+        self.complete_session(rating=4)
+        self.assertEqual(self.stats().review_count, 1)
+
+    def test_list_sorts_by_rating_and_popularity(self):
+        busy = make_educator(subjects=[self.subject])
+        self.complete_session(rating=5)
+        for _ in range(2):
+            make_session(self.student, busy, self.subject, status='completed')
+        rebuild_stats()
+        self.client.force_authenticate(self.student.user)
+        url = reverse('users:educator_list')
+
+        by_rating = self.client.get(url, {'ordering': 'rating'}).json()
+        self.assertEqual([e['id'] for e in by_rating][:2], [self.educator.id, busy.id])
+        self.assertEqual(by_rating[0]['stats']['review_count'], 1)
+        self.assertNotIn('total_earnings', by_rating[0]['stats'])
+        by_popularity = self.client.get(url, {'ordering': 'popularity'}).json()
+        self.assertEqual([e['id'] for e in by_popularity][:2], [busy.id, self.educator.id])
+
+    def test_stats_updates_keep_the_directory_cache(self):
+        cache.clear()
+        self.client.force_authenticate(self.student.user)
+        url = reverse('users:educator_list')
+        self.client.get(url)
+        self.complete_session(rating=5)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).json()[0]['stats']['review_count'], 0)
+
+        # The nightly reconcile refreshes it
+        rebuild_stats()
+        self.assertEqual(self.client.get(url).json()[0]['stats']['review_count'], 1)
+
+    def test_educator_sees_own_earnings(self):
+        self.pay(self.complete_session())
+        self.client.force_authenticate(self.educator.user)
+        response = self.client.get(reverse('users:educator_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.data['total_earnings']), Decimal('30.00'))
+
+
+class UploadPipelineTests(TestCase):
+    """Uploads are staged in the request and stored with their thumbnails by a worker."""
+
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        staging_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(
+            MEDIA_ROOT=media_root, UPLOAD_PIPELINE={'WORKERS': 0, 'STAGING_ROOT': staging_root},
+        ))
+        self.client = APIClient()
+
+    def register(self, **fields):
+        data = {'email': 'new@example.com', 'first_name': 'New', 'last_name': 'User',
+                'password': 'secret-password', 'confirm_password': 'secret-password', **fields}
+        response = self.client.post(reverse('users:user_register'), data, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        return User.objects.get(pk=response.data['user_id'])
+
+    def test_picture_is_stored_with_thumbnails_after_registration(self):
+        user = self.register(profile_picture=make_image_upload(size=(1600, 1200)))
+        # Only staged during the request
+        self.assertFalse(user.profile_picture)
+        self.assertEqual(len(pending_uploads()), 1)
+
+        self.assertEqual(len(process_pending_uploads(min_age=0)), 1)
+        self.assertEqual(pending_uploads(), [])
+        user.refresh_from_db()
+        self.assertTrue(user.profile_picture.name.startswith('profile_pictures/'))
+        variants = user.profile_picture_variants
+        self.assertEqual(variants['source'], user.profile_picture.name)
+        for variant, size in (('thumbnail', 96), ('preview', 480)):
+            with user.profile_picture.storage.open(variants[variant]) as file, Image.open(file) as image:
+                self.assertEqual(image.format, 'WEBP')
+                self.assertEqual(max(image.size), size)
+        self.assertLess(user.profile_picture.storage.size(variants['thumbnail']), 5 * 1024)
+
+        # Payloads link to the thumbnail
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse('users:user_profile'))
+        self.assertTrue(response.data['profile_picture'].endswith(variants['thumbnail']))
+
+    def test_educator_documents_are_stored_after_registration(self):
+        response = self.client.post(reverse('users:educator_register'), {
+            'user.email': 'educator@example.com', 'user.first_name': 'New', 'user.last_name': 'Educator',
+            'user.password': 'secret-password', 'user.confirm_password': 'secret-password',
+            'degree': 'MSc', 'hourly_rate': '30.00',
+            'degree_certificate': SimpleUploadedFile('degree.pdf', b'%PDF-1.4 certificate'),
+            'id_verification': SimpleUploadedFile('id.pdf', b'%PDF-1.4 identity'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        educator = User.objects.get(pk=response.data['user_id']).educator_profile
+        self.assertFalse(educator.degree_certificate)
+
+        self.assertEqual(len(process_pending_uploads(min_age=0)), 2)
+        educator.refresh_from_db()
+        self.assertEqual(educator.degree_certificate.read(), b'%PDF-1.4 certificate')
+        self.assertEqual(educator.id_verification.read(), b'%PDF-1.4 identity')
+
+    def test_recent_uploads_are_left_to_the_request_workers(self):
+        self.register(profile_picture=make_image_upload())
+        self.assertEqual(process_pending_uploads(min_age=60), [])
+
+    def test_changed_picture_drops_stale_variants(self):
+        user = self.register(profile_picture=make_image_upload())
+        process_pending_uploads(min_age=0)
+        user.refresh_from_db()
+
+        buffer = BytesIO()
+        Image.new('RGB', (300, 300), 'navy').save(buffer, 'JPEG')
+        user.profile_picture.save('other.jpg', ContentFile(buffer.getvalue()))
+        user.refresh_from_db()
+        self.assertEqual(user.profile_picture_variants, {})
+        self.assertIsNone(UserSerializer(user).data['profile_picture'])
+
+        self.assertEqual(backfill_variants(), 1)
+        user.refresh_from_db()
+        self.assertEqual(user.profile_picture_variants['source'], user.profile_picture.name)
+        self.assertEqual(backfill_variants(), 0)
+
+    def test_undecodable_image_gets_no_variants(self):
+        user = make_student().user
+        storage = user.profile_picture.storage
+        name = storage.save('profile_pictures/broken.png', ContentFile(b'not an image'))
+        with self.assertLogs('common.uploads', 'WARNING'):
+            self.assertEqual(build_variants(storage, name), {'source': name})
+
+
+FAST_HASHING = {'SCRYPT': {'WORK_FACTOR': 2 ** 10, 'BLOCK_SIZE': 8, 'PARALLELISM': 1}}
+SCRYPT_HASHERS = ['users.hashers.ScryptPasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(PASSWORD_HASHERS=SCRYPT_HASHERS, PASSWORD_HASHING=FAST_HASHING)
+class PasswordHashingTests(TestCase):
+    """Passwords are hashed with the configured hasher and migrated to it on login."""
+
+    def login(self, user, password='secret-password'):
+        return APIClient().post(reverse('users:login'), {'email': user.email, 'password': password})
+
+    def test_new_passwords_use_the_tuned_scrypt(self):
+        self.assertTrue(make_password('secret-password').startswith('scrypt$1024$'))
+
+    def test_login_rehashes_other_algorithms(self):
+        user = make_student(password='secret-password').user
+        User.objects.filter(pk=user.pk).update(password=make_password('secret-password', hasher='md5'))
+        self.assertEqual(self.login(user).status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$1024$'))
+
+    def test_login_rehashes_changed_parameters(self):
+        user = make_student(password='secret-password').user
+        with override_settings(PASSWORD_HASHING={'SCRYPT': {**FAST_HASHING['SCRYPT'], 'WORK_FACTOR': 2 ** 11}}):
+            self.assertEqual(self.login(user).status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$2048$'))
+
+    def test_registration_issues_tokens(self):
+        response = APIClient().post(reverse('users:user_register'), {
+            'email': 'new@example.com', 'first_name': 'New', 'last_name': 'User',
+            'password': 'secret-password', 'confirm_password': 'secret-password',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(read_access_token(response.data['token']).user_id, response.data['user_id'])
+        self.assertTrue(LoginSession.objects.filter(user_id=response.data['user_id']).exists())
+        self.assertFalse(Token.objects.exists())
+
+
+@override_settings(PASSWORD_HASHERS=SCRYPT_HASHERS, PASSWORD_HASHING=FAST_HASHING, LOGIN_THROTTLE={
+    'IP': {'CAPACITY': 5, 'RATE': 1.0}, 'EMAIL': {'CAPACITY': 2, 'RATE': 0.1},
+})
+class LoginThrottleTests(TestCase):
+    """Token-bucket login throttling per IP and per email."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_student(password='secret-password').user
+
+    def login(self, email, password='secret-password', ip='10.0.0.1'):
+        return APIClient().post(reverse('users:login'), {'email': email, 'password': password},
+                                REMOTE_ADDR=ip)
+
+    def test_buckets_refill_over_time(self):
+        allowed, bucket, wait = take_token(None, 2, 0.5, now=100)
+        allowed, bucket, wait = take_token(bucket, 2, 0.5, now=100)
+        self.assertEqual((allowed, bucket, wait), (True, (0, 100), 0))
+        allowed, bucket, wait = take_token(bucket, 2, 0.5, now=101)
+        self.assertEqual((allowed, wait), (False, 1))
+        allowed, bucket, wait = take_token(bucket, 2, 0.5, now=102)
+        self.assertTrue(allowed)
+
+    def test_email_is_throttled_before_hashing(self):
+        for ip in ('10.0.0.1', '10.0.0.2'):
+            self.assertEqual(self.login(self.user.email, 'wrong', ip=ip).status_code, 400)
+        # Neither the user is loaded nor the password hashed
+        with CaptureQueriesContext(connection) as context:
+            response = self.login(self.user.email.upper(), ip='10.0.0.3')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '10')
+        self.assertEqual(len(context), 0)
+
+    def test_ip_is_throttled_across_emails(self):
+        for i in range(5):
+            self.assertEqual(self.login(f'nobody{i}@example.com').status_code, 400)
+        self.assertEqual(self.login(self.user.email).status_code, 429)
+        self.assertEqual(self.login(self.user.email, ip='10.0.0.2').status_code, 200)
+
+
+@override_settings(PASSWORD_HASHERS=SCRYPT_HASHERS, PASSWORD_HASHING=FAST_HASHING, LOGIN_THROTTLE={
+    'IP': {'CAPACITY': 5, 'RATE': 1.0}, 'EMAIL': {'CAPACITY': 2, 'RATE': 0.1},
+})
+class AsyncLoginTests(TransactionTestCase):
+    """The async login view hashes in the password hashing pool; its threads use their own connections."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_student(password='secret-password').user
+
+    async def test_login(self):
+        url = reverse('users:login_async')
+        response = await self.async_client.post(url, {'email': self.user.email, 'password': 'secret-password'},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['user_id'], self.user.pk)
+        self.assertEqual(read_access_token(data['token']).user_id, self.user.pk)
+        self.assertTrue(await LoginSession.objects.filter(user_id=self.user.pk).aexists())
+
+        response = await self.async_client.post(url, {'email': self.user.email, 'password': 'wrong'},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.json())
+        response = await self.async_client.post(url, {'email': self.user.email, 'password': 'secret-password'},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '10')
+
+
+@override_settings(PASSWORD_HASHERS=SCRYPT_HASHERS, PASSWORD_HASHING=FAST_HASHING,
+                   LOGIN_THROTTLE={'ENABLED': False})
+class SignedTokenTests(TestCase):
+    """Signed access tokens, rotating refresh tokens and session revocation."""
+
+    def setUp(self):
+        user_cache.clear()
+        revocations.clear()
+        self.user = make_student(password='secret-password').user
+        self.tokens = self.login()
+
+    def login(self):
+        response = APIClient().post(reverse('users:login'), {'email': self.user.email, 'password': 'secret-password'})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def get_profile(self, token=None):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token or self.tokens["token"]}')
+        return client.get(reverse('users:user_profile'))
+
+    def refresh(self, refresh):
+        return APIClient().post(reverse('users:token_refresh'), {'refresh': refresh})
+
+    def test_warm_request_makes_no_queries(self):
+        self.assertEqual(self.get_profile().status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.get_profile()
+        self.assertEqual(response.data['id'], self.user.pk)
+
+    def test_frontend_client_flow(self):
+        # As frontend/src/services/common/api.service.ts: Bearer header, JSON refresh once expired
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["token"]}')
+        self.assertEqual(client.get(reverse('users:user_profile')).status_code, 200)
+        with mock.patch('time.time', return_value=time.time() + self.tokens['expires_in'] + 1):
+            self.assertEqual(client.get(reverse('users:user_profile')).status_code, 403)
+            response = APIClient().post(reverse('users:token_refresh'), {'refresh': self.tokens['refresh']},
+                                        format='json')
+            self.assertEqual(response.status_code, 200)
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["token"]}')
+            self.assertEqual(client.get(reverse('users:user_profile')).status_code, 200)
+
+        # Without a stored refresh token the client sends a legacy key as "Token"
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        self.assertEqual(client.get(reverse('users:user_profile')).status_code, 200)
+
+    def test_tampered_and_expired_tokens_are_rejected(self):
+        payload, timestamp, signature = self.tokens['token'].split(':')
+        self.assertEqual(self.get_profile(f'{payload}:{timestamp}:{signature[::-1]}').status_code, 403)
+        with mock.patch('time.time', return_value=time.time() + 301):
+            self.assertEqual(self.get_profile().status_code, 403)
+
+    def test_refresh_rotates_and_detects_reuse(self):
+        response = self.refresh(self.tokens['refresh'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], self.tokens['refresh'])
+        self.assertEqual(self.get_profile(response.data['token']).status_code, 200)
+
+        # The replaced refresh token was copied: the whole session ends
+        self.assertEqual(self.refresh(self.tokens['refresh']).status_code, 403)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 403)
+        self.assertEqual(self.get_profile(response.data['token']).status_code, 403)
+        self.assertEqual(self.refresh('garbage').status_code, 403)
+
+    def test_logout_revokes_the_session_only(self):
+        other = self.login()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.tokens["token"]}')
+        self.assertEqual(client.post(reverse('users:logout')).status_code, 200)
+        self.assertEqual(self.get_profile().status_code, 403)
+        self.assertEqual(self.refresh(self.tokens['refresh']).status_code, 403)
+        self.assertEqual(self.get_profile(other['token']).status_code, 200)
+
+        # Other processes learn it from the database
+        revocations.clear()
+        self.assertEqual(self.get_profile().status_code, 403)
+
+    @override_settings(AUTH_TOKENS={'SYNC_INTERVAL': 60})
+    def test_revocations_are_synced_at_intervals(self):
+        self.assertEqual(self.get_profile().status_code, 200)
+        session_key = LoginSession.objects.get(user=self.user).key
+        RevokedSession.objects.create(session_key=session_key, expires_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(self.get_profile().status_code, 200)
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 61):
+            self.assertEqual(self.get_profile().status_code, 403)
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.get_profile().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_profile().status_code, 403)
+        self.assertEqual(self.refresh(self.tokens['refresh']).status_code, 403)
+
+    def test_expired_rows_are_purged(self):
+        LoginSession.objects.update(expires_at=timezone.now())
+        RevokedSession.objects.create(session_key='old', expires_at=timezone.now())
+        self.assertEqual(purge_expired(), (1, 1))
+        self.assertFalse(LoginSession.objects.exists())
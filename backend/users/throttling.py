@@ -0,0 +1,124 @@
+"""Token-bucket throttling of login attempts, checked before any password is hashed.
+
+Every client IP and every email gets a bucket of ``CAPACITY`` tokens that
+refills at ``RATE`` tokens per second. Each login attempt, successful or not,
+takes a token, and an attempt finding its bucket empty is rejected with a
+429 and a ``Retry-After`` before the view runs. The IP bucket bounds what a
+single client can cost the server; the email bucket bounds guessing against
+one account from many addresses.
+
+Buckets live in the API cache, so they are shared by all workers when that
+cache is a shared backend. Taking a token reads and then writes the bucket
+without a lock, so concurrent attempts may occasionally both take the last
+token; the limits are about cost, and that slack does not matter to them.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from common.cache import get_cache
+
+DEFAULTS = {
+    'ENABLED': True,
+    'IP': {'CAPACITY': 30, 'RATE': 1.0},
+    'EMAIL': {'CAPACITY': 10, 'RATE': 0.1},
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'LOGIN_THROTTLE', {})}
+
+
+def take_token(bucket, capacity, rate, now):
+    """Return ``(allowed, bucket after the attempt, seconds until the next token)``.
+
+    ``bucket`` is ``(tokens, updated_at)``, or None for a full bucket.
+    """
+    tokens, updated_at = bucket if bucket is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+    if tokens < 1:
+        return False, (tokens, now), (1 - tokens) / rate
+    return True, (tokens - 1, now), 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle taking a token from the bucket of ``get_ident_value(request)``.
+
+    ``scope`` names the ``LOGIN_THROTTLE`` entry with the bucket size and rate.
+    ``aallow_request`` is the same check for async views.
+    """
+    scope = None
+    timer = time.time
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_ident_value(self, request):
+        """Return the value identifying the bucket, or None to skip the check."""
+        raise NotImplementedError('.get_ident_value() must be overridden')
+
+    def get_rate(self):
+        options = get_config()[self.scope]
+        return options['CAPACITY'], options['RATE']
+
+    def get_cache_key(self, request):
+        if not get_config()['ENABLED']:
+            return None
+        value = self.get_ident_value(request)
+        if value is None:
+            return None
+        digest = hashlib.sha256(value.encode()).hexdigest()[:32]
+        return f'throttle:{self.scope.lower()}:{digest}'
+
+    def allow_request(self, request, view):
+        key = self.get_cache_key(request)
+        if key is None:
+            return True
+        cache = get_cache()
+        allowed, bucket = self.take(cache.get(key))
+        cache.set(key, bucket, self.get_timeout())
+        return allowed
+
+    async def aallow_request(self, request, view):
+        key = self.get_cache_key(request)
+        if key is None:
+            return True
+        cache = get_cache()
+        allowed, bucket = self.take(await cache.aget(key))
+        await cache.aset(key, bucket, self.get_timeout())
+        return allowed
+
+    def take(self, bucket):
+        capacity, rate = self.get_rate()
+        allowed, bucket, self.wait_seconds = take_token(bucket, capacity, rate, self.timer())
+        return allowed, bucket
+
+    def get_timeout(self):
+        # The bucket is full again by then, which is what a missing bucket means
+        capacity, rate = self.get_rate()
+        return int(capacity / rate) + 1
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """Login attempts per client IP (``NUM_PROXIES`` aware, as DRF's throttles)."""
+    scope = 'IP'
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class LoginEmailThrottle(TokenBucketThrottle):
+    """Login attempts per email, whichever IP they come from."""
+    scope = 'EMAIL'
+
+    def get_ident_value(self, request):
+        data = request.data
+        email = data.get('email') if hasattr(data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return email.strip().lower()
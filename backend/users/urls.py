@@ -1,8 +1,8 @@
 from django.urls import path
 from users.api.views import (
-    UserRegistrationView, EducatorRegistrationView, CustomAuthToken,
-    LogoutView, UserProfileView, StudentProfileView, EducatorProfileView,
-    EducatorListView, EducatorDetailView
+    UserRegistrationView, EducatorRegistrationView, CustomAuthToken, AsyncCustomAuthToken,
+    LogoutView, TokenRefreshView, UserProfileView, StudentProfileView, EducatorProfileView,
+    EducatorStatsView, EducatorListView, AsyncEducatorListView, EducatorDetailView
 )
 
 app_name = 'users'
@@ -12,14 +12,18 @@ urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='user_register'),
     path('register/educator/', EducatorRegistrationView.as_view(), name='educator_register'),
     path('login/', CustomAuthToken.as_view(), name='login'),
+    path('login/async/', AsyncCustomAuthToken.as_view(), name='login_async'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     
     # Profile endpoints
     path('profile/', UserProfileView.as_view(), name='user_profile'),
     path('profile/student/', StudentProfileView.as_view(), name='student_profile'),
     path('profile/educator/', EducatorProfileView.as_view(), name='educator_profile'),
+    path('profile/educator/stats/', EducatorStatsView.as_view(), name='educator_stats'),
     
     # Educator endpoints
     path('educators/', EducatorListView.as_view(), name='educator_list'),
+    path('educators/async/', AsyncEducatorListView.as_view(), name='educator_list_async'),
     path('educators/<int:pk>/', EducatorDetailView.as_view(), name='educator_detail'),
 ]
\ No newline at end of file
@@ -1,5 +1,6 @@
 import React, { createContext, useContext, useEffect, useState } from 'react';
 import { AuthService } from '../../services/auth/auth.service';
+import { clearTokens, saveTokens } from '../../services/common/api.service';
 import { User } from '../../types/common/models';
 
 // Auth context state interface
@@ -60,7 +61,7 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
         setIsAuthenticated(true);
       } catch (err) {
         console.error('Authentication error:', err);
-        localStorage.removeItem('token');
+        clearTokens();
       } finally {
         setLoading(false);
       }
@@ -77,8 +78,8 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
     try {
       const response = await authService.login({ email, password });
       
-      // Save token to localStorage
-      localStorage.setItem('token', response.token);
+      // Save tokens to localStorage
+      saveTokens(response);
       
       // Get user data
       const userData = await authService.getCurrentUser();
@@ -114,8 +115,8 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
     try {
       const response = await authService.registerStudent(userData);
       
-      // Save token to localStorage
-      localStorage.setItem('token', response.token);
+      // Save tokens to localStorage
+      saveTokens(response);
       
       // Get user data
       const userDataResponse = await authService.getCurrentUser();
@@ -136,8 +137,8 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
     try {
       const response = await authService.registerEducator(userData);
       
-      // Save token to localStorage
-      localStorage.setItem('token', response.token);
+      // Save tokens to localStorage
+      saveTokens(response);
       
       // Get user data
       const userDataResponse = await authService.getCurrentUser();
@@ -1,9 +1,8 @@
 import { User } from '../../types/common/models';
-import { ApiService } from '../common/api.service';
+import { ApiService, AuthTokens, clearTokens } from '../common/api.service';
 
 // Auth response interfaces
-interface LoginResponse {
-  token: string;
+interface LoginResponse extends AuthTokens {
   user_id: number;
   email: string;
   user_type: string;
@@ -116,8 +115,7 @@ export class AuthService extends ApiService {
   // Logout user
   public async logout(): Promise<void> {
     await this.post<void>('/users/logout/');
-    localStorage.removeItem('token');
-    localStorage.removeItem('user');
+    clearTokens();
   }
 
   // Get current user profile
@@ -11,12 +11,73 @@ export const apiClient: AxiosInstance = axios.create({
   },
 });
 
+// Tokens issued at login: a short-lived signed access token and a rotating refresh token
+export interface AuthTokens {
+  token: string;
+  refresh: string;
+  expires_in: number;
+}
+
+// Refresh this many milliseconds before the access token expires
+const REFRESH_MARGIN = 30 * 1000;
+
+export const saveTokens = (tokens: AuthTokens) => {
+  localStorage.setItem('token', tokens.token);
+  localStorage.setItem('refresh', tokens.refresh);
+  localStorage.setItem('tokenExpiresAt', String(Date.now() + tokens.expires_in * 1000));
+};
+
+export const clearTokens = () => {
+  localStorage.removeItem('token');
+  localStorage.removeItem('refresh');
+  localStorage.removeItem('tokenExpiresAt');
+  localStorage.removeItem('user');
+};
+
+// Shared by concurrent requests: a refresh token is spent by its first use,
+// and the server ends the whole login if it sees it twice
+let refreshing: Promise<string> | null = null;
+
+export const refreshAccessToken = (): Promise<string> => {
+  if (!refreshing) {
+    const refresh = localStorage.getItem('refresh');
+    refreshing = axios
+      .post<AuthTokens>(`${API_URL}/users/token/refresh/`, { refresh })
+      .then((response) => {
+        saveTokens(response.data);
+        return response.data.token;
+      })
+      .catch((error) => {
+        clearTokens();
+        throw error;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+};
+
+const redirectToLogin = () => {
+  clearTokens();
+  window.location.href = '/login';
+};
+
 // Request interceptor for adding auth token
 apiClient.interceptors.request.use(
-  (config) => {
-    const token = localStorage.getItem('token');
-    if (token) {
-      config.headers['Authorization'] = `Token ${token}`;
+  async (config) => {
+    if (localStorage.getItem('refresh')) {
+      const expiresAt = Number(localStorage.getItem('tokenExpiresAt'));
+      const token = expiresAt - Date.now() < REFRESH_MARGIN
+        ? await refreshAccessToken()
+        : localStorage.getItem('token');
+      config.headers['Authorization'] = `Bearer ${token}`;
+    } else {
+      // Token stored before signed access tokens
+      const token = localStorage.getItem('token');
+      if (token) {
+        config.headers['Authorization'] = `Token ${token}`;
+      }
     }
     return config;
   },
@@ -30,12 +91,26 @@ apiClient.interceptors.response.use(
   (response) => {
     return response;
   },
-  (error) => {
-    // Handle 401 Unauthorized errors (token expired or invalid)
-    if (error.response && error.response.status === 401) {
-      localStorage.removeItem('token');
-      localStorage.removeItem('user');
-      window.location.href = '/login';
+  async (error) => {
+    const config = error.config;
+    const status = error.response?.status;
+    // The API answers 403 to rejected credentials as well as to forbidden requests
+    if (status === 401 || status === 403) {
+      if (localStorage.getItem('refresh') && config && !config._retried) {
+        let token: string;
+        try {
+          token = await refreshAccessToken();
+        } catch (refreshError) {
+          redirectToLogin();
+          return Promise.reject(error);
+        }
+        config._retried = true;
+        config.headers['Authorization'] = `Bearer ${token}`;
+        return apiClient(config);
+      }
+      if (status === 401) {
+        redirectToLogin();
+      }
     }
     return Promise.reject(error);
   }
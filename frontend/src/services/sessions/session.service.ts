@@ -1,10 +1,11 @@
-import { Session, SessionDetail, SessionRequest } from '../../types/common/models';
+import { CursorPage, Session, SessionDetail, SessionRequest } from '../../types/common/models';
 import { ApiService } from '../common/api.service';
 
 export class SessionService extends ApiService {
-  // Get all sessions for current user
+  // Get the first page of sessions for current user
   public async getMySessions(status?: string): Promise<Session[]> {
-    return this.get<Session[]>('/sessions/my-sessions/', { params: { status } });
+    const page = await this.get<CursorPage<Session>>('/sessions/my-sessions/', { params: { status } });
+    return page.results;
   }
   
   // Get session detail by ID
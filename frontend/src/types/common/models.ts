@@ -117,4 +117,11 @@ export interface PayoutAccount {
   is_verified: boolean;
   created_at: string;
   updated_at: string;
-}
\ No newline at end of file
+}
+
+// Cursor-paginated list responses
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}